@@ -0,0 +1,37 @@
+LIST_SQL_CREATE_TABLES = [
+    """
+    /* DROP TABLE IF EXISTS nomenclature; */
+    CREATE TABLE IF NOT EXISTS nomenclature(
+        nm_id BIGINT NOT NULL,
+        created_at TIMESTAMPTZ DEFAULT Now(),
+        marketplace_id INT NOT NULL,
+        company_id INT NOT NULL,
+        vendor_code VARCHAR NOT NULL,
+        skus VARCHAR[] NOT NULL DEFAULT '{}',
+        updated_at VARCHAR NULL,
+        json_data JSONB NULL
+    );""",
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'nomenclature' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE nomenclature ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS nomenclature_company_marketplace_nm_id
+    ON nomenclature (company_id, marketplace_id, nm_id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS nomenclature_company_marketplace_vendor_code
+    ON nomenclature (company_id, marketplace_id, vendor_code)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS nomenclature_skus
+    ON nomenclature USING GIN (skus)
+    """,
+]
@@ -15,7 +15,7 @@ LIST_SQL_CREATE_TABLES = [
         status VARCHAR NOT NULL,
         currency VARCHAR NULL,
         total NUMERIC,
-        json_data JSON NULL,
+        json_data JSONB NULL,
         schema VARCHAR
     );
 
@@ -28,9 +28,31 @@ LIST_SQL_CREATE_TABLES = [
         qnt INT NOT NULL,
         price NUMERIC NOT NULL,
         title VARCHAR,
-        json_data JSON NULL
+        json_data JSONB NULL
     );
     """,
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'orders' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE orders ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'orders_line' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE orders_line ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
     """ALTER TABLE IF EXISTS orders add IF NOT EXISTS transfer_to_platform BOOLEAN DEFAULT FALSE;""",
     """
     CREATE INDEX IF NOT EXISTS created_at
@@ -47,4 +69,32 @@ LIST_SQL_CREATE_TABLES = [
     """
     ALTER TABLE IF EXISTS orders add IF NOT EXISTS transfer_to_platform BOOLEAN DEFAULT FALSE;
     """,
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'orders_company_marketplace_id_mp') THEN
+            /* Из повторов заказа остаётся последняя сохранённая строка */
+            DELETE FROM orders USING orders AS newer
+            WHERE orders.company_id IS NOT DISTINCT FROM newer.company_id
+                AND orders.marketplace_id IS NOT DISTINCT FROM newer.marketplace_id
+                AND orders.id_mp = newer.id_mp
+                AND orders.id < newer.id;
+            CREATE UNIQUE INDEX orders_company_marketplace_id_mp ON orders (company_id, marketplace_id, id_mp);
+        END IF;
+    END $$;
+    """,
+    """
+    /* Фильтры по ключам json_data (nmId, barcode, srid, supplierArticle) проверяют вхождение @> */
+    CREATE INDEX IF NOT EXISTS orders_json_data
+    ON orders USING GIN (json_data jsonb_path_ops)
+    """,
+    """
+    /* Keyset-пагинация страниц: (sort_field, key_field) в пределах продавца */
+    CREATE INDEX IF NOT EXISTS orders_company_marketplace_id
+    ON orders (company_id, marketplace_id, id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS orders_company_marketplace_created_at_id
+    ON orders (company_id, marketplace_id, created_at, id)
+    """,
 ]
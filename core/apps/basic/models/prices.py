@@ -0,0 +1,16 @@
+LIST_SQL_CREATE_TABLES = [
+    """
+    /* DROP TABLE IF EXISTS price_snapshot; */
+    CREATE TABLE IF NOT EXISTS price_snapshot(
+        nm_id BIGINT NOT NULL,
+        price INT NOT NULL,
+        discount INT NOT NULL,
+        updated_at TIMESTAMPTZ DEFAULT Now(),
+        marketplace_id INT NOT NULL,
+        company_id INT NOT NULL
+    );""",
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS price_snapshot_company_marketplace_nm_id
+    ON price_snapshot (company_id, marketplace_id, nm_id)
+    """,
+]
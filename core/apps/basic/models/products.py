@@ -9,9 +9,20 @@ LIST_SQL_CREATE_TABLES = [
         product_id INT UNIQUE NOT NULL,
         offer_id VARCHAR NOT NULL,
         sku INT NOT NULL,
-        json_data JSON NULL
+        json_data JSONB NULL
     );""",
     """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'product_info' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE product_info ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
+    """
     /* DROP TABLE IF EXISTS product_attr; */
     CREATE TABLE IF NOT EXISTS product_attr(
         product_attr_id SERIAL PRIMARY KEY,
@@ -20,6 +31,17 @@ LIST_SQL_CREATE_TABLES = [
         company_id INT NULL,
         product_id INT UNIQUE NOT NULL,
         offer_id VARCHAR NOT NULL,
-        json_data JSON NULL
+        json_data JSONB NULL
     );""",
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'product_attr' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE product_attr ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
 ]
@@ -8,9 +8,20 @@ LIST_SQL_CREATE_TABLES = [
         company_id INT NULL,
         gnumber VARCHAR(50) NOT NULL,
         srid VARCHAR NOT NULL,
-        json_data JSON NULL
+        json_data JSONB NULL
     );""",
     """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'sales' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE sales ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
+    """
     CREATE INDEX IF NOT EXISTS created_at
     ON sales (created_at)
     """,
@@ -18,4 +29,55 @@ LIST_SQL_CREATE_TABLES = [
     CREATE INDEX IF NOT EXISTS company_marketplace
     ON sales (company_id, marketplace_id)
     """,
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'sales_company_marketplace_id_mp_key') THEN
+            /* Из повторов продажи остаётся последняя сохранённая строка */
+            DELETE FROM sales USING sales AS newer
+            WHERE sales.company_id IS NOT DISTINCT FROM newer.company_id
+                AND sales.marketplace_id IS NOT DISTINCT FROM newer.marketplace_id
+                AND sales.id_mp = newer.id_mp
+                AND sales.ctid < newer.ctid;
+            DROP INDEX IF EXISTS sales_company_marketplace_id_mp;
+            CREATE UNIQUE INDEX sales_company_marketplace_id_mp_key ON sales (company_id, marketplace_id, id_mp);
+        END IF;
+    END $$;
+    """,
+    """
+    /* DROP TABLE IF EXISTS sales_report; */
+    CREATE TABLE IF NOT EXISTS sales_report(
+        rrd_id BIGINT NOT NULL,
+        created_at TIMESTAMPTZ DEFAULT Now(),
+        marketplace_id INT NOT NULL,
+        company_id INT NOT NULL,
+        realizationreport_id BIGINT NULL,
+        srid VARCHAR NULL,
+        rr_dt DATE NULL,
+        json_data JSONB NULL
+    );""",
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'sales_report' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE sales_report ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS sales_report_company_marketplace_rrd_id
+    ON sales_report (company_id, marketplace_id, rrd_id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS sales_report_company_marketplace_rr_dt
+    ON sales_report (company_id, marketplace_id, rr_dt)
+    """,
+    """
+    /* Фильтры по ключам json_data (nmId, barcode, srid, supplierArticle) проверяют вхождение @> */
+    CREATE INDEX IF NOT EXISTS sales_json_data
+    ON sales USING GIN (json_data jsonb_path_ops)
+    """,
 ]
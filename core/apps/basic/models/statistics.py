@@ -8,12 +8,23 @@ LIST_SQL_CREATE_TABLES = [
         vendor_code VARCHAR NOT NULL,
         marketplace_id INT NULL,
         company_id INT NULL,
-        json_data JSON NULL,
+        json_data JSONB NULL,
         date_reg DATE DEFAULT Now(),
         stocks_seller INT,
         stocks_market INT
     );""",
     """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'statistics' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE statistics ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
+    """
     CREATE INDEX IF NOT EXISTS created_at
     ON statistics (created_at)
     """,
@@ -21,4 +32,18 @@ LIST_SQL_CREATE_TABLES = [
     CREATE INDEX IF NOT EXISTS company_marketplace
     ON statistics (company_id, marketplace_id)
     """,
+    """
+    /* Фильтры представления по ключам json_data (?json_data.<ключ>=) проверяют вхождение @> */
+    CREATE INDEX IF NOT EXISTS statistics_json_data
+    ON statistics USING GIN (json_data jsonb_path_ops)
+    """,
+    """
+    /* Keyset-пагинация страниц: (sort_field, key_field) в пределах продавца */
+    CREATE INDEX IF NOT EXISTS statistics_company_marketplace_id
+    ON statistics (company_id, marketplace_id, id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS statistics_company_marketplace_date_reg_id
+    ON statistics (company_id, marketplace_id, date_reg, id)
+    """,
 ]
@@ -0,0 +1,16 @@
+LIST_SQL_CREATE_TABLES = [
+    """
+    /* DROP TABLE IF EXISTS stock_snapshot; */
+    CREATE TABLE IF NOT EXISTS stock_snapshot(
+        warehouse_id BIGINT NOT NULL,
+        sku VARCHAR NOT NULL,
+        amount INT NOT NULL,
+        updated_at TIMESTAMPTZ DEFAULT Now(),
+        marketplace_id INT NOT NULL,
+        company_id INT NOT NULL
+    );""",
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS stock_snapshot_company_marketplace_warehouse_sku
+    ON stock_snapshot (company_id, marketplace_id, warehouse_id, sku)
+    """,
+]
@@ -12,9 +12,20 @@ LIST_SQL_CREATE_TABLES = [
         campaign_id VARCHAR(255),
         schema VARCHAR(3),
         attached_platform_warehouse VARCHAR(255),
-        json_data JSON NULL
+        json_data JSONB NULL
     );""",
     """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'warehouse' AND column_name = 'json_data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE warehouse ALTER COLUMN json_data TYPE JSONB USING json_data::jsonb;
+        END IF;
+    END $$;
+    """,
+    """
     CREATE INDEX IF NOT EXISTS created_at
     ON warehouse (created_at)
     """,
@@ -22,4 +33,14 @@ LIST_SQL_CREATE_TABLES = [
     CREATE INDEX IF NOT EXISTS company_marketplace
     ON warehouse (company_id, marketplace_id)
     """,
+    """
+    /* Фильтры представления по ключам json_data (?json_data.<ключ>=) проверяют вхождение @> */
+    CREATE INDEX IF NOT EXISTS warehouse_json_data
+    ON warehouse USING GIN (json_data jsonb_path_ops)
+    """,
+    """
+    /* Keyset-пагинация страниц: (sort_field, key_field) в пределах продавца */
+    CREATE INDEX IF NOT EXISTS warehouse_company_marketplace_warehouse_id
+    ON warehouse (company_id, marketplace_id, warehouse_id)
+    """,
 ]
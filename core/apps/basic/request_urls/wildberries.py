@@ -1,4 +1,4 @@
-from core.project.types import URLParameterSchema
+from core.project.types import QuotaProfile, URLParameterSchema
 from core.apps.basic.types import (
     WBRequestParamsRealizationSalesReport,
     WBRequestBodyCreateSupply,
@@ -84,11 +84,24 @@ from core.apps.constants import (
 )
 from core.project.constants import (
     SECONDS_IN_MINUTE,
+    SECONDS_IN_HOUR,
     SECONDS_IN_DAY,
 )
 from core.project.enums.common import RequestMethod
 from core.project.conf import settings
 
+# Квоты Wildberries на один ключ доступа по семействам API
+QUOTA_CONTENT = QuotaProfile(name="content", requests=100, interval=SECONDS_IN_MINUTE, burst=5)
+QUOTA_STATISTICS = QuotaProfile(name="statistics", requests=1, interval=SECONDS_IN_MINUTE, max_concurrency=1)
+QUOTA_ANALYTICS = QuotaProfile(name="analytics", requests=3, interval=SECONDS_IN_MINUTE, burst=3, max_concurrency=1)
+QUOTA_MARKETPLACE = QuotaProfile(name="marketplace", requests=300, interval=SECONDS_IN_MINUTE, burst=20)
+QUOTA_PRICES = QuotaProfile(name="prices", requests=10, interval=6, burst=5)
+QUOTA_SUPPLIES = QuotaProfile(name="supplies", requests=6, interval=SECONDS_IN_MINUTE)
+QUOTA_FEEDBACKS = QuotaProfile(name="feedbacks", requests=1, interval=1, burst=3)
+# Таймаут (с) выгрузок метода statistics (заказы, поставки, остатки, продажи, отчёт о реализации):
+# у крупных продавцов ответ формируется на стороне API долго
+REPORT_REQUEST_TIMEOUT = SECONDS_IN_MINUTE * 5
+
 
 URL_CREATE_CARDS_PRODUCTS_WILDBERRIES_V2 = URLParameterSchema(
     name="CONTENT_V1_CARDS_UPLOAD",
@@ -98,6 +111,7 @@ URL_CREATE_CARDS_PRODUCTS_WILDBERRIES_V2 = URLParameterSchema(
     error_schema=WBResponseCreateCardsProductsError,
     title="Создание КТ",
     positive_response_code=200,
+    quota=QUOTA_CONTENT,
     url=f"/content/v{VERSION_2}/cards/upload",
     url_api_point=settings.API_CONTENT_URL,
 )
@@ -108,6 +122,7 @@ URL_UPDATE_CARDS_PRODUCTS_WILDBERRIES_V3 = URLParameterSchema(
     has_cache=False,
     response_schema=WBResponseUpdateCardsProducts,
     title="Редактирование КТ",
+    quota=QUOTA_CONTENT,
     url=f"/content/v{VERSION_2}/cards/update",
     url_api_point=settings.API_CONTENT_URL,
 )
@@ -118,7 +133,7 @@ URL_LIST_NOMENCLATURES_WILDBERRIES_V2 = URLParameterSchema(
     has_cache=False,
     response_schema=WBResponseListNomenclaturesV2,
     title="Список НМ",
-    timeout=0.8,
+    quota=QUOTA_CONTENT,
     url=f"/content/v{VERSION_2}/get/cards/list",
     url_api_point=settings.API_CONTENT_URL,
     url_sandbox=settings.SANDBOX_API_CONTENT_URL,
@@ -132,6 +147,7 @@ URL_LIST_ERROR_NOMENCLATURES_WILDBERRIES = URLParameterSchema(
     body_schema=WBRequestLocale,
     response_schema=WBResponseListErrorsNomenclatures,
     title="Список несозданных НМ с ошибками",
+    quota=QUOTA_CONTENT,
     url=f"/content/v{VERSION_2}/cards/error/list",
     url_api_point=settings.API_CONTENT_URL,
 )
@@ -141,6 +157,7 @@ URL_LIST_CARD_PRODUCTS_WILDBERRIES = URLParameterSchema(
     url_api_point=settings.API_CONTENT_URL,
     name="CONTENT_V1_CARDS_FILTER",
     method=RequestMethod.POST,
+    quota=QUOTA_CONTENT,
     url=f"/content/v{VERSION_1}/cards/filter",
     has_cache=False,
     response_schema=WBResponseListCardProducts,
@@ -159,6 +176,7 @@ URL_UPDATE_MEDIA_IN_CARD_PRODUCT_WILDBERRIES = URLParameterSchema(
     title="Изменить медиафайлы",
     positive_response_code=200,
     version=VERSION_3,
+    quota=QUOTA_CONTENT,
     url=f"/content/v{VERSION_3}/media/save",
     url_api_point=settings.API_CONTENT_URL,
 )
@@ -171,6 +189,7 @@ URL_ADD_MEDIA_IN_CARD_PRODUCT_WILDBERRIES = URLParameterSchema(
     has_cache=False,
     response_schema=WBResponseAddMediaInCardProduct,
     title="Добавление медиа контента в КТ",
+    quota=QUOTA_CONTENT,
     url=f"/content/v{VERSION_1}/media/file",
     url_api_point=settings.API_CONTENT_URL,
 )
@@ -220,7 +239,8 @@ URL_GET_ORDERS_WILDBERRIES_V1 = URLParameterSchema(
     title="Импорт Заказов FBO",
     body_schema=WBRequestBodyFBOOrders,
     response_schema=WBResponseFBOOrders,
-    timeout=70,
+    quota=QUOTA_STATISTICS,
+    request_timeout=REPORT_REQUEST_TIMEOUT,
     url=f"/api/v{VERSION_1}/supplier/orders",
     url_api_point=settings.API_STATISTICS_URL,
     url_sandbox=settings.SANDBOX_API_STATISTICS_URL,
@@ -236,6 +256,8 @@ URL_GET_SUPPLIES_WILDBERRIES_V1 = URLParameterSchema(
     query_schema=WBRequestParamsSuppliesV1,
     method=RequestMethod.GET,
     sync=False,
+    quota=QUOTA_STATISTICS,
+    request_timeout=REPORT_REQUEST_TIMEOUT,
     url=f"/api/v{VERSION_1}/supplier/incomes",
     url_api_point=settings.API_STATISTICS_URL,
 )
@@ -250,6 +272,7 @@ URL_GET_SUPPLIES_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=200,
     title="Импорт поставок по версии 3",
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/supplies",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -266,6 +289,7 @@ URL_CREATE_SUPPLY_WILDBERRIES_V3 = URLParameterSchema(
     error_schema=WBResponseErrors,
     sync=True,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/supplies",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -280,6 +304,7 @@ URL_DELIVER_SUPPLY_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=204,
     title="Метод Передачи поставки в доставку",
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/supplies/%s/deliver",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -295,6 +320,7 @@ URL_ADD_ORDERS_TO_SUPPLY_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=204,
     title="Добавить к поставке сборочное задание",
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/supplies/%s/orders/%s",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -309,6 +335,7 @@ URL_GET_BARCODE_SUPPLY_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=200,
     title="Получить QR поставки",
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/supplies/%s/barcode",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -325,6 +352,7 @@ URL_GET_BARCODE_ORDERS_WILDBERRIES_V3 = URLParameterSchema(
     title="Получить этикетки для сборочных заданий",
     sync=True,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/orders/stickers",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -341,6 +369,7 @@ URL_GET_SUPPLY_ORDERS_WILDBERRIES_V3 = URLParameterSchema(
     title="Получить сборочные задания в поставке",
     sync=False,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/supplies/%s/orders",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -355,6 +384,7 @@ URL_GET_ORDERS_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=200,
     title="Импорт Заказов FBS",
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/orders",
     url_api_point=settings.API_MARKETPLACE_URL,
     url_sandbox=settings.API_BASE_URL,
@@ -369,6 +399,7 @@ URL_GET_NEW_ORDERS_WILDBERRIES_V3 = URLParameterSchema(
     response_schema=WBResponseFBSOrders,
     positive_response_code=200,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/orders/new",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -383,6 +414,7 @@ URL_STOCKS_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=200,
     title="Остатки товаров на складе",
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/stocks/%s",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -397,6 +429,7 @@ URL_EXPORT_STOCKS_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=204,
     title="Обновление остатков товара",
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/stocks/%s",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -406,10 +439,13 @@ URL_WAREHOUSES_WILDBERRIES_SELLER = URLParameterSchema(
     title="Импорт списка складов продавца",
     name="API_V3_WAREHOUSES",
     method=RequestMethod.GET,
-    has_cache=False,
-    cache_expires_in=1 if not settings.DEBUG else 0,  # костыль, тк запрос кэшируется на тестах и часть падает в CI
+    has_cache=True,
+    # костыль, тк запрос кэшируется на тестах и часть падает в CI
+    cache_expires_in=SECONDS_IN_HOUR if not settings.DEBUG else 0,
+    stale_while_revalidate=True,
     response_schema=WBResponseListWarehouse,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/warehouses",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -422,7 +458,8 @@ URL_STOCKS_WILDBERRIES_V1 = URLParameterSchema(
     has_cache=True,
     query_schema=WBRequestBodyGetStocksFBO,
     response_schema=WBResponseWBStockFBO,
-    timeout=61,
+    quota=QUOTA_STATISTICS,
+    request_timeout=REPORT_REQUEST_TIMEOUT,
     cache_expires_in=SECONDS_IN_MINUTE,
     url=f"/api/v{VERSION_1}/supplier/stocks",
     url_api_point=settings.API_STATISTICS_URL,
@@ -435,7 +472,8 @@ URL_SALES_WILDBERRIES_V1 = URLParameterSchema(
     name="API_V1_SUPPLIER_SALES",
     method=RequestMethod.GET,
     has_cache=True,
-    timeout=61,
+    quota=QUOTA_STATISTICS,
+    request_timeout=REPORT_REQUEST_TIMEOUT,
     body_schema=WBRequestParamsSales,
     response_schema=WBResponseSales,
     cache_expires_in=SECONDS_IN_MINUTE * 30,
@@ -455,6 +493,7 @@ URL_GET_INFO_SUPPLY_WILDBERRIES_V3 = URLParameterSchema(
     name="API_V3_SUPPLIES_SUPPLY_GET",
     sync=True,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/supplies/%s",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -470,6 +509,7 @@ URL_DELETE_SUPPLY_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=204,
     sync=True,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/supplies/%s",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -495,6 +535,7 @@ URL_DELETE_STOCKS_WILDBERRIES_V3 = URLParameterSchema(
     body_schema=WBRequestBodyDeleteWarehouseStocks,
     response_schema=WBResponseDeleteWarehouseStocks,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/stocks/%s",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -508,6 +549,7 @@ URL_CANCEL_ORDER_WILDBERRIES_V3 = URLParameterSchema(
     body_schema=None,
     response_schema=WBResponseOrderCancel,
     positive_response_code=204,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/orders/%s/cancel",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -523,6 +565,7 @@ URL_GET_ORDERS_STATUS_WILDBERRIES_V3 = URLParameterSchema(
     response_schema=WBResponseOrdersStatus,
     positive_response_code=200,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/orders/status",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -537,6 +580,7 @@ URL_ORDERS_META_SERIALISED_GLOBAL_TRADE_ITEM_NUMBER = URLParameterSchema(
     positive_response_code=204,
     title="Закрепить за сборочным заданием КиЗ (маркировку Честного знака)",
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/orders/%s/meta/{'#sgtin'[1:]}",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -551,6 +595,8 @@ URL_REALIZATION_SALES_REPORT = URLParameterSchema(
     response_schema=WBResponseRealizationSalesReport,
     positive_response_code=200,
     sync=False,
+    quota=QUOTA_STATISTICS,
+    request_timeout=REPORT_REQUEST_TIMEOUT,
     url="/api/v5/supplier/reportDetailByPeriod",
     url_api_point=settings.API_STATISTICS_URL,
 )
@@ -565,6 +611,7 @@ URL_OFFICES_WILDBERRIES_V3 = URLParameterSchema(
     positive_response_code=200,
     sync=False,
     version=VERSION_3,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/offices",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -578,6 +625,7 @@ URL_WAREHOUSE_CREATE_WILDBERRIES_SELLER = URLParameterSchema(
     response_schema=WBResponseWarehouseCreate,
     positive_response_code=201,
     sync=True,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/warehouses",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -591,6 +639,7 @@ URL_WAREHOUSE_UPDATE_WILDBERRIES_SELLER = URLParameterSchema(
     response_schema=None,
     positive_response_code=204,
     sync=True,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/warehouses/%s",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -604,6 +653,7 @@ URL_WAREHOUSE_DELETE_WILDBERRIES_SELLER = URLParameterSchema(
     response_schema=None,
     positive_response_code=204,
     sync=True,
+    quota=QUOTA_MARKETPLACE,
     url=f"/api/v{VERSION_3}/warehouses/%s",
     url_api_point=settings.API_MARKETPLACE_URL,
 )
@@ -618,6 +668,7 @@ URL_STATISTICS_FOR_SELECTED_PERIOD = URLParameterSchema(
     error_schema=WBResponseErrors,
     positive_response_code=200,
     sync=True,
+    quota=QUOTA_ANALYTICS,
     url=f"/content/v{VERSION_1}/analytics/nm-report/detail",
     url_api_point=settings.API_STATISTICS_URL,
 )
@@ -627,9 +678,12 @@ URL_PARENT_SUBJECTS = URLParameterSchema(
     name="API_PARENT_SUBJECTS",
     method=RequestMethod.GET,
     has_cache=True,
+    cache_expires_in=SECONDS_IN_DAY,
+    stale_while_revalidate=True,
     response_schema=WBResponseParentSubjects,
     error_schema=WBResponseErrors,
     positive_response_code=200,
+    quota=QUOTA_FEEDBACKS,
     url="/api/v1/parent-subjects",
     url_api_point=settings.API_FEEDBACKS_URL,
 )
@@ -639,10 +693,13 @@ URL_LIST_OF_OBJECTS = URLParameterSchema(
     name="API_LIST_OF_OBJECTS",
     method=RequestMethod.GET,
     has_cache=True,
+    cache_expires_in=SECONDS_IN_DAY,
+    stale_while_revalidate=True,
     body_schema=WBRequestListOfObjects,
     response_schema=WBResponseListOfObjects,
     error_schema=WBResponseErrors,
     positive_response_code=200,
+    quota=QUOTA_CONTENT,
     url="/content/v2/object/all",
     url_api_point=settings.API_CONTENT_URL,
 )
@@ -653,10 +710,13 @@ URL_OBJECT_CHARACTERISTICS = URLParameterSchema(
     name="API_OBJECT_CHARACTERISTICS",
     method=RequestMethod.GET,
     has_cache=True,
+    cache_expires_in=SECONDS_IN_DAY,
+    stale_while_revalidate=True,
     body_schema=WBRequestObjectCharacteristics,
     response_schema=WBResponseObjectCharacteristics,
     error_schema=WBResponseErrors,
     positive_response_code=200,
+    quota=QUOTA_CONTENT,
     url="/content/v2/object/charc" "s/%s",
     url_api_point=settings.API_CONTENT_URL,
 )
@@ -669,7 +729,7 @@ URL_EXPORT_PRICES_AND_DISCOUNTS = URLParameterSchema(
     response_schema=WBResponseSetPricesAndDiscounts,
     error_schema=WBResponseErrors,
     positive_response_code=200,
-    timeout=1,
+    quota=QUOTA_PRICES,
     url="/api/v2/upload/task",
     url_api_point=settings.API_PRICES_URL,
     url_sandbox=settings.SANDBOX_API_PRICES_URL,
@@ -683,7 +743,7 @@ URL_DOWNLOAD_PROCESSED_STATUS = URLParameterSchema(
     response_schema=WBResponseDownloadProcessedStatus,
     error_schema=WBResponseErrors,
     positive_response_code=200,
-    timeout=1,
+    quota=QUOTA_PRICES,
     url="/api/v2/history/tasks",
     url_api_point=settings.API_PRICES_URL,
     url_sandbox=settings.SANDBOX_API_PRICES_URL,
@@ -697,7 +757,7 @@ URL_PROCESSED_LOAD_DETAILS = URLParameterSchema(
     response_schema=WBResponseProcessedLoadDetails,
     error_schema=WBResponseErrors,
     positive_response_code=200,
-    timeout=1,
+    quota=QUOTA_PRICES,
     url="/api/v2/history/goods/task",
     url_api_point=settings.API_PRICES_URL,
     url_sandbox=settings.SANDBOX_API_PRICES_URL,
@@ -711,7 +771,7 @@ URL_RAW_LOAD_DETAILS = URLParameterSchema(
     response_schema=WBResponseRawLoadDetails,
     error_schema=WBResponseErrors,
     positive_response_code=200,
-    timeout=1,
+    quota=QUOTA_PRICES,
     url="/api/v2/buffer/goods/task",
     url_api_point=settings.API_PRICES_URL,
     url_sandbox=settings.SANDBOX_API_PRICES_URL,
@@ -725,7 +785,7 @@ URL_RAW_LOAD_PROGRESS = URLParameterSchema(
     response_schema=WBResponseRawLoadProgress,
     error_schema=WBResponseErrors,
     positive_response_code=200,
-    timeout=1,
+    quota=QUOTA_PRICES,
     url=f"/api/v{VERSION_2}/buffer/tasks",
     url_api_point=settings.API_PRICES_URL,
     url_sandbox=settings.SANDBOX_API_PRICES_URL,
@@ -740,6 +800,7 @@ URL_SIZE_GOODS_PRICE_UPDATE = URLParameterSchema(
     body_schema=WBRequestBodySizeGoodsPriceUpdate,
     response_schema=WBResponseError,
     positive_response_code=200,
+    quota=QUOTA_PRICES,
     url=f"/api/v{VERSION_2}/upload/task/size",
     url_api_point=settings.API_PRICES_URL,
     url_sandbox=settings.SANDBOX_API_PRICES_URL,
@@ -754,6 +815,7 @@ URL_LIST_GOODS_SIZE = URLParameterSchema(
     body_schema=WBGoodsSizeQueryParams,
     response_schema=WBResponseListGoodsSize,
     positive_response_code=200,
+    quota=QUOTA_PRICES,
     url=f"/api/v{VERSION_2}/list/goods/size/nm",
     url_api_point=settings.API_PRICES_URL,
     url_sandbox=settings.SANDBOX_API_PRICES_URL,
@@ -768,6 +830,7 @@ URL_LIST_GOODS_FILTER = URLParameterSchema(
     body_schema=WBFilterGoodsQueryParams,
     response_schema=WBResponseFilterListGoods,
     positive_response_code=200,
+    quota=QUOTA_PRICES,
     url=f"/api/v{VERSION_2}/list/goods/filter",
     url_api_point=settings.API_PRICES_URL,
     url_sandbox=settings.SANDBOX_API_PRICES_URL,
@@ -778,11 +841,14 @@ URL_WAREHOUSES_FBO_WILDBERRIES_V1 = URLParameterSchema(
     name="API_V1_WAREHOUSES",
     method=RequestMethod.GET,
     has_cache=True,
+    cache_expires_in=SECONDS_IN_DAY,
+    stale_while_revalidate=True,
     body_schema=None,
     response_schema=WBResponseWarehouses,
     positive_response_code=200,
     sync=False,
     version=VERSION_3,
+    quota=QUOTA_SUPPLIES,
     url=f"/api/v{VERSION_1}/warehouses",
     url_api_point=settings.API_SUPPLIES_URL,
 )
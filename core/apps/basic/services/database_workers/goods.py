@@ -1,5 +1,90 @@
-from core.project.services.database_workers import DBHandler
+from typing import Collection, Optional
+
+from core.apps.basic.sql_commands.goods import (
+    SQL_UPSERT_NOMENCLATURE,
+    SQL_DELETE_NOMENCLATURE_EXCEPT,
+    SQL_SELECT_NOMENCLATURE,
+    SQL_SELECT_IDS_NOMENCLATURE,
+    SQL_SELECT_NOMENCLATURE_BY_NM_IDS,
+    SQL_SELECT_NOMENCLATURE_BY_VENDOR_CODES,
+    SQL_SELECT_NOMENCLATURE_BY_SKUS,
+)
+from core.apps.basic.sql_commands.prices import SQL_SELECT_PRICE_SNAPSHOT, SQL_UPSERT_PRICE_SNAPSHOT
+from core.apps.basic.types import WBCursorNomenclatureV2, WBNomenclature, WBRequestItemSetPriceAndDiscount
+from core.project.enums.common import SettingsInDataBase
+from core.project.utils import deserialize
+from core.project.services.database_workers import CommonDBHandler, DBHandler
 
 
 class ProductDBHandler(DBHandler):
     pass
+
+
+class NomenclatureDBHandler(DBHandler):
+    """
+    Локальная копия каталога карточек продавца. Курсор последней синхронизации
+    (updatedAt и nmID последней полученной карточки) хранится в таблице настроек
+    """
+
+    code_settings: str = SettingsInDataBase.CURSOR_NOMENCLATURE.value
+    sql_select: str = SQL_SELECT_NOMENCLATURE
+    sql_select_ids: str = SQL_SELECT_IDS_NOMENCLATURE
+    sql_insert: str = SQL_UPSERT_NOMENCLATURE
+    sql_update: str = SQL_UPSERT_NOMENCLATURE
+    table = "nomenclature"
+    key_field = "nm_id"
+    not_null_fields = frozenset({"marketplace_id", "company_id", "vendor_code", "skus"})
+
+    async def get_cursor(self) -> Optional[WBCursorNomenclatureV2]:
+        value = await self._select_setting(self.code_settings)
+        return WBCursorNomenclatureV2.model_validate_json(value) if value else None
+
+    async def upsert(self, cards: Collection[WBNomenclature], cursor: WBCursorNomenclatureV2, replace: bool = False):
+        """
+        Сохраняет изменённые карточки и курсор в одной транзакции.
+        При replace удаляются карточки, которых нет среди переданных (полная синхронизация)
+        """
+        params = self.params.company_id, self.params.marketplace_id
+        values = tuple(card.args_for_insert_row(*params) for card in cards)
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                if replace:
+                    await connection.execute(SQL_DELETE_NOMENCLATURE_EXCEPT, *params, [value[0] for value in values])
+                if values:
+                    await connection.executemany(self.sql_insert, values)
+                await self._reg_action(connection, self.code_settings, cursor.model_dump_json(exclude_none=True))
+
+    async def select(self, sql: Optional[str] = None, *args) -> list[WBNomenclature]:
+        async with self.pool.acquire() as connection:
+            records = await connection.fetch(
+                sql or self.sql_select, self.params.company_id, self.params.marketplace_id, *args
+            )
+        return [WBNomenclature.model_validate(deserialize(record["json_data"])) for record in records]
+
+    async def by_nm_ids(self, nm_ids: Collection[int]) -> list[WBNomenclature]:
+        return await self.select(SQL_SELECT_NOMENCLATURE_BY_NM_IDS, list(nm_ids))
+
+    async def by_vendor_codes(self, vendor_codes: Collection[str]) -> list[WBNomenclature]:
+        return await self.select(SQL_SELECT_NOMENCLATURE_BY_VENDOR_CODES, list(vendor_codes))
+
+    async def by_skus(self, skus: Collection[str]) -> list[WBNomenclature]:
+        return await self.select(SQL_SELECT_NOMENCLATURE_BY_SKUS, list(skus))
+
+
+class PriceSnapshotDBHandler(CommonDBHandler):
+    """
+    Цены и скидки, последними успешно выгруженные на маркетплейс
+    """
+
+    async def prices(self, nm_ids: Collection[int]) -> dict[int, tuple[int, int]]:
+        records = await self.pool.fetch(
+            SQL_SELECT_PRICE_SNAPSHOT, self.params.company_id, self.params.marketplace_id, list(nm_ids)
+        )
+        return {record["nm_id"]: (record["price"], record["discount"]) for record in records}
+
+    async def save(self, items: Collection[WBRequestItemSetPriceAndDiscount]):
+        params = self.params.company_id, self.params.marketplace_id
+        values = tuple((item.nmID, item.price, item.discount, *params) for item in items)
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                await connection.executemany(SQL_UPSERT_PRICE_SNAPSHOT, values)
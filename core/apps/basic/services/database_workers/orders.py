@@ -10,9 +10,15 @@ from core.apps.basic.sql_commands.orders import (
     SQL_SELECT_IDS_ORDERS,
     SQL_UPDATE_ORDERS,
     SQL_SELECT_ORDERS_MOVEMENT_DATA,
+    ORDERS_COLUMNS,
+    ORDERS_STAGING_ORDINAL,
+    SQL_CREATE_ORDERS_STAGING,
+    SQL_MERGE_ORDERS_STAGING,
+    SQL_DELETE_ORDERS_EXCEPT_STAGING,
 )
 from core.project.enums.common import SettingsInDataBase
 from core.project.services.database_workers import DBHandler
+from core.project.services.database_workers.query import Query
 
 
 class OrderDBHandler(DBHandler):
@@ -22,6 +28,7 @@ class OrderDBHandler(DBHandler):
     sql_insert: str = SQL_INSERT_ORDERS
     sql_update: str = SQL_UPDATE_ORDERS
     table = "orders"
+    not_null_fields = frozenset({"id_mp", "status"})
 
     @staticmethod
     def filter_duplicate_orders(records: list[dict]) -> list:
@@ -51,8 +58,9 @@ class OrderDBHandler(DBHandler):
     async def insert_or_update(self, items: Collection[WBFBSOrder | WBFBOOrder]):
         await self.update(items)
 
-    def sql_select_with_params(self, sql_select: str = None, aggregate: bool = False, limit: bool = True):
-        return "SELECT * FROM orders " "WHERE company_id=$1 AND marketplace_id=$2 "
+    def build_select(self) -> Query:
+        # Платформе отдаются все сохранённые заказы, после чего они удаляются
+        return Query(args=[self.params.company_id, self.params.marketplace_id], sql=self.sql_select)
 
     async def sql_select_movement_data(self, updated_at_start: datetime = None, updated_at_end=None):
         sql = SQL_SELECT_ORDERS_MOVEMENT_DATA
@@ -67,9 +75,30 @@ class OrderDBHandler(DBHandler):
         tmp_result = super().prepare_records_for_response(records)
         return self.filter_duplicate_orders(tmp_result)
 
-    async def update(self, items: Collection[Any]):
+    async def upsert(self, items: Collection[WBFBSOrder | WBFBOOrder], replace: bool = False):
+        """
+        Заказы копируются (COPY) во временную таблицу и сливаются с сохранёнными одним запросом.
+        Перезаписываются только изменённые заказы. При replace удаляются заказы, которых нет среди переданных
+        """
         params = self.params.company_id, self.params.marketplace_id
-        values = tuple(item.args_for_update_row(*params) for item in items)
-        await self.delete_all()
+        values = [(*item.args_for_update_row(*params), ordinal) for ordinal, item in enumerate(items)]
         async with self.pool.acquire() as connection:
-            await connection.executemany(self.sql_insert, values)
+            async with connection.transaction():
+                await connection.execute(SQL_CREATE_ORDERS_STAGING)
+                if values:
+                    await connection.copy_records_to_table(
+                        "orders_staging", records=values, columns=(*ORDERS_COLUMNS, ORDERS_STAGING_ORDINAL)
+                    )
+                    await connection.execute(SQL_MERGE_ORDERS_STAGING)
+                if replace:
+                    await connection.execute(SQL_DELETE_ORDERS_EXCEPT_STAGING, *params)
+
+    async def merge(self, items: Collection[WBFBSOrder | WBFBOOrder]):
+        """
+        Заменяет сохранённые заказы полученными изменениями, остальные заказы не затрагиваются
+        """
+        if items:
+            await self.upsert(items)
+
+    async def update(self, items: Collection[Any]):
+        await self.upsert(items, replace=True)
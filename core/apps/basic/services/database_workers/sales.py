@@ -1,17 +1,83 @@
+from datetime import date, datetime
+from typing import Collection
+
 from core.apps.basic.sql_commands.sales import (
     SQL_SELECT_SALES,
     SQL_SELECT_IDS_SALES,
     SQL_INSERT_SALES,
     SQL_UPDATE_SALES,
+    SQL_UPSERT_SALES,
+    SQL_SELECT_SALES_CHANGED_FROM,
+    SQL_SELECT_SALES_REPORT,
+    SQL_SELECT_IDS_SALES_REPORT,
+    SQL_INSERT_SALES_REPORT,
+    SQL_SELECT_SALES_REPORT_FROM,
+    SQL_SELECT_SALES_REPORT_LAST_RRD_ID,
 )
+from core.apps.basic.types import WBSales, WBSalesReportItem
 from core.project.enums.common import SettingsInDataBase
+from core.project.utils import deserialize
 from core.project.services.database_workers import DBHandler
 
 
-class SalesDBHandler(DBHandler):
+class MixinJSONDataFrom(DBHandler):
+    async def _select_json_data(self, sql: str, *args) -> list[dict]:
+        async with self.pool.acquire() as connection:
+            records = await connection.fetch(sql, self.params.company_id, self.params.marketplace_id, *args)
+        return [deserialize(record["json_data"]) for record in records if record["json_data"]]
+
+
+class SalesDBHandler(MixinJSONDataFrom, DBHandler):
     code_settings: str = SettingsInDataBase.LAST_FETCH_WAREHOUSES.value
     sql_select: str = SQL_SELECT_SALES
     sql_select_ids: str = SQL_SELECT_IDS_SALES
     sql_insert: str = SQL_INSERT_SALES
     sql_update: str = SQL_UPDATE_SALES
     table = "sales"
+    key_field = "id_mp"
+    not_null_fields = frozenset({"gnumber", "srid"})
+
+    async def append(self, items: Collection[WBSales]):
+        """
+        Сохраняет продажи, полученные по lastChangeDate: новые добавляются, изменённые перезаписываются.
+        Сохранённые строки не перечитываются
+        """
+        params = self.params.company_id, self.params.marketplace_id
+        values = tuple(item.args_for_insert_row(*params) for item in items)
+        if values:
+            await self.__insert_rows__(self._reg_fetch, SQL_UPSERT_SALES, values)
+
+    async def changed_from(self, date_from: datetime) -> list[dict]:
+        return await self._select_json_data(SQL_SELECT_SALES_CHANGED_FROM, date_from)
+
+
+class SalesReportDBHandler(MixinJSONDataFrom, DBHandler):
+    code_settings: str = SettingsInDataBase.LAST_FETCH_SALES_REPORT.value
+    sql_select: str = SQL_SELECT_SALES_REPORT
+    sql_select_ids: str = SQL_SELECT_IDS_SALES_REPORT
+    sql_insert: str = SQL_INSERT_SALES_REPORT
+    sql_update: str = SQL_INSERT_SALES_REPORT
+    table = "sales_report"
+    key_field = "rrd_id"
+    not_null_fields = frozenset({"marketplace_id", "company_id"})
+
+    async def append(self, items: Collection[WBSalesReportItem]):
+        """
+        Строки отчёта неизменны и уникальны по rrd_id, повторно полученные пропускаются
+        """
+        params = self.params.company_id, self.params.marketplace_id
+        values = tuple(item.args_for_insert_row(*params) for item in items)
+        if values:
+            await self.__insert_rows__(self._reg_fetch, self.sql_insert, values)
+
+    async def last_rrd_id(self) -> int:
+        """
+        Курсор rrdid для продолжения загрузки отчёта: последняя сохранённая строка
+        """
+        value = await self.pool.fetchval(
+            SQL_SELECT_SALES_REPORT_LAST_RRD_ID, self.params.company_id, self.params.marketplace_id
+        )
+        return value or 0
+
+    async def report_from(self, date_from: date) -> list[dict]:
+        return await self._select_json_data(SQL_SELECT_SALES_REPORT_FROM, date_from)
@@ -1,6 +1,7 @@
 from datetime import date
 from typing import Collection
 
+from asyncpg import Record
 
 from core.apps.basic.sql_commands.statistics import (
     SQL_SELECT_STATISTICS,
@@ -10,6 +11,7 @@ from core.apps.basic.sql_commands.statistics import (
     SQL_SELECT_DATES_STATICS,
     SQL_SELECT_STATISTICS_FOR_DATE,
 )
+from core.apps.basic.types import WBResponseCardStatisticsForSelectedPeriod
 from core.project.constants import DATE_TEMPLATE_Ymd
 from core.project.enums.common import SettingsInDataBase
 from core.project.services.database_workers import DBHandler
@@ -22,22 +24,15 @@ class StatisticDBHandler(DBHandler):
     sql_insert: str = SQL_INSERT_STATISTICS
     sql_update: str = SQL_UPDATE_STATISTICS
     table = "statistics"
+    not_null_fields = frozenset({"id_mp", "vendor_code"})
 
     @staticmethod
-    def distribution_to_insert_and_update_lists(records, items) -> tuple[list, list]:
-        list_for_insert = list(
-            filter(
-                lambda item: tuple((item.nmID, item.date_reg)) not in records,
-                items,
-            )
-        )
-        list_for_update = list(
-            filter(
-                lambda item: tuple((item.nmID, item.date_reg)) in records,
-                items,
-            )
-        )
-        return list_for_insert, list_for_update
+    def record_key(record: Record) -> tuple[int, str]:
+        return record["id_mp"], record["date_reg"].strftime(DATE_TEMPLATE_Ymd)
+
+    @staticmethod
+    def item_key(item: WBResponseCardStatisticsForSelectedPeriod) -> tuple[int, str]:
+        return item.nmID, item.date_reg
 
     async def get_list_of_registered_dates(self, date_reg: date) -> set[dict]:
         records = await self.pool.fetch(
@@ -48,10 +43,6 @@ class StatisticDBHandler(DBHandler):
         )
         return {item["date_reg"] for item in (map(dict, records))}
 
-    async def get_records_for_comparison(self):
-        records = await self.pool.fetch(self.sql_select_ids, self.params.company_id, self.params.marketplace_id)
-        return tuple((item["id_mp"], item["date_reg"].strftime(DATE_TEMPLATE_Ymd)) for item in map(dict, records))
-
     async def get_records_for_date(self, date_reg: date) -> Collection[dict]:
         if not date_reg:
             return []
@@ -1,14 +1,43 @@
-from typing import List
+from typing import Collection, List
 
 from core.apps.basic.services.database_workers.orders import OrderDBHandler
+from core.apps.basic.sql_commands.stocks import SQL_SELECT_STOCK_SNAPSHOT, SQL_UPSERT_STOCK_SNAPSHOT
 from core.apps.basic.types import ItemMoveStock
-from core.project.services.database_workers import DBHandler
+from core.project.services.database_workers import CommonDBHandler, DBHandler
 
 
 class StockDBHandler(DBHandler):
     pass
 
 
+class StockSnapshotDBHandler(CommonDBHandler):
+    """
+    Остатки, последними успешно выгруженные на склад маркетплейса
+    """
+
+    async def amounts(self, warehouse_id: int, skus: Collection[str], max_age: int) -> dict[str, int]:
+        """
+        Остатки, выгруженные не раньше чем max_age (с) назад.
+        Более старые не возвращаются и выгружаются повторно, чтобы расхождение со складом не копилось
+        """
+        records = await self.pool.fetch(
+            SQL_SELECT_STOCK_SNAPSHOT,
+            self.params.company_id,
+            self.params.marketplace_id,
+            warehouse_id,
+            list(skus),
+            max_age,
+        )
+        return {record["sku"]: record["amount"] for record in records}
+
+    async def save(self, warehouse_id: int, stocks: Collection[dict]):
+        params = self.params.company_id, self.params.marketplace_id
+        values = tuple((warehouse_id, item["sku"], item["amount"], *params) for item in stocks)
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                await connection.executemany(SQL_UPSERT_STOCK_SNAPSHOT, values)
+
+
 async def collect_stock_info_from_orders_db(db_order_handler: OrderDBHandler) -> List[ItemMoveStock]:
     """Собираем данные из БД."""
     result = list()
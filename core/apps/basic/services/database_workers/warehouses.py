@@ -15,3 +15,4 @@ class WarehouseDBHandler(DBHandler):
     sql_insert: str = SQL_INSERT_WAREHOUSES
     sql_update: str = SQL_UPDATE_WAREHOUSES
     table = "warehouse"
+    key_field = "warehouse_id"
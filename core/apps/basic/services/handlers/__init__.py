@@ -75,3 +75,7 @@ class CommonHandler:
     async def import_goods_list(self) -> MsgResponseToPlatform:
         handler = ProductsHandler(app=self.app, body=self.body)
         return await handler.import_goods_list()
+
+    async def sync_nomenclature(self) -> MsgResponseToPlatform:
+        handler = ProductsHandler(app=self.app, body=self.body)
+        return await handler.sync_nomenclature()
@@ -1,5 +1,6 @@
 from core.apps.basic.services.requesters.goods import ProductRequester, SizeGoodsRequester
-from core.project.services.handlers.common import RequestHandler
+from core.apps.basic.types.from_platform import EventInMSMarketplace
+from core.project.services.handlers.common import RequestHandler, BulkHandler
 from core.project.types import MsgResponseToPlatform
 
 
@@ -27,6 +28,16 @@ class ProductsHandler(RequestHandler):
     async def import_goods_list(self) -> MsgResponseToPlatform:
         return await self._execute("import_goods_list_by_filter")
 
+    async def sync_nomenclature(self) -> MsgResponseToPlatform:
+        requester = ProductRequester(
+            app=self.app,
+            session=self.app["session"],
+            semaphore=self.semaphore,
+            request_body=self.body,
+        )
+        completed = await requester.sync_nomenclature(fresh=True)
+        return MsgResponseToPlatform(data={"completed": completed}, errors=requester.errors)
+
 
 class SizeGoodsHandler(RequestHandler):
     async def export_size_prices(self) -> MsgResponseToPlatform:
@@ -45,3 +56,21 @@ class SizeGoodsHandler(RequestHandler):
         result = await getattr(requester, method)()
         errors = requester.errors if requester.errors else []
         return MsgResponseToPlatform(data=result, errors=errors)
+
+
+class NomenclatureBulkHandler(BulkHandler):
+    """
+    Периодическая синхронизация локальной копии каталога карточек всех продавцов
+    """
+
+    event = EventInMSMarketplace.START_SYNC_NOMENCLATURE
+
+    async def create_events(self, event: EventInMSMarketplace):
+        events = await super().create_events(event)
+        # Результат синхронизации платформе не отправляется
+        for item in events:
+            item.callback = None
+        return events
+
+
+bulk_sync_nomenclature = NomenclatureBulkHandler()
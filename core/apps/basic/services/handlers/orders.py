@@ -82,6 +82,12 @@ class OrdersHandler(RequestHandler):
 
     @time(REQ_TIME)
     async def execute(self) -> MsgResponseToPlatform:
+        """
+        Платформе отправляются сборочные задания (FBS) за весь период и заказы метода статистики,
+        изменённые после прошлой загрузки (FBOOrderRequester, отметка WATERMARK_FBO_ORDERS).
+        Полный набор заказов метода статистики за период отправляется по add_info["full_sync"]
+        и при первой загрузке
+        """
         products_from_platform = await self.fetch_relation_products()
         ic(f"After products_from_platform {self.body.marketplace_id=} , {len(products_from_platform)=}")
         orders = await self.fetch_orders()
@@ -97,6 +103,7 @@ class OrdersHandler(RequestHandler):
         ic(f"After matching_sales_with_orders {self.body.marketplace_id=} , {len(orders)=}")
         orders = self.matching_sales_report_with_orders(orders, sales_report)
         ic(f"After matching_sales_report_with_orders {self.body.marketplace_id=} , {len(orders)=}")
+        await self.merge_orders_into_db(orders)
         errors = self.order_requester.errors if self.order_requester else []
         ic(f"{self.body.marketplace_id=} , {len(errors)=}")
         orders = self.prepare_orders_to_platform(orders)
@@ -110,6 +117,19 @@ class OrdersHandler(RequestHandler):
             return []
         return self.clear_duplicate_orders(orders)
 
+    async def merge_orders_into_db(self, orders: Collection[WBFBSOrder | WBFBOOrder]):
+        """
+        При инкрементальной загрузке приходят только изменённые заказы, они заменяют сохранённые.
+        Отметка загрузки сдвигается только после успешной записи, иначе изменения запрашиваются повторно
+        """
+        try:
+            self.init_db_handler()
+            await self.db_handler.merge(orders)
+        except Exception as err:
+            logger_error.error(f"Ошибка сохранения заказов.\n {err}\n {traceback.format_exc()}")
+            return
+        await self.order_requester.save_watermark()
+
     async def get_sales(self) -> list:
         try:
             handler = SalesHandler(app=self.app, body=self.body)
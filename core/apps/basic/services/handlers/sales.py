@@ -1,52 +1,75 @@
 from datetime import datetime, timedelta
 
 from core.apps.basic.request_urls.wildberries import URL_SALES_WILDBERRIES_V1, URL_REALIZATION_SALES_REPORT
-from core.apps.basic.services.database_workers.sales import SalesDBHandler
+from core.apps.basic.services.database_workers.sales import SalesDBHandler, SalesReportDBHandler
 from core.apps.basic.services.requesters.sales import SalesRequester, SalesReportRequester
 from core.apps.basic.types import WBResponseSales
+from core.project.conf import settings
 from core.project.services.handlers.common import RequestHandler
-from core.project.types import MsgResponseToPlatform
+from core.project.types import MsgResponseToPlatform, ParamsView
 
 
 class SalesHandler(RequestHandler):
+    # Период (дней), за который продажи отдаются из базы
+    period = 30
+
     async def execute(self) -> MsgResponseToPlatform:
         return await self.fetch_sales()
 
+    @property
+    def db_params(self) -> ParamsView:
+        return ParamsView(marketplace_id=self.body.marketplace_id, company_id=self.body.company_id)
+
     async def fetch_sales(self):
-        date_from = datetime.now() - timedelta(days=30)
-        return await self.__fetch__(
-            class_requester=SalesRequester,
-            class_db_handler=SalesDBHandler,
+        """
+        С API запрашиваются только продажи, изменённые после сохранённой отметки, и добавляются в базу.
+        Продажи за период отдаются из базы
+        """
+        requester = SalesRequester(
+            app=self.app,
+            session=self.app["session"],
+            semaphore=self.semaphore,
+            request_body=self.body,
             url_schema=URL_SALES_WILDBERRIES_V1,
-            urls_and_params=[
-                (
-                    URL_SALES_WILDBERRIES_V1,
-                    {"flag": 0, "dateFrom": f"{date_from:%Y-%m-%d}"},
-                ),
-            ],
+            test=self.test,
         )
+        db_handler = SalesDBHandler(pool=self.app[settings.DEFAULT_DATABASE], params=self.db_params)
+        items = await requester.fetch()
+        await db_handler.append(items)
+        # Отметка сдвигается только после записи продаж в базу
+        await requester.save_watermark([item.lastChangeDate for item in items])
+        data = await db_handler.changed_from(datetime.now() - timedelta(days=self.period))
+        return self.prepare_data_to_response(data=data, errors=requester.errors)
 
     def get_data_from_response_data(self, data: WBResponseSales):
         return data
 
 
-class SalesReportHandler(RequestHandler):
+class SalesReportHandler(SalesHandler):
     async def execute(self) -> MsgResponseToPlatform:
         return await self.fetch_report()
 
     async def fetch_report(self):
+        """
+        Отчёт о реализации за 30 дней у крупных продавцов занимает сотни мегабайт, поэтому с API
+        запрашиваются только строки после последнего сохранённого rrd_id. Страницы разбираются потоково
+        и пачками добавляются в базу, отчёт за период отдаётся из базы
+        """
         now = datetime.now()
-        date_from = now - timedelta(days=30)
-        return await self.__fetch__(
-            class_requester=SalesReportRequester,
+        date_from = now - timedelta(days=self.period)
+        requester = SalesReportRequester(
+            app=self.app,
+            session=self.app["session"],
+            semaphore=self.semaphore,
+            request_body=self.body,
             url_schema=URL_REALIZATION_SALES_REPORT,
-            urls_and_params=[
-                (
-                    URL_REALIZATION_SALES_REPORT,
-                    {"dateFrom": f"{date_from:%Y-%m-%d}", "dateTo": f"{now:%Y-%m-%d}"},
-                ),
-            ],
+            test=self.test,
         )
-
-    def get_data_from_response_data(self, data: WBResponseSales):
-        return data
+        db_handler = SalesReportDBHandler(pool=self.app[settings.DEFAULT_DATABASE], params=self.db_params)
+        full_sync = bool((self.body.add_info or {}).get("full_sync"))
+        rrdid = 0 if full_sync else await db_handler.last_rrd_id()
+        async for batch in requester.iter_fetch(date_from, now, rrdid):
+            await db_handler.append(batch)
+        items = await db_handler.report_from(date_from.date())
+        # Формат ответа платформе прежний: список с одним отчётом
+        return self.prepare_data_to_response(data=[items] if items else [], errors=requester.errors)
@@ -22,10 +22,7 @@ from core.project.utils import fetch_collection_from_platform, post_collection_f
 class ImportStockHandler(RequestHandler):
     async def execute(self) -> MsgResponseToPlatform:
         warehouse_ids, barcodes = await self.get_params_for_request_stock()
-        stock, errors = await self.fetch_stock(warehouse_ids, barcodes.keys())
-
-        for item in stock:
-            item.good_id_mp = barcodes[item.sku]
+        stock, errors = await self.fetch_stock(warehouse_ids, barcodes)
         return MsgResponseToPlatform(data=stock, errors=errors)
 
     async def get_params_for_request_stock(self) -> tuple[Collection[str], dict]:
@@ -39,11 +36,16 @@ class ImportStockHandler(RequestHandler):
                     barcodes[sku] = item.nmID
         return warehouse_ids, barcodes
 
-    async def fetch_stock(self, warehouse_ids: Collection[str], barcodes: Collection[str]):
+    async def fetch_stock(self, warehouse_ids: Collection[str], barcodes: dict):
         requester = StockRequester(
             app=self.app, session=self.app["session"], semaphore=self.semaphore, request_body=self.body, test=self.test
         )
-        items = await requester.fetch(warehouse_ids=warehouse_ids, barcodes=barcodes)
+        items = []
+        # Остатки склада обрабатываются, пока запросы по остальным складам ещё выполняются
+        async for stocks in requester.iter_fetch(warehouse_ids=warehouse_ids, barcodes=barcodes.keys()):
+            for item in stocks:
+                item.good_id_mp = barcodes[item.sku]
+            items.extend(stocks)
 
         errors = requester.errors if requester else []
         return items, errors
@@ -54,11 +54,14 @@ from core.apps.basic.types import (
     WBNomenclature,
     WBFilterNomenclature,
     WBCursorNomenclatureV2,
+    WBSortNomenclature,
     WBRequestParamsListNomenclatures,
     WBRequestParamsListNomenclaturesV2,
     WBRequestItemSetPriceAndDiscount,
     WBRequestParamsExportPricesAndDiscounts,
+    WBResponseObjectDownloadProcessedStatus,
 )
+from core.apps.basic.services.database_workers.goods import NomenclatureDBHandler, PriceSnapshotDBHandler
 from core.apps.basic.utils import get_vendor_codes, wb_photos_to_list_str
 from core.apps.constants import (
     COUNT_ITEMS_ONE_ITERATION_FILTER_CARDS,
@@ -66,15 +69,22 @@ from core.apps.constants import (
     COUNT_ITEMS_ONE_ITERATION_CREATE_CARDS_V3,
     COUNT_ITEMS_ONE_ITERATION_UPDATE_CARDS_V3,
 )
+from core.project.conf import settings
 from core.project.exceptions import RequestException
 from core.project.services.requesters import AppRequester
 from core.project.services.requesters.fetcher import Fetcher
-from core.project.types import MsgResponseToPlatform
+from core.project.services.requesters.paginator import CursorPagination
+from core.project.services.requesters.single_flight import SingleFlight
+from core.project.services.requesters.upload_poller import UploadStatusUnknown, upload_poller
+from core.project.types import MsgResponseToPlatform, ParamsView
 from core.project.utils import execute_async_rest_tasks, url_with_params
 
 logger_error = logging.getLogger("errors")
 logger_info = logging.getLogger("info")
 
+# Синхронизации каталога одного продавца
+nomenclature_sync = SingleFlight(window=settings.NOMENCLATURE_SYNC_INTERVAL)
+
 
 def prepare_params_for_request_cards(
     items: Collection[str],
@@ -275,6 +285,24 @@ def select_products_from_info_prices(
     return result
 
 
+def filter_nomenclature(
+    cards: Collection[WBNomenclature],
+    nm_ids: Optional[Collection[int]] = None,
+    vendor_codes: Optional[Collection[str]] = None,
+    skus: Optional[Collection[str]] = None,
+) -> list[WBNomenclature]:
+    if nm_ids is not None:
+        nm_ids = set(nm_ids)
+        return [card for card in cards if card.nmID in nm_ids]
+    if vendor_codes is not None:
+        vendor_codes = set(vendor_codes)
+        return [card for card in cards if card.vendorCode in vendor_codes]
+    if skus is not None:
+        skus = set(skus)
+        return [card for card in cards if skus.intersection(card.all_skus)]
+    return list(cards)
+
+
 class NomenclatureRequest(AppRequester):
     async def export_discounts(self) -> list[WBCardProduct]:
         logger_info.info("Export discounts.")
@@ -305,35 +333,133 @@ class NomenclatureRequest(AppRequester):
             errors=[],
         )
 
-    async def fetch_nomenclature(self, vendor_code: Optional[str] = "") -> list[WBNomenclature]:
-        result: list[WBNomenclature] = []
-        next_request = True
-        filter_params = WBFilterNomenclature(withPhoto=-1, textSearch=vendor_code)
-        cursor_params = WBCursorNomenclatureV2(limit=COUNT_ITEMS_ONE_ITERATION_FILTER_CARDS)
-        while next_request:
-            params = WBRequestParamsListNomenclatures(
-                settings=WBRequestParamsListNomenclaturesV2(cursor=cursor_params, filter=filter_params)
-            )
-            response = await self.single_fetch(
-                url_params=URL_LIST_NOMENCLATURES_WILDBERRIES_V2,
-                params=params.model_dump(exclude_none=True, exclude_unset=True),
-                valid_type_negative=WBResponse,
+    @property
+    def nomenclature_db_handler(self) -> Optional[NomenclatureDBHandler]:
+        pool = self.app.get(settings.DEFAULT_DATABASE) if self.app is not None else None
+        if pool is None:
+            return None
+        return NomenclatureDBHandler(
+            pool=pool,
+            params=ParamsView(
+                company_id=self.request_body.company_id, marketplace_id=self.request_body.marketplace_id
+            ),
+        )
+
+    async def fetch_nomenclature(
+        self,
+        nm_ids: Optional[Collection[int]] = None,
+        vendor_codes: Optional[Collection[str]] = None,
+        skus: Optional[Collection[str]] = None,
+        fresh: bool = False,
+    ) -> list[WBNomenclature]:
+        """
+        Карточки продавца из локальной копии каталога, перед чтением копия догоняется изменениями с API.
+        Отбор по nm_ids, vendor_codes или skus выполняется по индексу, без параметров отдаётся весь каталог.
+        fresh - синхронизировать, даже если синхронизация была недавно (например, сразу после создания карточек)
+        """
+        db_handler = self.nomenclature_db_handler
+        if db_handler is None:
+            result, completed = await self.download_nomenclature()
+            # Неполный список номенклатур не используется
+            return filter_nomenclature(result, nm_ids, vendor_codes, skus) if completed else []
+
+        await self.sync_nomenclature(fresh=fresh)
+        if nm_ids is not None:
+            return await db_handler.by_nm_ids(nm_ids)
+        if vendor_codes is not None:
+            return await db_handler.by_vendor_codes(vendor_codes)
+        if skus is not None:
+            return await db_handler.by_skus(skus)
+        return await db_handler.select()
+
+    async def sync_nomenclature(self, fresh: bool = False) -> bool:
+        """
+        Одновременные синхронизации каталога одного продавца объединяются,
+        повторная в течение NOMENCLATURE_SYNC_INTERVAL не выполняется
+        """
+        if fresh:
+            return await self._sync_nomenclature()
+        key = f"{self.request_body.company_id}:{self.request_body.marketplace_id}"
+        return await nomenclature_sync.do(key, self._sync_nomenclature)
+
+    async def _sync_nomenclature(self) -> bool:
+        """
+        Запрашиваются только карточки, изменённые после курсора прошлой синхронизации (по возрастанию updatedAt).
+        Без курсора или по add_info["full_sync"] каталог загружается целиком и заменяет копию
+        """
+        db_handler = self.nomenclature_db_handler
+        add_info = self.request_body.add_info if isinstance(self.request_body.add_info, dict) else {}
+        start_cursor = None if add_info.get("full_sync") else await db_handler.get_cursor()
+        full_sync = start_cursor is None
+        try:
+            cards, completed = await self.download_nomenclature(cursor=start_cursor, ascending=True)
+        except RequestException as err:
+            # Запросы читают прежнюю копию каталога
+            logger_error.error(f"Ошибка синхронизации каталога карточек.\n{err}")
+            return False
+        if full_sync and not completed:
+            logger_error.error(
+                f"Каталог карточек загружен не полностью, копия не обновлена.\n"
+                f"{self.request_body.company_id=}\t{self.request_body.marketplace_id=}"
             )
+            return False
+        if not cards and not full_sync:
+            return completed
+        # Карточки отданы по возрастанию updatedAt, поэтому и неполный ответ сдвигает курсор без пропусков
+        last_card = max(cards, key=lambda card: (card.updatedAt or "", card.nmID or 0), default=None)
+        cursor = (
+            WBCursorNomenclatureV2(updatedAt=last_card.updatedAt, nmID=last_card.nmID)
+            if last_card is not None
+            else WBCursorNomenclatureV2()
+        )
+        await db_handler.upsert(cards, cursor, replace=full_sync)
+        return completed
+
+    async def download_nomenclature(
+        self, cursor: Optional[WBCursorNomenclatureV2] = None, ascending: Optional[bool] = None
+    ) -> tuple[list[WBNomenclature], bool]:
+        """
+        Постраничная загрузка карточек с API начиная с cursor. Возвращает карточки и признак полной загрузки
+        """
+        filter_params = WBFilterNomenclature(withPhoto=-1)
+        sort_params = WBSortNomenclature(ascending=ascending) if ascending is not None else None
 
-            if not response:
-                return []
-            if isinstance(response.cards, list):
-                result.extend(response.cards)
+        def params_with_cursor(cursor_params: WBCursorNomenclatureV2) -> dict:
+            params = WBRequestParamsListNomenclatures(
+                settings=WBRequestParamsListNomenclaturesV2(
+                    cursor=cursor_params, filter=filter_params, sort=sort_params
+                )
+            )
+            return params.model_dump(exclude_none=True, exclude_unset=True)
 
-            next_request = response.cursor.nmID != 0
+        def next_params(params: dict, response) -> Optional[dict]:
             # Условие response.cursor.total < COUNT_ITEMS_ONE_ITERATION_FILTER_CARDS не работает!!!
-            if next_request:
-                cursor_params = WBCursorNomenclatureV2(
+            if response.cursor.nmID == 0:
+                return None
+            return params_with_cursor(
+                WBCursorNomenclatureV2(
                     limit=COUNT_ITEMS_ONE_ITERATION_FILTER_CARDS,
                     updatedAt=response.cursor.updatedAt,
                     nmID=response.cursor.nmID,
                 )
-        return result
+            )
+
+        first_cursor = WBCursorNomenclatureV2(limit=COUNT_ITEMS_ONE_ITERATION_FILTER_CARDS)
+        if cursor is not None:
+            first_cursor.updatedAt, first_cursor.nmID = cursor.updatedAt, cursor.nmID
+        pagination = CursorPagination(
+            params=params_with_cursor(first_cursor),
+            next_params=next_params,
+            items=lambda response: response.cards if isinstance(response.cards, list) else [],
+        )
+        paginator = self.paginate(
+            pagination,
+            fetch_page=lambda params: self.single_fetch(
+                url_params=URL_LIST_NOMENCLATURES_WILDBERRIES_V2, params=params, valid_type_negative=WBResponse
+            ),
+        )
+        result: list[WBNomenclature] = await paginator.items()
+        return result, paginator.completed
 
     async def fetch_uncreated_nms_with_errors(self) -> tuple[WBErrorNomenclature]:
         print("Fetching uncreated nms with errors.")
@@ -580,7 +706,7 @@ class ExportProductsRequester(NomenclatureRequest):
                 logger_info.info("Waiting for 20s.")
                 await asyncio.sleep(20)
                 print("Create cards in market.")
-                self.cards_in_markets = await self.fetch_nomenclature()
+                self.cards_in_markets = await self.fetch_nomenclature(vendor_codes=self.vendor_codes, fresh=True)
                 result = self.fetch_created_nomenclatures()
             return result
 
@@ -652,7 +778,7 @@ class ExportProductsRequester(NomenclatureRequest):
         """
         logger_info.info(f"Start {__class__}.{__name__}")
         print("Start")
-        self.cards_in_markets = await self.fetch_nomenclature()
+        self.cards_in_markets = await self.fetch_nomenclature(vendor_codes=self.vendor_codes)
         ic(len(self.cards_in_markets))
         self.divide_products_into_created_and_updated()
         created_nomenclatures = await self.create_cards_in_markets()
@@ -833,7 +959,7 @@ class ExportPriceRequester(NomenclatureRequest):
                         continue
 
     async def execute(self):
-        self.cards_in_markets = await self.fetch_nomenclature()
+        self.cards_in_markets = await self.fetch_nomenclature(vendor_codes=self.vendor_codes)
         self.check_cards_in_market()
         if self.input_data:
             # TODO: DEPRECATED
@@ -969,7 +1095,11 @@ class ExportPriceRequesterV2(NomenclatureRequest):
                 error = f"Товар c id: {item.nmID} отсутствует в каталоге Wildberries."
                 self.errors.append({"errorText": error})
 
-    async def fetch_load_progress(self, data, status=1):
+    async def fetch_load_progress(self, data) -> WBResponseObjectDownloadProcessedStatus:
+        """
+        Ожидает обработку загрузки. Состояние загрузки запрашивает общий опросчик
+        одновременно с другими загрузками. Если маркетплейс не вернул состояние, вызывает UploadStatusUnknown
+        """
         from core.apps.basic.services.handlers.prices_and_discounts import PricesAndDiscountsHandler
 
         # Используем уже готовый функционал для получения "Состояния обработанной загрузки"
@@ -978,20 +1108,18 @@ class ExportPriceRequesterV2(NomenclatureRequest):
             app=self.app,
             body=request_body,
         )
-        total_objects_count = 0
-        #
-        while status == 1:
-            # Запрашиваем информацию до тех пор, пока статус не поменяется на "обработана, ..."
+
+        async def check() -> Optional[WBResponseObjectDownloadProcessedStatus]:
             result = await handler.download_processed_status()
             result_data = result.data
-            if result_data and result_data.data:
-                status = result_data.data.status
-            else:
-                break
-            total_objects_count = result_data.data.overAllGoodsNumber + result_data.data.successGoodsNumber
-            if status == 1:
-                await asyncio.sleep(6)
-        return total_objects_count
+            if not result_data or not result_data.data or result_data.data.status is None:
+                raise UploadStatusUnknown(f"Состояние загрузки {data['uploadID']} не получено")
+            # Статус 1 - загрузка ещё обрабатывается
+            if result_data.data.status == 1:
+                return None
+            return result_data.data
+
+        return await upload_poller.wait(f"{self.request_body.company_id}:{data['uploadID']}", check)
 
     async def fetch_load_detail(self, data, limit) -> MsgResponseToPlatform:
         from core.apps.basic.services.handlers.prices_and_discounts import PricesAndDiscountsHandler
@@ -1006,28 +1134,110 @@ class ExportPriceRequesterV2(NomenclatureRequest):
         result: MsgResponseToPlatform = await handler.processed_load_details()
         return result
 
-    def _prepare_data_for_checking_load_progress(self, upload_task_response_data: list):
-        if upload_task_response_data:
-            # data = upload_task_response_data[0].get("data")
-            data = upload_task_response_data[0].fetch_result.data
-            if data:
-                # return {"uploadID": data.get("id")}
-                return {"uploadID": data.id}
+    @staticmethod
+    def _prepare_data_for_checking_load_progress(task: Task) -> dict:
+        return {"uploadID": task.result().fetch_result.data.id}
+
+    async def process_upload(self, data: dict, items: list[WBRequestItemSetPriceAndDiscount]):
+        """
+        Ожидает обработку загрузки и получает её детализацию.
+        Возвращает детализацию и товары загрузки, которые есть в детализации и обработаны без ошибок.
+        Если итог загрузки неизвестен, принятых товаров нет: они выгрузятся повторно при следующем экспорте
+        """
+        try:
+            status = await self.fetch_load_progress(data=data)
+            # Статус 4 - загрузка отменена
+            if status.status == 4:
+                self.errors.append({"uploadID": data["uploadID"], "errorText": "Загрузка отменена"})
+                return None, []
+            # Детализация запрашивается по всем товарам загрузки
+            limit = max(status.overAllGoodsNumber or 0, len(items))
+            message = await self.fetch_load_detail(data=data, limit=limit)
+        except Exception as err:
+            logger_error.error(f"Ошибка получения итога загрузки {data['uploadID']}: {err!r}")
+            self.errors.append({"uploadID": data["uploadID"], "errorText": str(err) or type(err).__name__})
+            return None, []
+        details = message.data.data if message.data else None
+        if not details:
+            return message, []
+        processed = {item.nmID for item in details.historyGoods if not item.errorText}
+        return message, [item for item in items if item.nmID in processed]
+
+    @property
+    def price_snapshot_db_handler(self) -> Optional[PriceSnapshotDBHandler]:
+        pool = self.app.get(settings.DEFAULT_DATABASE) if self.app is not None else None
+        if pool is None:
+            return None
+        return PriceSnapshotDBHandler(
+            pool=pool,
+            params=ParamsView(
+                company_id=self.request_body.company_id, marketplace_id=self.request_body.marketplace_id
+            ),
+        )
+
+    async def select_changed_prices(self, db_handler: Optional[PriceSnapshotDBHandler]):
+        """
+        Оставляет во входных данных только товары, цена или скидка которых отличается
+        от последней успешно выгруженной. add_info["full_sync"] выгружает все товары
+        """
+        add_info = self.request_body.add_info if isinstance(self.request_body.add_info, dict) else {}
+        if db_handler is None or add_info.get("full_sync") or not self.input_data:
+            return
+        exported = await db_handler.prices({item.nmID for item in self.input_data})
+        count_items = len(self.input_data)
+        self.input_data = [item for item in self.input_data if exported.get(item.nmID) != (item.price, item.discount)]
+        logger_info.info(f"Выгрузка цен и скидок: {len(self.input_data)} из {count_items}")
 
     async def execute(self):
         # self.cards_in_markets = await self.fetch_nomenclature()
         # self.check_cards_in_market()
         # if self.input_data:
-        upload_task_response_data: list = await self.export_prices_and_discounts()
-        # Подготавливаем информацию для дальнейшей проверки статуса обработки
-        data = self._prepare_data_for_checking_load_progress(upload_task_response_data)
-        if data:
-            # Проверка статуса
-            limit = await self.fetch_load_progress(data=data)
-            # Получаем детальную информацию по задаче(
-            message_to_platform = await self.fetch_load_detail(data=data, limit=limit)
-            return message_to_platform
-        return MsgResponseToPlatform(data=self.response_data, errors=self.errors)
+        db_handler = self.price_snapshot_db_handler
+        await self.select_changed_prices(db_handler)
+        if not self.input_data:
+            return MsgResponseToPlatform(data=self.response_data, errors=self.errors)
+
+        tasks = self.prepare_tasks_for_request_export_prices_and_discounts()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Загрузки, созданные на маркетплейсе, и части входных данных, отправленные в них
+        size = COUNT_ITEMS_ONE_ITERATION_CREATE_OR_UPDATE_CARDS_V2
+        uploads = [
+            (self._prepare_data_for_checking_load_progress(task), self.input_data[index * size : (index + 1) * size])
+            for index, task in enumerate(tasks)
+            if self.is_upload_created(task)
+        ]
+        message_to_platform = MsgResponseToPlatform(data=self.response_data, errors=self.errors)
+        # Все загрузки обрабатываются маркетплейсом параллельно, поэтому и ожидаются одновременно
+        results = await asyncio.gather(*(self.process_upload(data, items) for data, items in uploads))
+        accepted = [item for _, items in results for item in items]
+        messages = [message for message, _ in results if message is not None and message.data]
+        if messages:
+            # Детализация всех загрузок отдаётся платформе одним сообщением
+            message_to_platform = messages[0]
+            errors = list(message_to_platform.errors or [])
+            details = message_to_platform.data.data
+            history_goods = list(details.historyGoods) if details else []
+            for message in messages[1:]:
+                if message.data.data and details:
+                    history_goods.extend(message.data.data.historyGoods)
+                errors.extend(message.errors or [])
+            if details:
+                # Ответы API общие для одинаковых запросов (single-flight), поэтому объединяются в копию
+                message_to_platform.data = message_to_platform.data.model_copy(
+                    update={"data": details.model_copy(update={"historyGoods": history_goods})}
+                )
+            message_to_platform.errors = errors + self.errors
+        if db_handler is not None and accepted:
+            await db_handler.save(accepted)
+        return message_to_platform
+
+    @staticmethod
+    def is_upload_created(task: Task) -> bool:
+        if task.exception() is not None:
+            return False
+        response = task.result()
+        upload = getattr(response.fetch_result, "data", None)
+        return response.response_code == 200 and not response.fetch_errors and getattr(upload, "id", None) is not None
 
     def prepare_tasks_for_request_export_prices_and_discounts(self) -> Collection[Task]:
         items = self.input_data
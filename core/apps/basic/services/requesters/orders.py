@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -30,7 +31,9 @@ from core.apps.constants import (
     COUNT_ITEMS_ONE_ITERATION_CREATE_OR_UPDATE_CARDS_V2,
 )
 from core.project.constants import DATETIME_TEMPLATE_MSC
-from core.project.services.requesters import AppRequester
+from core.project.enums.common import SettingsInDataBase
+from core.project.services.requesters import AppRequester, MixinWatermark
+from core.project.services.requesters.paginator import CursorPagination
 from core.project.utils import datetime2int_timestamp
 
 logger_error = logging.getLogger("errors")
@@ -43,11 +46,11 @@ class MixinAddNomenclature(NomenclatureRequest):
     async def add_nomenclature(self, fbs_orders: Collection[WBFBSOrder | WBFBOOrder]):
         if not fbs_orders:
             return
-        nomenclatures = await self.fetch_nomenclature()
-        for nomenclature in nomenclatures:
-            orders = list(filter(lambda x: x.nmId == nomenclature.nmID, fbs_orders))
-            for order in orders:
-                order.nomenclature = nomenclature.title
+        nomenclatures = await self.fetch_nomenclature(nm_ids={order.nmId for order in fbs_orders})
+        titles = {nomenclature.nmID: nomenclature.title for nomenclature in nomenclatures}
+        for order in fbs_orders:
+            if order.nmId in titles:
+                order.nomenclature = titles[order.nmId]
 
 
 class FBSNewOrderRequester(MixinAddNomenclature, AppRequester):
@@ -61,15 +64,21 @@ class FBSNewOrderRequester(MixinAddNomenclature, AppRequester):
 
 
 class FBSOrderRequester(MixinAddNomenclature, AppRequester):
+    # Период (дней) и длина подпериода (часов) загрузки сборочных заданий. Можно изменить через add_info.
+    # API сборочных заданий фильтрует только по createdAt, поэтому период запрашивается целиком:
+    # иначе статусы заданий, созданных до прошлой загрузки, перестали бы обновляться
+    period = 5
+    shard_hours = 24
+
     @staticmethod
     def clear_double(fbs_orders: list[WBFBSOrder]):
         result = []
-        id_orders = []
+        id_orders = set()
         for item in fbs_orders:
             if item.id_order in id_orders:
                 continue
             result.append(item)
-            id_orders.append(item.id_order)
+            id_orders.add(item.id_order)
         return result
 
     async def fetch(self):
@@ -88,15 +97,29 @@ class FBSOrderRequester(MixinAddNomenclature, AppRequester):
         return cleaned_result
 
     async def fetch_old_orders(self) -> list[WBFBSOrder]:
-        until_days = 5
+        """
+        Период разбивается на подпериоды, которые запрашиваются одновременно.
+        Количество одновременных запросов ограничено квотой API маркетплейса (см. Fetcher.rate_limit)
+        """
+        add_info = self.request_body.add_info or {}
+        period = add_info.get("period") or self.period
+        shard_hours = add_info.get("shard_hours") or self.shard_hours
         date_to = datetime.now()
-        result = []
-        date_from = date_to - timedelta(days=until_days)
-        result_per_day = await self.fetch_per_day(
-            datetime2int_timestamp(date_from),
-            datetime2int_timestamp(date_to),
+        date_from = date_to - timedelta(days=period)
+        results_per_shard = await asyncio.gather(
+            *[
+                self.fetch_per_day(datetime2int_timestamp(shard_from), datetime2int_timestamp(shard_to))
+                for shard_from, shard_to in self.split_period(date_from, date_to, timedelta(hours=shard_hours))
+            ]
         )
-        result.extend(result_per_day)
+        return self.clear_double([order for result in results_per_shard for order in result])
+
+    @staticmethod
+    def split_period(date_from: datetime, date_to: datetime, step: timedelta) -> list[tuple[datetime, datetime]]:
+        result = []
+        while date_from < date_to:
+            result.append((date_from, min(date_from + step, date_to)))
+            date_from += step
         return result
 
     async def fetch_per_day(
@@ -104,25 +127,18 @@ class FBSOrderRequester(MixinAddNomenclature, AppRequester):
         date_from: int,
         date_to: int,
     ) -> list[WBFBSOrder]:
-        result = []
-        is_next_page = True
-        next_page = 0
-        while is_next_page:
-            params = WBRequestBodyFBSOrders(
-                limit=1000,
-                next=next_page,
-                dateTo=date_to,
-                dateFrom=date_from,
-            )
-            response = await self.make_single_api_request(
-                urls_and_params=(self.url_schema, params.model_dump(exclude_none=True, exclude_unset=True))
-            )
-            if not response:
-                break
-            next_page = response.next
-            is_next_page = next_page > 0
-            result.extend(response.orders)
-        return result
+        params = WBRequestBodyFBSOrders(
+            limit=1000,
+            next=0,
+            dateTo=date_to,
+            dateFrom=date_from,
+        )
+        pagination = CursorPagination(
+            params=params.model_dump(exclude_none=True, exclude_unset=True),
+            next_params=lambda params, response: {**params, "next": response.next} if response.next > 0 else None,
+            items=lambda response: response.orders,
+        )
+        return await self.paginate(pagination).items()
 
     async def fetch_statuses_orders(self, orders: list[WBFBSOrder]):
         result = []
@@ -181,19 +197,27 @@ class FBSOrderRequester(MixinAddNomenclature, AppRequester):
         return orders
 
 
-class FBOOrderRequester(MixinAddNomenclature, AppRequester):
+class FBOOrderRequester(MixinWatermark, MixinAddNomenclature, AppRequester):
+    watermark_code = SettingsInDataBase.WATERMARK_FBO_ORDERS.value
+
     async def fetch(self):
         # Изменяем период, если приходит как дополнительная информация
         period = 4
         if self.request_body.add_info and self.request_body.add_info.get("period"):
             period = self.request_body.add_info.get("period")
 
-        date_from = (datetime.today() + relativedelta(days=-period)).strftime(DATETIME_TEMPLATE_MSC)
-        params = WBRequestBodyFBOOrders(dateFrom=date_from, flag=0).model_dump(exclude_none=True, exclude_unset=True)
+        # При flag=0 API возвращает заказы с lastChangeDate не раньше dateFrom, то есть все изменения после отметки
+        date_from = await self.get_watermark() or datetime.today() + relativedelta(days=-period)
+        params = WBRequestBodyFBOOrders(dateFrom=date_from.strftime(DATETIME_TEMPLATE_MSC), flag=0).model_dump(
+            exclude_none=True, exclude_unset=True
+        )
         response = await self.make_single_api_request(urls_and_params=(self.url_schema, params))
         if not response:
             return []
         result = await self.merge_orders_and_status(response.root)
+        if result:
+            # Отметку сохраняет OrdersHandler после записи заказов в базу
+            self.fetched_watermark = [order.lastChangeDate for order in response.root]
         return result
 
     async def merge_orders_and_status(self, orders: list[WBFBOOrder]):
@@ -268,8 +292,10 @@ class OrderRequester(AppRequester):
         rids = set(fbs_order.rid for fbs_order in fbs_orders)
         return list(filter(lambda order: order.srid not in rids, statistic_orders))
 
-    async def fetch_orders_any_type(self, class_requester: Generic[T], url_params: URLParameterSchema, **kwargs):
-        requester = class_requester(
+    statistic_orders_requester: Optional[FBOOrderRequester] = None
+
+    def make_requester(self, class_requester: Generic[T], url_params: URLParameterSchema, **kwargs) -> T:
+        return class_requester(
             app=self.app,
             semaphore=self.semaphore,
             session=self.session,
@@ -277,13 +303,24 @@ class OrderRequester(AppRequester):
             url_schema=url_params,
             **kwargs,
         )
-        return await requester.fetch()
+
+    async def fetch_orders_any_type(self, class_requester: Generic[T], url_params: URLParameterSchema, **kwargs):
+        return await self.make_requester(class_requester, url_params, **kwargs).fetch()
 
     async def fetch_fbs_orders(self) -> list[WBFBSOrder]:
         return await self.fetch_orders_any_type(FBSOrderRequester, URL_GET_ORDERS_WILDBERRIES_V3)
 
     async def fetch_orders_from_statistic_method(self) -> list[WBFBOOrder]:
-        return await self.fetch_orders_any_type(FBOOrderRequester, URL_GET_ORDERS_WILDBERRIES_V1)
+        self.statistic_orders_requester = self.make_requester(FBOOrderRequester, URL_GET_ORDERS_WILDBERRIES_V1)
+        return await self.statistic_orders_requester.fetch()
+
+    async def save_watermark(self):
+        """
+        Сдвигает отметку заказов метода статистики. Вызывается после записи полученных заказов в базу
+        """
+        if self.statistic_orders_requester is not None:
+            requester = self.statistic_orders_requester
+            await requester.save_watermark(requester.fetched_watermark)
 
     async def fetch(self, *args, **kwargs):
         fbs_orders = await self.fetch_fbs_orders()
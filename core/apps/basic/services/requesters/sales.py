@@ -1,15 +1,54 @@
 import logging
+from datetime import datetime, timedelta
+from typing import AsyncIterator
 
-from core.project.services.requesters import AppRequester
+from core.apps.basic.types import WBSales, WBSalesReportItem
+from core.project.conf import settings
+from core.project.constants import DATETIME_TEMPLATE_MSC
+from core.project.enums.common import SettingsInDataBase
+from core.project.services.requesters import AppRequester, MixinWatermark
 
 
 logger_error = logging.getLogger("errors")
 logger_info = logging.getLogger("info")
 
 
-class SalesRequester(AppRequester):
-    pass
+class SalesRequester(MixinWatermark, AppRequester):
+    watermark_code = SettingsInDataBase.WATERMARK_SALES.value
+    # Период (дней) загрузки продаж без сохранённой отметки
+    period = 30
+
+    async def fetch(self, *args, **kwargs) -> list[WBSales]:
+        # При flag=0 API возвращает продажи с lastChangeDate не раньше dateFrom
+        date_from = await self.get_watermark() or datetime.now() - timedelta(days=self.period)
+        params = {"flag": 0, "dateFrom": date_from.strftime(DATETIME_TEMPLATE_MSC)}
+        response = await self.make_single_api_request(urls_and_params=(self.url_schema, params))
+        if not response:
+            return []
+        return response.root
 
 
 class SalesReportRequester(AppRequester):
-    pass
+    async def iter_fetch(
+        self, date_from: datetime, date_to: datetime, rrdid: int = 0
+    ) -> AsyncIterator[list[WBSalesReportItem]]:
+        """
+        Строки отчёта о реализации после rrdid. Страница из limit строк разбирается потоково,
+        следующая запрашивается с rrdid последней полученной строки. Неполная страница последняя
+        """
+        limit = settings.SALES_REPORT_PAGE_SIZE
+        while True:
+            count_errors = len(self.errors)
+            count_items = 0
+            params = {
+                "dateFrom": f"{date_from:%Y-%m-%d}",
+                "dateTo": f"{date_to:%Y-%m-%d}",
+                "limit": limit,
+                "rrdid": rrdid,
+            }
+            async for batch in self.stream_fetch(self.url_schema, params):
+                count_items += len(batch)
+                rrdid = batch[-1].rrd_id
+                yield batch
+            if count_items < limit or len(self.errors) > count_errors:
+                return
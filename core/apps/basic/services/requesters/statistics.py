@@ -6,7 +6,10 @@ from core.apps.basic.types import (
     WBSelectedPeriod,
     WBRequestParamsStatisticsForSelectedPeriod,
 )
+from core.project.conf import settings
 from core.project.services.requesters import AppRequester
+from core.project.services.requesters.paginator import PagePagination
+from core.project.types import URLParameterSchema
 from core.project.utils import full_url
 
 
@@ -16,30 +19,28 @@ logger_info = logging.getLogger("info")
 
 class StatisticRequester(AppRequester):
     async def fetch(self, date_reg: date):
-        result = []
         period = WBSelectedPeriod(
             begin=datetime.combine(date_reg, time(0, 0, 1)).strftime("%Y-%m-%d %H:%M:%S"),
             end=datetime.combine(date_reg, time(23, 59, 59)).strftime("%Y-%m-%d %H:%M:%S"),
         )
-        is_next_page = True
-        page = 1
-        while is_next_page:
-            params = WBRequestParamsStatisticsForSelectedPeriod(page=page, period=period).model_dump(
+        pagination = PagePagination(
+            params=lambda page: WBRequestParamsStatisticsForSelectedPeriod(page=page, period=period).model_dump(
                 exclude_none=True, exclude_unset=True
-            )
-            logger_info.info(
-                f"Направлен запрос на WB"
-                f"\n\t-company_id{self.request_body.company_id}"
-                f"\n\t-url: {full_url(URL_STATISTICS_FOR_SELECTED_PERIOD.url)}"
-                f"\n\t-параметры: {params}"
-            )
-            response = await self.make_single_api_request(urls_and_params=(URL_STATISTICS_FOR_SELECTED_PERIOD, params))
-
-            if not response:
-                break
-            is_next_page = response.data.isNextPage
-            result.extend(response.data.cards)
-
-            page += 1
-
+            ),
+            items=lambda response: response.data.cards,
+            has_next=lambda response: response.data.isNextPage,
+        )
+        paginator = self.paginate(
+            pagination, URL_STATISTICS_FOR_SELECTED_PERIOD, prefetch=settings.STATISTICS_PREFETCH_PAGES
+        )
+        result = await paginator.items()
         return {f"{date_reg:%Y-%m-%d}": result}
+
+    async def fetch_page(self, url_schema: URLParameterSchema, params: dict):
+        logger_info.info(
+            f"Направлен запрос на WB"
+            f"\n\t-company_id{self.request_body.company_id}"
+            f"\n\t-url: {full_url(url_schema.url)}"
+            f"\n\t-параметры: {params}"
+        )
+        return await super().fetch_page(url_schema, params)
@@ -1,17 +1,26 @@
+import asyncio
 import logging
 from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
 
 from core.apps.basic.request_urls.wildberries import (
     URL_STOCKS_WILDBERRIES_V3,
     URL_EXPORT_STOCKS_WILDBERRIES_V3,
     URL_STOCKS_WILDBERRIES_V1,
 )
+from core.apps.basic.services.database_workers.stocks import StockSnapshotDBHandler
 from core.apps.basic.types import (
     WBRequestBodyGetWarehouseStocks,
+    WBRequestBodyUpdateWarehouseStocks,
     DataExportStock,
     WBRequestBodyGetStocksFBO,
+    WBStock,
 )
+from core.apps.constants import COUNT_ITEMS_ONE_ITERATION_STOCKS, COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS
+from core.project.conf import settings
 from core.project.services.requesters import AppRequester
+from core.project.services.requesters.fetcher import FetchResponse
+from core.project.types import ParamsView, URLParameterSchema
 from core.project.utils import url_with_params
 
 logger_error = logging.getLogger("errors")
@@ -21,19 +30,32 @@ logger_info = logging.getLogger("info")
 class StockRequester(AppRequester):
     async def fetch(self, *args, **kwargs):
         result = []
+        async for stocks in self.iter_fetch(*args, **kwargs):
+            result.extend(stocks)
+        return result
+
+    async def iter_fetch(self, *args, **kwargs) -> AsyncIterator[list[WBStock]]:
+        """
+        Остатки по всем складам запрашиваются одновременно, SKU делятся на части по лимиту API.
+        Остатки отдаются по мере получения ответов
+        """
         warehouse_ids = kwargs.get("warehouse_ids", [])
-        barcodes = kwargs.get("barcodes", [])
-        params = WBRequestBodyGetWarehouseStocks(skus=barcodes).model_dump()
+        barcodes = list(kwargs.get("barcodes", []))
+        tasks = {}
         for warehouse_id in warehouse_ids:
             url_params = url_with_params(URL_STOCKS_WILDBERRIES_V3, warehouse_id)
+            for start in range(0, len(barcodes), COUNT_ITEMS_ONE_ITERATION_STOCKS):
+                params = WBRequestBodyGetWarehouseStocks(
+                    skus=barcodes[start : start + COUNT_ITEMS_ONE_ITERATION_STOCKS]
+                ).model_dump()
+                task = self._prepare_task_for_single_request(url_schema=url_params, params=params)
+                tasks[task] = warehouse_id
 
-            response = await self.make_single_api_request(urls_and_params=(url_params, params))
-            if response:
-                for stock in response.stocks:
-                    stock.warehouse_id = warehouse_id
-                    stock.trader_schema = "FBS"
-                result.extend(response.stocks)
-        return result
+        async for warehouse_id, response in self.iter_api_tasks(tasks):
+            for stock in response.stocks:
+                stock.warehouse_id = warehouse_id
+                stock.trader_schema = "FBS"
+            yield response.stocks
 
     async def fetch_stock_fbo(self):
         date_from = datetime.now() - timedelta(days=30)
@@ -41,25 +63,58 @@ class StockRequester(AppRequester):
         response = await self.make_single_api_request(urls_and_params=(URL_STOCKS_WILDBERRIES_V1, params))
         return response
 
+    @property
+    def stock_snapshot_db_handler(self) -> Optional[StockSnapshotDBHandler]:
+        pool = self.app.get(settings.DEFAULT_DATABASE) if self.app is not None else None
+        if pool is None:
+            return None
+        return StockSnapshotDBHandler(
+            pool=pool,
+            params=ParamsView(
+                company_id=self.request_body.company_id, marketplace_id=self.request_body.marketplace_id
+            ),
+        )
+
     async def export(self):
-        result = False
+        """
+        На склад выгружаются только остатки, отличающиеся от последних успешно выгруженных.
+        Части по лимиту API отправляются одновременно, снимок сдвигается только по частям с ответом 204.
+        Остатки, выгруженные раньше STOCK_SNAPSHOT_TTL, выгружаются повторно: остаток на складе мог измениться
+        без нашего участия.
+        add_info["full_sync"] выгружает все остатки
+        """
         data = DataExportStock.model_validate(self.request_body.data)
-        params = data.stocks.model_dump()
+        stocks = {item["sku"]: item["amount"] for item in data.stocks.stocks}
+        db_handler = self.stock_snapshot_db_handler
+        add_info = self.request_body.add_info if isinstance(self.request_body.add_info, dict) else {}
+        exported = {}
+        if db_handler is not None and not add_info.get("full_sync"):
+            exported = await db_handler.amounts(data.warehouse_id, stocks.keys(), settings.STOCK_SNAPSHOT_TTL)
+        changed = [{"sku": sku, "amount": amount} for sku, amount in stocks.items() if exported.get(sku) != amount]
+        logger_info.info(f"Выгрузка остатков на склад {data.warehouse_id}: {len(changed)} из {len(stocks)}")
+        if not changed:
+            return True
 
         url_params = url_with_params(URL_EXPORT_STOCKS_WILDBERRIES_V3, data.warehouse_id)
+        tasks = {}
+        for start in range(0, len(changed), COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS):
+            batch = changed[start : start + COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS]
+            params = WBRequestBodyUpdateWarehouseStocks(stocks=batch).model_dump()
+            tasks[self._prepare_task_for_single_request(url_schema=url_params, params=params)] = batch
+        await asyncio.wait(tasks)
 
-        response = await self.make_single_api_request(urls_and_params=(url_params, params))
-
-        # TODO: Расширить интерфейс результата кодом ответа от api
-        if not self.errors:
-            return True
-        # NOTE:
-        # make_single_api_request пока не пишет код ответа из Fetcher.
-        # Пока исходим из того, что если запрос не вернул ошибок, то список ошибок пустой и запрос успешный
-        # Позитивный код проверяется компонентом Fetcher из заданного в url_schema
-        # Данную проверку сделать более явной, когда код ответа будет прокидываться из Fetcher
-        # На данный момент проверка ниже закомментирована, тк она работать не будет
-        # if response.response_code == 204:
-        #     result = True
+        accepted = []
+        for task, batch in tasks.items():
+            self.process_api_task(task)
+            if self.is_accepted(task, url_params):
+                accepted.extend(batch)
+        if db_handler is not None and accepted:
+            await db_handler.save(data.warehouse_id, accepted)
+        return not self.errors
 
-        return result
+    @staticmethod
+    def is_accepted(task: asyncio.Task, url_params: URLParameterSchema) -> bool:
+        if task.exception() is not None:
+            return False
+        response: FetchResponse = task.result()
+        return not response.fetch_errors and response.response_code == url_params.positive_response_code
@@ -23,3 +23,28 @@ SQL_INSERT_STOCK_GOODS = (
 )
 SQL_UPDATE_STOCK_GOODS = "UPDATE register_stock SET  offer_id=$2, present=$3, reserved=$4, type=$5 WHERE product_id=$1"
 SQL_SELECT_PRODUCT_ID_FROM_STOCK_GOODS = "SELECT product_id FROM register_stock;"
+
+
+SQL_UPSERT_NOMENCLATURE = (
+    "INSERT INTO nomenclature "
+    "(nm_id, vendor_code, skus, updated_at, json_data, company_id, marketplace_id) "
+    "VALUES($1, $2, $3, $4, $5, $6, $7) "
+    "ON CONFLICT (company_id, marketplace_id, nm_id) DO UPDATE SET "
+    "vendor_code=EXCLUDED.vendor_code, skus=EXCLUDED.skus, updated_at=EXCLUDED.updated_at, "
+    "json_data=EXCLUDED.json_data;"
+)
+SQL_DELETE_NOMENCLATURE_EXCEPT = (
+    "DELETE FROM nomenclature WHERE company_id=$1 AND marketplace_id=$2 AND nm_id <> ALL($3::bigint[]);"
+)
+SQL_SELECT_NOMENCLATURE = "SELECT json_data FROM nomenclature WHERE company_id=$1 AND marketplace_id=$2;"
+SQL_SELECT_IDS_NOMENCLATURE = "SELECT nm_id AS id_mp FROM nomenclature WHERE company_id=$1 AND marketplace_id=$2;"
+SQL_SELECT_NOMENCLATURE_BY_NM_IDS = (
+    "SELECT json_data FROM nomenclature WHERE company_id=$1 AND marketplace_id=$2 AND nm_id = ANY($3::bigint[]);"
+)
+SQL_SELECT_NOMENCLATURE_BY_VENDOR_CODES = (
+    "SELECT json_data FROM nomenclature "
+    "WHERE company_id=$1 AND marketplace_id=$2 AND vendor_code = ANY($3::varchar[]);"
+)
+SQL_SELECT_NOMENCLATURE_BY_SKUS = (
+    "SELECT json_data FROM nomenclature WHERE company_id=$1 AND marketplace_id=$2 AND skus && $3::varchar[];"
+)
@@ -16,10 +16,51 @@ SQL_UPDATE_ORDERS = (
 )
 SQL_SELECT_ORDERS = "SELECT * FROM orders WHERE company_id=$1 AND marketplace_id=$2;"
 SQL_SELECT_IDS_ORDERS = "SELECT id_mp FROM orders WHERE company_id=$1 AND marketplace_id=$2;"
+SQL_DELETE_ORDERS_BY_IDS = "DELETE FROM orders WHERE id_mp=ANY($1) AND company_id=$2 AND marketplace_id=$3;"
 
-SQL_INSERT_ORDER_LINES = (
-    "INSERT INTO orders_line" " (id_order, id_mp, qnt, price, title)" " VALUES($1, $2, $3, $4, $5);"
+# Порядок колонок совпадает с args_for_insert_row заказов
+ORDERS_COLUMNS = (
+    "id_mp",
+    "date_reg",
+    "posting_number",
+    "company_id",
+    "marketplace_id",
+    "warehouse_id",
+    "packaging_info",
+    "shipment_date",
+    "status",
+    "currency",
+    "total",
+    "json_data",
+    "schema",
+    "transfer_to_platform",
 )
+ORDERS_CONFLICT_COLUMNS = ("company_id", "marketplace_id", "id_mp")
+# Порядковый номер заказа среди переданных в слияние
+ORDERS_STAGING_ORDINAL = "ordinal"
+SQL_CREATE_ORDERS_STAGING = f"""
+CREATE TEMP TABLE orders_staging ON COMMIT DROP AS
+    SELECT {", ".join(ORDERS_COLUMNS)}, NULL::BIGINT AS {ORDERS_STAGING_ORDINAL} FROM orders WITH NO DATA;
+"""
+# Неизменённые заказы не перезаписываются. Из повторов одного заказа берётся последний полученный.
+# json_data сравнивается как jsonb: для типа json в PostgreSQL нет оператора равенства
+# Сборочное задание (FBS) не заменяется строкой того же заказа из метода статистики (FBO): в ней нет статусов задания
+SQL_MERGE_ORDERS_STAGING = f"""
+INSERT INTO orders ({", ".join(ORDERS_COLUMNS)})
+    SELECT DISTINCT ON (id_mp) {", ".join(ORDERS_COLUMNS)} FROM orders_staging
+    ORDER BY id_mp, {ORDERS_STAGING_ORDINAL} DESC
+ON CONFLICT ({", ".join(ORDERS_CONFLICT_COLUMNS)}) DO UPDATE SET
+    {", ".join(f"{column}=EXCLUDED.{column}" for column in ORDERS_COLUMNS if column not in ORDERS_CONFLICT_COLUMNS)}
+WHERE (orders.status IS DISTINCT FROM EXCLUDED.status OR orders.json_data::jsonb IS DISTINCT FROM EXCLUDED.json_data::jsonb)
+    AND NOT (orders.schema = 'FBS' AND EXCLUDED.schema = 'FBO');
+"""
+SQL_DELETE_ORDERS_EXCEPT_STAGING = """
+DELETE FROM orders
+WHERE company_id=$1 AND marketplace_id=$2
+    AND NOT EXISTS (SELECT 1 FROM orders_staging WHERE orders_staging.id_mp = orders.id_mp);
+"""
+
+SQL_INSERT_ORDER_LINES = "INSERT INTO orders_line (id_order, id_mp, qnt, price, title) VALUES($1, $2, $3, $4, $5);"
 SQL_SELECT_ORDER_LINES_MANY_ORDERS = "SELECT * FROM orders_line WHERE id_order in {};"
 SQL_SELECT_ORDER_LINE = "SELECT * FROM orders_line WHERE id_order=$1;"
 SQL_DELETE_ORDER_LINE = "DELETE FROM orders_line WHERE id_order=ANY($1);"
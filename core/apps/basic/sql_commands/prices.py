@@ -0,0 +1,10 @@
+SQL_SELECT_PRICE_SNAPSHOT = (
+    "SELECT nm_id, price, discount FROM price_snapshot"
+    " WHERE company_id=$1 AND marketplace_id=$2 AND nm_id = ANY($3::bigint[]);"
+)
+SQL_UPSERT_PRICE_SNAPSHOT = (
+    "INSERT INTO price_snapshot (nm_id, price, discount, company_id, marketplace_id)"
+    " VALUES($1, $2, $3, $4, $5)"
+    " ON CONFLICT (company_id, marketplace_id, nm_id)"
+    " DO UPDATE SET price=EXCLUDED.price, discount=EXCLUDED.discount, updated_at=Now();"
+)
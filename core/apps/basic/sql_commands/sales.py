@@ -8,3 +8,29 @@ SQL_UPDATE_SALES = (
 )
 SQL_SELECT_SALES = "SELECT * FROM sales WHERE company_id=$1 AND marketplace_id=$2;"
 SQL_SELECT_IDS_SALES = "SELECT id_mp FROM sales WHERE company_id=$1 AND marketplace_id=$2;"
+# Новые продажи добавляются, сохранённые перезаписываются, только если изменились
+SQL_UPSERT_SALES = (
+    "INSERT INTO sales"
+    " (id_mp, gnumber, srid, json_data, company_id, marketplace_id)"
+    " VALUES($1, $2, $3, $4, $5, $6)"
+    " ON CONFLICT (company_id, marketplace_id, id_mp) DO UPDATE SET"
+    " gnumber=EXCLUDED.gnumber, srid=EXCLUDED.srid, json_data=EXCLUDED.json_data"
+    " WHERE sales.json_data IS DISTINCT FROM EXCLUDED.json_data;"
+)
+SQL_SELECT_SALES_CHANGED_FROM = (
+    "SELECT json_data FROM sales WHERE company_id=$1 AND marketplace_id=$2"
+    " AND (json_data->>'lastChangeDate')::timestamp >= $3;"
+)
+
+SQL_INSERT_SALES_REPORT = (
+    "INSERT INTO sales_report"
+    " (rrd_id, realizationreport_id, srid, rr_dt, json_data, company_id, marketplace_id)"
+    " VALUES($1, $2, $3, $4, $5, $6, $7)"
+    " ON CONFLICT (company_id, marketplace_id, rrd_id) DO NOTHING;"
+)
+SQL_SELECT_SALES_REPORT = "SELECT * FROM sales_report WHERE company_id=$1 AND marketplace_id=$2;"
+SQL_SELECT_IDS_SALES_REPORT = "SELECT rrd_id AS id_mp FROM sales_report WHERE company_id=$1 AND marketplace_id=$2;"
+SQL_SELECT_SALES_REPORT_FROM = (
+    "SELECT json_data FROM sales_report WHERE company_id=$1 AND marketplace_id=$2 AND (rr_dt >= $3 OR rr_dt IS NULL);"
+)
+SQL_SELECT_SALES_REPORT_LAST_RRD_ID = "SELECT MAX(rrd_id) FROM sales_report WHERE company_id=$1 AND marketplace_id=$2;"
@@ -9,3 +9,15 @@ SQL_UPDATE_STOCKS = (
 )
 SQL_SELECT_STOCKS = "SELECT * FROM register_stock" " WHERE company_id=$1 AND marketplace_id=$2;"
 SQL_SELECT_IDS_STOCKS = "SELECT id_mp FROM register_stock" " WHERE company_id=$1 AND marketplace_id=$2;"
+
+SQL_SELECT_STOCK_SNAPSHOT = (
+    "SELECT sku, amount FROM stock_snapshot"
+    " WHERE company_id=$1 AND marketplace_id=$2 AND warehouse_id=$3 AND sku = ANY($4::varchar[])"
+    " AND updated_at > Now() - make_interval(secs => $5);"
+)
+SQL_UPSERT_STOCK_SNAPSHOT = (
+    "INSERT INTO stock_snapshot (warehouse_id, sku, amount, company_id, marketplace_id)"
+    " VALUES($1, $2, $3, $4, $5)"
+    " ON CONFLICT (company_id, marketplace_id, warehouse_id, sku)"
+    " DO UPDATE SET amount=EXCLUDED.amount, updated_at=Now();"
+)
@@ -19,6 +19,7 @@ class EventInMSMarketplace(Enum):
     START_BALANCE_MOVEMENT = "balance_movement"
     START_GENERATE_BARCODES = "generate_barcodes"
     START_CHECKING_ORDER_STATUSES = "checking_order_statuses"
+    START_SYNC_NOMENCLATURE = "sync_nomenclature"
 
 
 class OrderStatusInPlatform:
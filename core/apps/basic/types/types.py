@@ -198,9 +198,9 @@ class WBSortNomenclature(BaseModel):
     Поле по которому будет сортироваться список КТ (пока что поддерживается только updatedAt).
     """
 
-    ascending: str
+    ascending: bool
     """
-    Тип сортировки.
+    Тип сортировки. True - по возрастанию.
     """
 
 
@@ -429,6 +429,21 @@ class WBNomenclature(BaseModel):
     createdAt: str | None = None
     updatedAt: str | None = None
 
+    @property
+    def all_skus(self) -> list[str]:
+        return [sku for size in self.sizes or [] if isinstance(size.skus, list) for sku in size.skus if sku]
+
+    def args_for_insert_row(self, company_id: int, marketplace_id: int) -> tuple:
+        return (
+            self.nmID,
+            self.vendorCode,
+            self.all_skus,
+            self.updatedAt,
+            self.model_dump_json(),
+            company_id,
+            marketplace_id,
+        )
+
 
 class WBProductInPlatform(WBCardProduct, WBNomenclature):
     object: Optional[str] = None
@@ -1069,6 +1084,21 @@ class WBSalesReportItem(BaseModel):
     kiz: Optional[str] = None
     srid: Optional[str] = None
 
+    @property
+    def id_mp(self):
+        return self.rrd_id
+
+    def args_for_insert_row(self, company_id: int, marketplace_id: int) -> tuple:
+        return (
+            self.rrd_id,
+            self.realizationreport_id,
+            self.srid,
+            datetime.fromisoformat(self.rr_dt[:10]).date() if self.rr_dt else None,
+            self.model_dump_json(),
+            company_id,
+            marketplace_id,
+        )
+
 
 class WBSelectedPeriod(BaseModel):
     begin: str = Field(title="Начало периода", description="string <time-date>")
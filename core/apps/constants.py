@@ -10,6 +10,8 @@ COUNT_ITEMS_ONE_ITERATION_FILTER_CARDS = 100
 COUNT_ITEMS_ONE_ITERATION_CREATE_OR_UPDATE_CARDS_V2 = 1000
 COUNT_ITEMS_ONE_ITERATION_CREATE_CARDS_V3 = 100
 COUNT_ITEMS_ONE_ITERATION_UPDATE_CARDS_V3 = 1
+COUNT_ITEMS_ONE_ITERATION_STOCKS = 1000
+COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS = 1000
 
 ORDER_TYPE = {
     "Клиентский": "ready_for_pickup",
@@ -44,7 +46,9 @@ MATCHING_STATUS_PLATFORM_ORDER_POSTGRESQL = {
     for mp_status, status in MATCHING_STATUS_PLATFORM_ORDER.items()
 }
 
-HTTP_RESPONSE_CODES_FOR_REPEAT_REQUEST = {429, 500}
+HTTP_RESPONSE_CODE_NO_CONTENT = 204
+HTTP_RESPONSE_CODE_TOO_MANY_REQUESTS = 429
+HTTP_RESPONSE_CODES_FOR_REPEAT_REQUEST = {HTTP_RESPONSE_CODE_TOO_MANY_REQUESTS, 500}
 HTTP_RESPONSE_CODES_ACCESS_DENIED = {401, 403}
 HTTP_RESPONSE_CODES_STOP_REQURESTS = {400, 401, 403, 404}
 
@@ -0,0 +1,41 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.project.services.requesters.connection import (
+    HTTP_CONNECTIONS_CREATED,
+    HTTP_CONNECTIONS_REUSED,
+    create_client_session,
+)
+from core.project.conf import settings
+from core.project.utils import time_of_completion
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_client_session_reuses_connections():
+    async def handler(request):
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    host = server.host
+
+    created_before = HTTP_CONNECTIONS_CREATED.labels(host=host)._value.get()
+    reused_before = HTTP_CONNECTIONS_REUSED.labels(host=host)._value.get()
+    session = create_client_session()
+    try:
+        assert session.connector.limit == settings.HTTP_POOL_LIMIT
+        assert session.connector.limit_per_host == settings.HTTP_POOL_LIMIT_PER_HOST
+        for _ in range(3):
+            async with session.get(server.make_url("/")) as response:
+                assert response.status == 200
+                await response.json()
+    finally:
+        await session.close()
+        await server.close()
+
+    assert HTTP_CONNECTIONS_CREATED.labels(host=host)._value.get() - created_before == 1
+    assert HTTP_CONNECTIONS_REUSED.labels(host=host)._value.get() - reused_before == 2
@@ -8,8 +8,19 @@ from core.apps.basic.services.requesters.goods import (
     ExportPriceRequesterV2,
     NomenclatureRequest,
 )
+from core.apps.basic.services.handlers.prices_and_discounts import PricesAndDiscountsHandler
+from core.apps.basic.types import (
+    WBCursorNomenclatureV2,
+    WBNomenclature,
+    WBResponseObjectDownloadProcessedStatus,
+    WBResponseObjectHistoryGoods,
+    WBResponseObjectProcessedLoadDetail,
+    WBResponseProcessedLoadDetails,
+)
+from core.project.exceptions import RequestException
+from core.project.services.requesters.upload_poller import UploadStatusUnknown
 from core.project.utils import time_of_completion
-from core.project.types import MsgResponseToPlatform
+from core.project.types import MsgResponseToPlatform, MsgSendStartEventInMSMarketplace
 from icecream import ic
 
 
@@ -252,3 +263,140 @@ async def test_request_fetch_nomenclature(
     result = await requester.fetch_nomenclature()
     ic(len(result))
     assert len(result) > 0
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_sync_nomenclature_from_cursor(monkeypatch, body_request_import_stock):
+    class FakeNomenclatureDBHandler:
+        cursor = WBCursorNomenclatureV2(updatedAt="2024-01-01T00:00:00Z", nmID=1)
+        saved = None
+
+        async def get_cursor(self):
+            return self.cursor
+
+        async def upsert(self, cards, cursor, replace=False):
+            self.saved = cards, cursor, replace
+
+    db_handler = FakeNomenclatureDBHandler()
+    requested_cursors = []
+
+    async def download_nomenclature(self, cursor=None, ascending=None):
+        requested_cursors.append((cursor, ascending))
+        cards = [
+            WBNomenclature.model_construct(nmID=3, vendorCode="c", updatedAt="2024-01-03T00:00:00Z"),
+            WBNomenclature.model_construct(nmID=2, vendorCode="b", updatedAt="2024-01-02T00:00:00Z"),
+        ]
+        return cards, True
+
+    monkeypatch.setattr(NomenclatureRequest, "nomenclature_db_handler", property(lambda self: db_handler))
+    monkeypatch.setattr(NomenclatureRequest, "download_nomenclature", download_nomenclature)
+    requester = NomenclatureRequest(
+        app=None,
+        session=None,
+        semaphore=Semaphore(4),
+        request_body=body_request_import_stock.model_copy(update={"add_info": None}),
+    )
+    assert await requester.sync_nomenclature(fresh=True)
+    assert requested_cursors == [(db_handler.cursor, True)]
+    cards, cursor, replace = db_handler.saved
+    assert len(cards) == 2 and not replace
+    assert (cursor.updatedAt, cursor.nmID) == ("2024-01-03T00:00:00Z", 3)
+
+    requester.request_body = requester.request_body.model_copy(update={"add_info": {"full_sync": True}})
+    await requester.sync_nomenclature(fresh=True)
+    assert requested_cursors[-1] == (None, True)
+    assert db_handler.saved[2]
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_export_prices_selects_only_changed() -> None:
+    class FakePriceSnapshotDBHandler:
+        async def prices(self, nm_ids):
+            return {1: (100, 10), 2: (200, 20)}
+
+    items = [
+        {"nmID": 1, "price": 100, "discount": 10},
+        {"nmID": 2, "price": 250, "discount": 20},
+        {"nmID": 3, "price": 300, "discount": 0},
+    ]
+    request_body = MsgSendStartEventInMSMarketplace.model_construct(
+        company_id=1, marketplace_id=1, add_info=None, data={"data": items}
+    )
+    requester = ExportPriceRequesterV2(app=None, session=None, semaphore=Semaphore(4), request_body=request_body)
+    await requester.select_changed_prices(FakePriceSnapshotDBHandler())
+    assert [item.nmID for item in requester.input_data] == [2, 3]
+
+    request_body.add_info = {"full_sync": True}
+    requester = ExportPriceRequesterV2(app=None, session=None, semaphore=Semaphore(4), request_body=request_body)
+    await requester.select_changed_prices(FakePriceSnapshotDBHandler())
+    assert len(requester.input_data) == len(items)
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_export_prices_accepts_only_confirmed_items(monkeypatch) -> None:
+    items = [{"nmID": nm_id, "price": 100, "discount": 10} for nm_id in (1, 2, 3)]
+    request_body = MsgSendStartEventInMSMarketplace.model_construct(
+        company_id=1, marketplace_id=1, add_info=None, data={"data": items}
+    )
+    requester = ExportPriceRequesterV2(app=None, session=None, semaphore=Semaphore(4), request_body=request_body)
+    status = WBResponseObjectDownloadProcessedStatus.model_construct(status=5, overAllGoodsNumber=2)
+    details = WBResponseObjectProcessedLoadDetail.model_construct(
+        uploadID=1,
+        historyGoods=[
+            WBResponseObjectHistoryGoods.model_construct(nmID=1, errorText=None),
+            WBResponseObjectHistoryGoods.model_construct(nmID=2, errorText="Ошибка"),
+        ],
+    )
+    requested_limits = []
+
+    async def fetch_load_progress(data):
+        return status
+
+    async def fetch_load_detail(data, limit):
+        requested_limits.append(limit)
+        return MsgResponseToPlatform(data=WBResponseProcessedLoadDetails.model_construct(data=details))
+
+    monkeypatch.setattr(requester, "fetch_load_progress", fetch_load_progress)
+    monkeypatch.setattr(requester, "fetch_load_detail", fetch_load_detail)
+    # Товар 3 отсутствует в детализации, товар 2 обработан с ошибкой
+    _, accepted = await requester.process_upload({"uploadID": 1}, requester.input_data)
+    assert [item.nmID for item in accepted] == [1]
+    assert requested_limits == [len(items)]
+
+    # Без детализации итог загрузки неизвестен
+    details = None
+    _, accepted = await requester.process_upload({"uploadID": 1}, requester.input_data)
+    assert accepted == []
+
+    # Отменённая загрузка
+    status = WBResponseObjectDownloadProcessedStatus.model_construct(status=4, overAllGoodsNumber=3)
+    _, accepted = await requester.process_upload({"uploadID": 1}, requester.input_data)
+    assert accepted == []
+
+    # Ошибка запроса одной загрузки не прерывает обработку остальных
+    async def failed_load_progress(data):
+        raise RequestException("Ошибка запроса")
+
+    monkeypatch.setattr(requester, "fetch_load_progress", failed_load_progress)
+    message, accepted = await requester.process_upload({"uploadID": 2}, requester.input_data)
+    assert message is None and accepted == []
+    assert requester.errors[-1]["uploadID"] == 2
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_export_prices_unknown_upload_status(monkeypatch) -> None:
+    request_body = MsgSendStartEventInMSMarketplace.model_construct(
+        company_id=1, marketplace_id=1, add_info=None, data={"data": []}
+    )
+    requester = ExportPriceRequesterV2(app=None, session=None, semaphore=Semaphore(4), request_body=request_body)
+
+    async def download_processed_status(self):
+        return MsgResponseToPlatform(data=None)
+
+    monkeypatch.setattr(PricesAndDiscountsHandler, "download_processed_status", download_processed_status)
+    with pytest.raises(UploadStatusUnknown):
+        await requester.fetch_load_progress({"uploadID": 3})
@@ -0,0 +1,164 @@
+import json
+from asyncio import Semaphore
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.apps.basic.types import ListBaseModel
+from core.project.enums.common import RequestMethod
+from core.project.services.requesters.connection import create_client_session
+from core.project.services.requesters.fetcher import Fetcher
+from core.project.services.requesters.json_stream import JSONArrayParser
+from core.project.types import URLParameterSchema
+from core.project.utils import time_of_completion
+
+
+class StreamItem(ListBaseModel):
+    root: list[dict]
+
+
+def test_json_array_parser_handles_chunk_boundaries():
+    data = [{"id": i, "name": 'a, ]"b' * i, "price": 10.5 * i} for i in range(20)] + [123456, "юникод"]
+    raw = json.dumps(data, ensure_ascii=False).encode()
+    for chunk_size in (1, 3, 7, 64):
+        parser = JSONArrayParser()
+        result = []
+        for start in range(0, len(raw), chunk_size):
+            result.extend(parser.feed(raw[start : start + chunk_size]))
+        assert parser.close() is None
+        assert result == data
+
+
+def test_json_array_parser_large_chunk():
+    data = [{"id": i, "name": "товар"} for i in range(100_000)]
+    parser = JSONArrayParser()
+    feed = parser.feed(json.dumps(data, indent=1, ensure_ascii=False).encode())
+    # Остановленный разбор продолжается с первого невыданного элемента
+    assert [next(feed) for _ in range(3)] == data[:3]
+    feed.close()
+    assert list(parser.feed(b"")) == data[3:]
+    assert parser.close() is None
+
+
+def test_json_array_parser_returns_object_response():
+    parser = JSONArrayParser()
+    assert list(parser.feed(b'{"errors": ["bad"]}')) == []
+    assert parser.close() == {"errors": ["bad"]}
+
+    parser = JSONArrayParser()
+    list(parser.feed(b'[{"id": 1}, {"id"'))
+    with pytest.raises(json.JSONDecodeError):
+        parser.close()
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_fetcher_stream_yields_validated_batches():
+    items = [{"id": i} for i in range(25)]
+
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        await response.prepare(request)
+        raw = json.dumps(items).encode()
+        for start in range(0, len(raw), 16):
+            await response.write(raw[start : start + 16])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/report", handler)
+    server = TestServer(app)
+    await server.start_server()
+    url_params = URLParameterSchema(
+        method=RequestMethod.GET,
+        url="/report",
+        url_api_point=str(server.make_url("")).rstrip("/"),
+        has_cache=False,
+        response_schema=StreamItem,
+        positive_response_code=200,
+    )
+    session = create_client_session()
+    fetcher = Fetcher()
+    try:
+        batches = [
+            batch
+            async for batch in fetcher.stream(
+                Semaphore(1), session, url_params, headers={"Authorization": "stream"}, batch_size=10
+            )
+        ]
+    finally:
+        await session.close()
+        await server.close()
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [item for batch in batches for item in batch.root] == items
+    assert fetcher.errors == []
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_fetcher_stream_releases_slot_and_ends_on_no_content():
+    items = [{"id": i} for i in range(25)]
+
+    async def report(request):
+        return web.json_response(items)
+
+    async def no_content(request):
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_get("/report", report)
+    app.router.add_get("/no_content", no_content)
+    server = TestServer(app)
+    await server.start_server()
+    session = create_client_session()
+
+    def url_params(url: str) -> URLParameterSchema:
+        return URLParameterSchema(
+            method=RequestMethod.GET,
+            url=url,
+            url_api_point=str(server.make_url("")).rstrip("/"),
+            has_cache=False,
+            response_schema=StreamItem,
+            positive_response_code=200,
+        )
+
+    semaphore = Semaphore(1)
+    fetcher = Fetcher()
+    try:
+        locked = []
+        async for _ in fetcher.stream(
+            semaphore, session, url_params("/report"), {"Authorization": "s"}, batch_size=10
+        ):
+            locked.append(semaphore.locked())
+        # Пока вызывающий обрабатывает пачки, семафор свободен
+        assert locked == [False, False, False]
+        assert fetcher.errors == []
+
+        # Ответ 204 - данных больше нет, это не ошибка
+        batches = [
+            batch
+            async for batch in fetcher.stream(semaphore, session, url_params("/no_content"), {"Authorization": "s"})
+        ]
+        assert batches == []
+        assert fetcher.errors == []
+    finally:
+        await session.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_fetcher_parsed_response_without_content_type():
+    class Response:
+        headers = {}
+
+        def __init__(self, text: str):
+            self.body = text
+
+        async def text(self):
+            return self.body
+
+    assert await Fetcher.get_parsed_response(Response("")) is None
+    assert await Fetcher.get_parsed_response(Response('{"error": "bad"}')) == {"error": "bad"}
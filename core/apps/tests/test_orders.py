@@ -2,6 +2,7 @@ import pytest
 from asyncio import Semaphore
 from typing import Any
 from collections import Counter
+from datetime import datetime, timedelta
 from pytest_postgresql.janitor import DatabaseJanitor
 
 from core.apps.basic.request_urls.wildberries import (
@@ -9,6 +10,7 @@ from core.apps.basic.request_urls.wildberries import (
     URL_GET_ORDERS_WILDBERRIES_V3,
 )
 from core.apps.basic.services.database_workers.orders import OrderDBHandler
+from core.project.services.database_workers import WatermarkDBHandler
 from core.apps.basic.services.handlers import CommonHandler, OrdersHandler
 from core.apps.basic.services.requesters.orders import (
     FBSOrderRequester,
@@ -22,6 +24,7 @@ from core.apps.basic.sql_commands.orders import (
 from core.project.types import MsgResponseToPlatform
 from core.project.conf import settings
 from core.project.utils import time_of_completion
+from core.apps.basic.types import WBFBOOrder
 from core.apps.basic.types.types import ItemMoveStock
 from core.apps.basic.services.database_workers.stocks import collect_stock_info_from_orders_db
 
@@ -257,6 +260,20 @@ def test_substitute_data_into_fbs_from_fbo_orders(
     assert positive_result != 0
 
 
+def test_split_period_for_fbs_orders():
+    date_to = datetime(2024, 1, 6, 12)
+    date_from = date_to - timedelta(days=5)
+    shards = FBSOrderRequester.split_period(date_from, date_to, timedelta(hours=24))
+    assert len(shards) == 5
+    assert shards[0][0] == date_from
+    assert shards[-1][1] == date_to
+    assert all(previous[1] == current[0] for previous, current in zip(shards, shards[1:]))
+
+    shards = FBSOrderRequester.split_period(date_from, date_to, timedelta(hours=7))
+    assert len(shards) == 18
+    assert shards[-1][1] == date_to
+
+
 @pytest.mark.skip(reason="текущая логика МС не записывает заказы в БД")
 @pytest.mark.asyncio
 @time_of_completion
@@ -437,3 +454,174 @@ async def test_checking_order_statuses_errors(running_app, body_request_checking
     assert isinstance(result, MsgResponseToPlatform)
     assert result.data == []
     assert len(result.errors) > 0
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_orders_watermark_with_overlap(monkeypatch, body_request_import_orders_fbo):
+    watermark = datetime(2024, 1, 6, 12)
+
+    async def get_watermark(self, code):
+        return watermark
+
+    monkeypatch.setattr(WatermarkDBHandler, "get", get_watermark)
+    requester = FBOOrderRequester(
+        app={settings.DEFAULT_DATABASE: object()},
+        semaphore=Semaphore(4),
+        session=None,
+        request_body=body_request_import_orders_fbo.model_copy(update={"add_info": None}),
+        url_schema=URL_GET_ORDERS_WILDBERRIES_V1,
+    )
+    assert await requester.get_watermark() == watermark - timedelta(seconds=settings.WATERMARK_OVERLAP)
+
+    requester.request_body = requester.request_body.model_copy(update={"add_info": {"full_sync": True}})
+    assert await requester.get_watermark() is None
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_fbs_orders_requested_for_full_period(monkeypatch, body_request_import_orders) -> None:
+    requested = []
+
+    async def fetch_per_day(self, date_from, date_to):
+        requested.append((date_from, date_to))
+        return []
+
+    async def get_watermark(self, code):
+        return datetime.now()
+
+    monkeypatch.setattr(FBSOrderRequester, "fetch_per_day", fetch_per_day)
+    monkeypatch.setattr(WatermarkDBHandler, "get", get_watermark)
+    requester = FBSOrderRequester(
+        app={settings.DEFAULT_DATABASE: object()},
+        semaphore=Semaphore(4),
+        session=None,
+        request_body=body_request_import_orders.model_copy(update={"add_info": None}),
+        url_schema=URL_GET_ORDERS_WILDBERRIES_V3,
+    )
+    assert await requester.fetch_old_orders() == []
+    # Задания, созданные до прошлой загрузки, запрашиваются снова, чтобы обновить их статусы
+    assert len(requested) == FBSOrderRequester.period
+    period = requested[-1][1] - requested[0][0]
+    assert period == pytest.approx(timedelta(days=FBSOrderRequester.period).total_seconds(), abs=1)
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_orders_response_contains_changed_statistic_orders(monkeypatch, body_request_import_orders_fbo) -> None:
+    changed_orders = [WBFBOOrder.model_construct(srid=srid, nmId=1) for srid in ("s1", "s2")]
+    merged = []
+
+    async def fetch(self):
+        return changed_orders
+
+    async def fetch_nothing(self):
+        return []
+
+    async def merge_orders_into_db(self, orders):
+        merged.extend(orders)
+
+    monkeypatch.setattr(OrderRequester, "fetch", fetch)
+    monkeypatch.setattr(OrdersHandler, "fetch_relation_products", fetch_nothing)
+    monkeypatch.setattr(OrdersHandler, "get_sales", fetch_nothing)
+    monkeypatch.setattr(OrdersHandler, "get_sales_report", fetch_nothing)
+    monkeypatch.setattr(OrdersHandler, "merge_orders_into_db", merge_orders_into_db)
+    monkeypatch.setattr(WBFBOOrder, "model_to_platform", lambda self, company_id, marketplace_id: {"id": self.srid})
+
+    handler = OrdersHandler(app={"session": None}, body=body_request_import_orders_fbo)
+    result = await handler.execute()
+    # Платформе отправляются только заказы, полученные с отметки прошлой загрузки
+    assert result.data == [{"id": "s1"}, {"id": "s2"}]
+    assert merged == changed_orders
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_orders_watermark_saved_after_merge(monkeypatch, body_request_import_orders_fbo) -> None:
+    orders = [WBFBOOrder.model_construct(srid="s1", nmId=1, lastChangeDate="2024-01-06T12:00:00")]
+    merged_statuses = []
+    saved = []
+
+    class Response:
+        root = orders
+
+    async def make_single_api_request(self, urls_and_params):
+        return Response()
+
+    async def merge_orders_and_status(self, fetched_orders):
+        return merged_statuses
+
+    async def save_watermark(self, values):
+        saved.append(list(values))
+
+    monkeypatch.setattr(FBOOrderRequester, "make_single_api_request", make_single_api_request)
+    monkeypatch.setattr(FBOOrderRequester, "merge_orders_and_status", merge_orders_and_status)
+    monkeypatch.setattr(FBOOrderRequester, "save_watermark", save_watermark)
+    handler = OrdersHandler(app={"session": None}, body=body_request_import_orders_fbo)
+
+    # Без продаж заказы не сопоставлены, отметка не запоминается
+    assert await handler.order_requester.fetch_orders_from_statistic_method() == []
+    assert handler.order_requester.statistic_orders_requester.fetched_watermark == ()
+    # Отметка запросом не сохраняется, её сохраняет обработчик после записи в базу
+    merged_statuses.extend(orders)
+    assert await handler.order_requester.fetch_orders_from_statistic_method() == orders
+    assert saved == []
+
+    class FailedOrderDBHandler:
+        async def merge(self, items):
+            raise ConnectionError("База недоступна")
+
+    monkeypatch.setattr(OrdersHandler, "init_db_handler", lambda self: None)
+    handler.db_handler = FailedOrderDBHandler()
+    await handler.merge_orders_into_db(orders)
+    assert saved == []
+
+    class OrderDBHandlerStub:
+        async def merge(self, items):
+            pass
+
+    handler.db_handler = OrderDBHandlerStub()
+    await handler.merge_orders_into_db(orders)
+    assert saved == [["2024-01-06T12:00:00"]]
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_upsert_orders_rewrites_only_changed(
+    loop, fake_server, app, db_order_handler: OrderDBHandler, body_request_import_orders_fbo, test_client_session
+):
+    pool = app[settings.DEFAULT_DATABASE]
+    await pool.execute("TRUNCATE orders, orders_line, settings; ALTER SEQUENCE orders_id_seq RESTART WITH 1")
+    requester = FBOOrderRequester(
+        app=app,
+        semaphore=Semaphore(4),
+        session=test_client_session,
+        request_body=body_request_import_orders_fbo,
+        url_schema=URL_GET_ORDERS_WILDBERRIES_V1,
+    )
+    orders = await requester.fetch()
+    await db_order_handler.update(orders)
+    saved = {record["id_mp"]: record["xmin"] for record in await pool.fetch("SELECT id_mp, xmin::text FROM orders")}
+
+    # Повторная запись с одним изменённым заказом перезаписывает только его
+    orders[0].isCancel = not orders[0].isCancel
+    await db_order_handler.update(orders)
+    records = {record["id_mp"]: record["xmin"] for record in await pool.fetch("SELECT id_mp, xmin::text FROM orders")}
+    assert records.keys() == saved.keys()
+    assert [id_mp for id_mp in records if records[id_mp] != saved[id_mp]] == [orders[0].srid]
+
+    # При полной замене удаляются заказы, которых нет среди переданных
+    await db_order_handler.update(orders[1:])
+    assert await pool.fetchval("SELECT count(*) FROM orders") == len(saved) - 1
+
+    # Сборочное задание не заменяется строкой того же заказа из метода статистики
+    await pool.execute("UPDATE orders SET schema='FBS' WHERE id_mp=$1", orders[1].srid)
+    orders[1].isCancel = not orders[1].isCancel
+    await db_order_handler.merge(orders[1:2])
+    assert await pool.fetchval("SELECT schema FROM orders WHERE id_mp=$1", orders[1].srid) == "FBS"
+
+    # Из повторов одного заказа в переданных записывается последний
+    first, last = orders[0].model_copy(update={"isCancel": False}), orders[0].model_copy(update={"isCancel": True})
+    await db_order_handler.merge([first, last])
+    assert await pool.fetchval("SELECT status FROM orders WHERE id_mp=$1", orders[0].srid) == "cancel"
+    await pool.execute("TRUNCATE orders, orders_line, settings; ALTER SEQUENCE orders_id_seq RESTART WITH 1")
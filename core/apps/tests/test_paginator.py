@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from core.apps.basic.request_urls.wildberries import URL_GET_ORDERS_WILDBERRIES_V3, URL_STATISTICS_FOR_SELECTED_PERIOD
+from core.project.services.requesters import AppRequester
+from core.project.services.requesters.paginator import (
+    CursorPagination,
+    OffsetPagination,
+    PagePagination,
+    Paginator,
+)
+from core.project.utils import time_of_completion
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_page_pagination_prefetches_next_page():
+    requested = []
+
+    async def fetch_page(params):
+        requested.append(params["page"])
+        return {"items": [params["page"]], "next": params["page"] < 3}
+
+    pagination = PagePagination(
+        params=lambda page: {"page": page},
+        items=lambda response: response["items"],
+        has_next=lambda response: response["next"],
+    )
+    paginator = Paginator(fetch_page, pagination, buffer_size=2)
+    pages = []
+    async for page in paginator:
+        # Пока обрабатывается первая страница, следующие уже запрошены
+        await asyncio.sleep(0.01)
+        pages.append((page, list(requested)))
+
+    assert [page for page, _ in pages] == [[1], [2], [3]]
+    assert pages[0][1] == [1, 2, 3]
+    assert paginator.completed
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_offset_and_cursor_pagination():
+    data = list(range(25))
+
+    async def fetch_offset(params):
+        return data[params["offset"] : params["offset"] + params["limit"]]
+
+    pagination = OffsetPagination(
+        params=lambda offset, limit: {"offset": offset, "limit": limit}, items=lambda response: response, limit=10
+    )
+    assert await Paginator(fetch_offset, pagination).items() == data
+
+    async def fetch_cursor(params):
+        return {"items": data[params["cursor"] : params["cursor"] + 10], "cursor": params["cursor"] + 10}
+
+    pagination = CursorPagination(
+        params={"cursor": 0},
+        next_params=lambda params, response: {"cursor": response["cursor"]} if response["cursor"] < 25 else None,
+        items=lambda response: response["items"],
+    )
+    assert await Paginator(fetch_cursor, pagination).items() == data
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_paginator_stops_on_empty_response_and_raises_errors():
+    async def fetch_empty(params):
+        return None
+
+    paginator = Paginator(fetch_empty, PagePagination(params=lambda page: {"page": page}, items=list))
+    assert await paginator.items() == []
+    assert not paginator.completed
+
+    async def fetch_error(params):
+        raise ValueError("error")
+
+    with pytest.raises(ValueError):
+        await Paginator(fetch_error, PagePagination(params=lambda page: {"page": page}, items=list)).items()
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_page_pagination_speculative_prefetch():
+    last_page = 5
+    requested = []
+    cancelled = []
+
+    async def fetch_page(params):
+        page = params["page"]
+        requested.append(page)
+        try:
+            # Более поздние страницы отвечают быстрее, порядок должен сохраниться.
+            # Страницы после последней не успевают ответить и должны быть отменены
+            await asyncio.sleep(10 if page > last_page else 0.01 * (10 - page))
+        except asyncio.CancelledError:
+            cancelled.append(page)
+            raise
+        if page > last_page:
+            return {"items": [], "next": False}
+        return {"items": [page], "next": page < last_page}
+
+    pagination = PagePagination(
+        params=lambda page: {"page": page},
+        items=lambda response: response["items"],
+        has_next=lambda response: response["next"],
+    )
+    paginator = Paginator(fetch_page, pagination, prefetch=3)
+    assert await paginator.items() == [1, 2, 3, 4, 5]
+    assert paginator.completed
+    await asyncio.sleep(0)
+    assert cancelled
+    assert set(cancelled) == set(requested) - {1, 2, 3, 4, 5}
+
+
+def test_paginate_limits_prefetch_by_quota():
+    requester = AppRequester(app=None, session=None, semaphore=asyncio.Semaphore(1), request_body=None)
+    pagination = PagePagination(params=lambda page: {"page": page}, items=lambda response: response)
+
+    # Квота аналитики допускает один запрос за раз: упреждение только стояло бы в её очереди
+    assert requester.paginate(pagination, URL_STATISTICS_FOR_SELECTED_PERIOD, prefetch=4).prefetch == 0
+    quota = URL_GET_ORDERS_WILDBERRIES_V3.quota
+    assert requester.paginate(pagination, URL_GET_ORDERS_WILDBERRIES_V3, prefetch=4).prefetch == min(
+        4, quota.burst - 1
+    )
+    assert requester.paginate(pagination, fetch_page=lambda params: None, prefetch=4).prefetch == 4
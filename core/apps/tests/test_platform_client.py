@@ -0,0 +1,42 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.apps.basic.types.from_platform import ResponseCompanyWithHeader
+from core.project.services.platform.client import PlatformClient
+from core.project.utils import time_of_completion
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_fetch_collection_follows_next_pages():
+    pages = 3
+    requested = []
+
+    async def handler(request):
+        page = int(request.query.get("page", 1))
+        requested.append(dict(request.query))
+        next_url = str(request.url.with_query(page=page + 1)) if page < pages else None
+        return web.json_response({"count": pages, "next": next_url, "previous": None, "results": []})
+
+    app = web.Application()
+    app.router.add_get("/companies", handler)
+    server = TestServer(app)
+    await server.start_server()
+    client = PlatformClient()
+    try:
+        result = await client.fetch_collection(
+            str(server.make_url("/companies")),
+            headers={},
+            response_type=ResponseCompanyWithHeader,
+            params={"marketplace": "WILDBERRIES"},
+        )
+        session = client.session
+    finally:
+        await client.close()
+        await server.close()
+
+    assert result == []
+    assert len(requested) == pages
+    assert requested[0] == {"marketplace": "WILDBERRIES"}
+    assert session.closed
@@ -0,0 +1,252 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError
+
+from core.project.conf import settings
+from core.project.services.rate_limiter.backends import AbstractRateLimiterBackend, RedisRateLimiterBackend
+from core.project.services.rate_limiter.backoff import delay_from_headers, exhausted_quota_delay, retry_delay
+from core.project.services.rate_limiter.buckets import AdaptiveConcurrency, TokenBucket
+from core.project.services.rate_limiter.common import RateLimiter
+from core.project.types import QuotaProfile, URLParameterSchema
+from core.project.utils import time_of_completion
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(rate=2, capacity=1, updated_at=0)
+    assert bucket.reserve(now=0) == 0
+    assert bucket.reserve(now=0) == pytest.approx(0.5)
+    assert bucket.reserve(now=0) == pytest.approx(1)
+    # Через секунду вся очередь резерваций отработана
+    assert bucket.reserve(now=1) == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_spacing_requests():
+    limiter = RateLimiter()
+    url_params = URLParameterSchema(name="test_rate_limiter", url="/test", timeout=0.2)
+    key = limiter.make_key("hash", url_params)
+
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire(key, url_params) for _ in range(3)))
+    assert time.monotonic() - start >= 0.4
+
+    # Для другого ключа доступа ожидания нет
+    other_key = limiter.make_key("other_hash", url_params)
+    assert await limiter.acquire(other_key, url_params) == 0
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_without_timeout():
+    limiter = RateLimiter()
+    url_params = URLParameterSchema(url="/test")
+    key = limiter.make_key("hash", url_params)
+    assert await limiter.acquire(key, url_params) == 0
+    assert not limiter.buckets
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_snapshot(tmp_path):
+    path = os.path.join(tmp_path, "rate_limiter.yml")
+    url_params = URLParameterSchema(name="test_rate_limiter", url="/test", timeout=60)
+    limiter = RateLimiter()
+    key = limiter.make_key("hash", url_params)
+    await limiter.acquire(key, url_params)
+    await limiter.save_snapshot(path)
+
+    restored_limiter = RateLimiter()
+    await restored_limiter.load_snapshot(path)
+    assert key in restored_limiter.buckets
+    assert restored_limiter.buckets[key].reserve() == pytest.approx(60, abs=1)
+
+
+class StubRateLimiterBackend(AbstractRateLimiterBackend):
+    def __init__(self, delay: float = 0, error: Optional[Exception] = None):
+        self.delay = delay
+        self.error = error
+        self.reserved_keys = []
+
+    async def reserve(self, key: str, rate: float, capacity: float) -> float:
+        if self.error:
+            raise self.error
+        self.reserved_keys.append(key)
+        return self.delay
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_redis_rate_limiter_backend_gcra():
+    """
+    Скрипт GCRA выполняется на Redis из CACHE_CONFIG["redis_alt"] (переменные окружения REDIS_HOST, REDIS_PORT),
+    без Redis тест пропускается
+    """
+    backend = RedisRateLimiterBackend()
+    backend.key_prefix = f"test_rate_limiter:{time.time_ns()}"
+    try:
+        await backend.client.ping()
+    except (RedisError, OSError) as err:
+        await backend.close()
+        pytest.skip(f"Redis недоступен: {err}")
+    try:
+        # Запас из трёх запросов, далее по одному запросу в 0.1 с
+        delays = [await backend.reserve("hash", rate=10, capacity=3) for _ in range(4)]
+        assert delays[:3] == [0, 0, 0]
+        assert delays[3] == pytest.approx(0.1, abs=0.02)
+        # Запас другого ключа не расходуется
+        assert await backend.reserve("other_hash", rate=10, capacity=3) == 0
+        # За время ожидания запас восстанавливается
+        await asyncio.sleep(0.4)
+        assert [await backend.reserve("hash", rate=10, capacity=3) for _ in range(3)] == [0, 0, 0]
+    finally:
+        await backend.client.delete(f"{backend.key_prefix}:hash", f"{backend.key_prefix}:other_hash")
+        await backend.close()
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_with_backend():
+    backend = StubRateLimiterBackend(delay=0.1)
+    limiter = RateLimiter(backend=backend)
+    url_params = URLParameterSchema(name="test_rate_limiter", url="/test", timeout=60)
+    key = limiter.make_key("hash", url_params)
+    assert await limiter.acquire(key, url_params) == pytest.approx(0.1)
+    assert backend.reserved_keys == [key]
+    # Лимит считается на стороне бэкенда, локальные корзины не используются
+    assert not limiter.buckets
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_backend_fallback():
+    limiter = RateLimiter(backend=StubRateLimiterBackend(error=RedisConnectionError("Redis недоступен")))
+    url_params = URLParameterSchema(name="test_rate_limiter", url="/test", timeout=60)
+    key = limiter.make_key("hash", url_params)
+    assert await limiter.acquire(key, url_params) == 0
+    assert key in limiter.buckets
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_quota_burst():
+    limiter = RateLimiter()
+    url_params = URLParameterSchema(
+        name="test_rate_limiter", url="/test", quota=QuotaProfile(requests=10, interval=1, burst=3)
+    )
+    key = limiter.make_key("hash", url_params)
+    delays = [await limiter.acquire(key, url_params) for _ in range(4)]
+    assert delays[:3] == [0, 0, 0]
+    assert delays[3] == pytest.approx(0.1, abs=0.01)
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_quota_shared_by_family():
+    limiter = RateLimiter()
+    quota = QuotaProfile(name="test_family", requests=10, interval=1, burst=2)
+    first_url = URLParameterSchema(name="test_rate_limiter_first", url="/first", quota=quota)
+    second_url = URLParameterSchema(name="test_rate_limiter_second", url="/second", quota=quota)
+    assert limiter.make_key("hash", first_url) == limiter.make_key("hash", second_url)
+    assert limiter.make_key("hash", first_url) != limiter.make_key("other_hash", first_url)
+
+    delays = [await limiter.acquire(limiter.make_key("hash", url), url) for url in (first_url, second_url) * 2]
+    # Запас общий: после двух запросов к разным точкам следующие ждут пополнения
+    assert delays[:2] == [0, 0]
+    assert delays[2:] == [pytest.approx(0.1, abs=0.01)] * 2
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_quota_max_concurrency():
+    limiter = RateLimiter()
+    url_params = URLParameterSchema(
+        name="test_rate_limiter",
+        url="/test",
+        quota=QuotaProfile(requests=100, interval=1, burst=100, max_concurrency=2),
+    )
+    key = limiter.make_key("hash", url_params)
+    active = max_active = 0
+
+    async def request():
+        nonlocal active, max_active
+        async with limiter.concurrency(key, url_params):
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+
+    await asyncio.gather(*(request() for _ in range(5)))
+    assert max_active == 2
+    limiter.purge()
+    assert not limiter.slots
+
+
+def test_delay_from_headers():
+    assert delay_from_headers({"Retry-After": "5"}) == 5
+    assert delay_from_headers({"X-Ratelimit-Retry": "2.5"}) == 2.5
+    assert delay_from_headers({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+    assert delay_from_headers({"Retry-After": "не число"}) is None
+    assert delay_from_headers({}) is None
+
+
+def test_exhausted_quota_delay():
+    assert exhausted_quota_delay({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "4"}) == 4
+    assert exhausted_quota_delay({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Retry": "1.5"}) == 1.5
+    assert exhausted_quota_delay({"X-Ratelimit-Remaining": "3", "X-Ratelimit-Reset": "4"}) is None
+    assert exhausted_quota_delay({"X-Ratelimit-Remaining": "0"}) is None
+    assert exhausted_quota_delay({"X-Ratelimit-Reset": "4"}) is None
+    reset = str(settings.RETRY_BACKOFF_MAX * 2)
+    assert (
+        exhausted_quota_delay({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": reset}) == settings.RETRY_BACKOFF_MAX
+    )
+
+
+def test_retry_delay_backoff():
+    for retry_num in range(1, 5):
+        assert 0 <= retry_delay(retry_num, base=1) <= 2 ** (retry_num - 1)
+    assert retry_delay(1, headers={"Retry-After": "3"}, base=1) == 3
+    assert retry_delay(1, headers={"Retry-After": str(settings.RETRY_BACKOFF_MAX * 2)}) == settings.RETRY_BACKOFF_MAX
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_adaptive_concurrency():
+    concurrency = AdaptiveConcurrency(max_limit=4)
+    concurrency.on_throttle()
+    concurrency.on_throttle()
+    assert concurrency.limit == 1
+    concurrency.on_throttle()
+    assert concurrency.limit == 1
+    for _ in range(3):
+        concurrency.on_success()
+    assert int(concurrency.limit) == 2
+
+    active = max_active = 0
+
+    async def request():
+        nonlocal active, max_active
+        async with concurrency:
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(request() for _ in range(5)))
+    assert max_active == 2
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_rate_limiter_hold():
+    limiter = RateLimiter()
+    url_params = URLParameterSchema(name="test_rate_limiter", url="/test")
+    key = limiter.make_key("hash", url_params)
+    limiter.hold(key, 0.2)
+    assert await limiter.acquire(key, url_params) == pytest.approx(0.2, abs=0.05)
+    assert await limiter.acquire(key, url_params) == 0
+    assert not limiter.holds
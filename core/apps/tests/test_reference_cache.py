@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from core.project.services.requesters.reference_cache import ReferenceCache
+from core.project.utils import time_of_completion
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_reference_cache_stale_while_revalidate(tmp_path):
+    cache = ReferenceCache(path=str(tmp_path))
+    count_calls = 0
+
+    async def fetch():
+        nonlocal count_calls
+        count_calls += 1
+        return {"version": count_calls}
+
+    assert await cache.get_or_fetch("key", fetch, ttl=60) == {"version": 1}
+    assert await cache.get_or_fetch("key", fetch, ttl=60) == {"version": 1}
+    assert count_calls == 1
+
+    # Устаревшая копия отдаётся сразу, обновление выполняется в фоне
+    assert await cache.get_or_fetch("key", fetch, ttl=0) == {"version": 1}
+    await asyncio.gather(*cache.refresh_tasks.values())
+    assert count_calls == 2
+    assert await cache.get_or_fetch("key", fetch, ttl=60) == {"version": 2}
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_reference_cache_persistence(tmp_path):
+    async def fetch():
+        return ["warehouse"]
+
+    await ReferenceCache(path=str(tmp_path)).get_or_fetch("key", fetch, ttl=60)
+
+    async def fetch_not_expected():
+        raise AssertionError("После перезапуска данные должны читаться с диска")
+
+    restored_cache = ReferenceCache(path=str(tmp_path))
+    assert await restored_cache.get_or_fetch("key", fetch_not_expected, ttl=60) == ["warehouse"]
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_reference_cache_failed_response(tmp_path):
+    cache = ReferenceCache(path=str(tmp_path))
+
+    async def fetch():
+        return None
+
+    assert await cache.get_or_fetch("key", fetch, ttl=60) is None
+    assert not cache.items
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_reference_cache_max_items(tmp_path):
+    cache = ReferenceCache(path=str(tmp_path), max_items=2)
+
+    async def fetch():
+        return ["warehouse"]
+
+    for index, key in enumerate(("first", "second")):
+        await cache.get_or_fetch(key, fetch, ttl=60)
+        # Время изменения файлов должно различаться, чтобы вытеснялась самая старая копия
+        os.utime(cache.file_path(key), (time.time(), time.time() - 100 + index))
+    await cache.get_or_fetch("third", fetch, ttl=60)
+    assert list(cache.items) == ["second", "third"]
+    assert sorted(os.listdir(tmp_path)) == ["second.pickle", "third.pickle"]
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_reference_cache_max_stale(tmp_path):
+    cache = ReferenceCache(path=str(tmp_path), max_stale=60)
+    count_calls = 0
+
+    async def fetch():
+        nonlocal count_calls
+        count_calls += 1
+        return {"version": count_calls}
+
+    await cache.get_or_fetch("key", fetch, ttl=60)
+    # Копия устарела больше чем на max_stale: она не отдаётся, данные запрашиваются сразу
+    fetched_at, value = cache.items["key"]
+    cache.items["key"] = (fetched_at - 121, value)
+    assert await cache.get_or_fetch("key", fetch, ttl=60) == {"version": 2}
+    assert not cache.refresh_tasks
+
+    async def fetch_failed():
+        return None
+
+    cache.items["key"] = (time.time() - 121, cache.items["key"][1])
+    os.remove(cache.file_path("key"))
+    assert await cache.get_or_fetch("key", fetch_failed, ttl=60) is None
+    assert "key" not in cache.items
@@ -0,0 +1,42 @@
+import time
+
+import pytest
+
+from core.project.services.requesters.fetcher import FetchResponse
+from core.project.services.requesters.response_cache import LRUBytesCache, ResponseCache
+from core.project.utils import time_of_completion
+
+
+def test_lru_bytes_cache_eviction():
+    cache = LRUBytesCache(max_bytes=10)
+    expires_at = time.time() + 60
+    cache.set("first", b"1234", expires_at)
+    cache.set("second", b"1234", expires_at)
+    assert cache.get("first") == b"1234"
+    # Вытесняется давно не использованное значение
+    cache.set("third", b"1234", expires_at)
+    assert cache.get("second") is None
+    assert cache.get("first") == b"1234"
+    assert cache.size == 8
+    # Значение больше бюджета не сохраняется
+    cache.set("big", b"12345678901", expires_at)
+    assert cache.get("big") is None
+
+
+def test_lru_bytes_cache_expiration():
+    cache = LRUBytesCache(max_bytes=10)
+    cache.set("key", b"1234", time.time() - 1)
+    assert cache.get("key") is None
+    assert cache.size == 0
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_response_cache():
+    cache = ResponseCache(max_bytes=1024 * 1024)
+    response = FetchResponse(response_code=200)
+    await cache.set("key", response, ttl=60)
+    cached_response = await cache.get("key")
+    assert cached_response == response
+    assert cached_response is not response
+    assert await cache.get("other_key") is None
@@ -1,8 +1,25 @@
+import base64
+import json
+
 import pytest
+from asyncio import Semaphore
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from aiohttp import web
+from aiohttp.streams import EmptyStreamReader
+from aiohttp.test_utils import make_mocked_request
 
+from core.apps.basic.request_urls.wildberries import URL_REALIZATION_SALES_REPORT
+from core.apps.basic.services.database_workers.sales import SalesDBHandler
 from core.apps.basic.services.handlers.sales import SalesHandler, SalesReportHandler
+from core.apps.basic.services.requesters.sales import SalesReportRequester
+from core.apps.basic.types import WBSales, WBSalesReportItem
+from core.apps.basic.views.sales import SalesView
 from core.project.conf import settings
+from core.project.services import database_workers
+from core.project.services.database_workers import query as query_module
+from core.project.services.database_workers.query import Query
+from core.project.types import ParamsView
 from core.project.utils import time_of_completion
 
 
@@ -38,6 +55,264 @@ async def test_positive_import_sales_report(app, body_request_import_orders) ->
     await runner.cleanup()
 
 
+@pytest.mark.asyncio
+@time_of_completion
+async def test_append_sales_rewrites_changed(app) -> None:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    pool = app[settings.DEFAULT_DATABASE]
+    await pool.execute("TRUNCATE sales, settings;")
+    db_handler = SalesDBHandler(pool=pool, params=ParamsView(company_id=1, marketplace_id=1))
+
+    def sales(last_change_date: str) -> list[WBSales]:
+        return [
+            WBSales.model_construct(saleID=sale_id, gNumber="g1", srid=f"r{sale_id}", lastChangeDate=last_change_date)
+            for sale_id in ("S1", "S2")
+        ]
+
+    await db_handler.append(sales("2024-01-01T10:00:00"))
+    saved = {record["id_mp"]: record["xmin"] for record in await pool.fetch("SELECT id_mp, xmin::text FROM sales")}
+
+    # Повторно полученная продажа с изменениями перезаписывается, без изменений - нет
+    changed = sales("2024-01-01T10:00:00")
+    changed[0].lastChangeDate = "2024-01-02T10:00:00"
+    await db_handler.append(changed)
+    records = {record["id_mp"]: record["xmin"] for record in await pool.fetch("SELECT id_mp, xmin::text FROM sales")}
+    assert records.keys() == saved.keys()
+    assert [id_mp for id_mp in records if records[id_mp] != saved[id_mp]] == ["S1"]
+    result = await db_handler.changed_from(datetime(2024, 1, 2))
+    assert [item["saleID"] for item in result] == ["S1"]
+    await pool.execute("TRUNCATE sales, settings;")
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_sales_report_pages_by_rrdid(monkeypatch, body_request_import_orders) -> None:
+    monkeypatch.setattr(settings, "SALES_REPORT_PAGE_SIZE", 3)
+    rows = [WBSalesReportItem.model_construct(rrd_id=rrd_id) for rrd_id in range(1, 8)]
+    requested_rrdid = []
+
+    async def stream_fetch(self, url_schema, params=None, batch_size=None):
+        requested_rrdid.append(params["rrdid"])
+        page = [row for row in rows if row.rrd_id > params["rrdid"]][: params["limit"]]
+        for start in range(0, len(page), 2):
+            yield page[start : start + 2]
+
+    monkeypatch.setattr(SalesReportRequester, "stream_fetch", stream_fetch)
+    requester = SalesReportRequester(
+        app=None,
+        semaphore=Semaphore(4),
+        session=None,
+        request_body=body_request_import_orders,
+        url_schema=URL_REALIZATION_SALES_REPORT,
+    )
+    now = datetime.now()
+    result = [row.rrd_id async for batch in requester.iter_fetch(now - timedelta(days=30), now, 2) for row in batch]
+    assert result == [3, 4, 5, 6, 7]
+    assert requested_rrdid == [2, 5]
+
+
+def test_sales_filter_by_json_data_keys() -> None:
+    params = ParamsView(
+        company_id=1,
+        marketplace_id=1,
+        filter={
+            "json_data.nmId": ["123", "456"],
+            "json_data.supplierArticle": "it's",
+            "json_data.totalPrice_gte": "10",
+        },
+    )
+    db_handler = SalesDBHandler(pool=None, params=params)
+    query = Query(args=[1, 1])
+    condition = db_handler.prepare_sql_filter(query)
+    assert "(json_data @> $3::jsonb OR json_data @> $4::jsonb OR json_data @> $5::jsonb" in condition
+    assert "(json_data->>'totalPrice')::numeric>=$8" in condition
+    assert query.args[2:] == ['{"nmId": "123"}', '{"nmId": 123}', '{"nmId": "456"}', '{"nmId": 456}'] + [
+        '{"supplierArticle": "it\'s"}',
+        "10",
+    ]
+
+    db_handler.params.filter = {"json_data.nmId') OR (1=1": "1"}
+    with pytest.raises(ValueError):
+        db_handler.prepare_sql_filter(Query())
+
+
+def test_sales_filter_conditions() -> None:
+    params = ParamsView(
+        company_id=1,
+        marketplace_id=1,
+        filter={
+            "created_at_gt": "2024-01-01",
+            "created_at_lt": "2024-02-01",
+            "json_data.totalPrice_gt": "10",
+            "json_data.totalPrice_lte": "20",
+            "company_id": "1",
+        },
+    )
+    query = Query(args=[1, 1])
+    condition = SalesDBHandler(pool=None, params=params).prepare_sql_filter(query)
+    assert condition == (
+        " AND created_at>$3 AND created_at<$4"
+        " AND (json_data->>'totalPrice')::numeric>$5 AND (json_data->>'totalPrice')::numeric<=$6"
+        " AND company_id=$7"
+    )
+    assert query.args[2:] == ["2024-01-01", "2024-02-01", "10", "20", "1"]
+
+
+def test_sales_page_by_keyset() -> None:
+    cursor = base64.b64encode(json.dumps({"srid": "abc", "id_mp": "S1"}).encode()).decode()
+    params = ParamsView(
+        company_id=1, marketplace_id=1, first=50, after=cursor, sorting_fields=["srid ASC"], filter={"gnumber": "g1"}
+    )
+    query = SalesDBHandler(pool=None, params=params).build_select()
+    assert query.sql == (
+        "SELECT * FROM sales WHERE company_id=$1 AND marketplace_id=$2 AND gnumber=$3"
+        " AND (srid, id_mp) > ($4, $5) ORDER BY srid ASC, id_mp ASC LIMIT $6"
+    )
+    assert query.args == [1, 1, "g1", "abc", "S1", 50]
+    assert not query.reverse
+
+    # Ключевое поле сортируется в направлении последнего поля сортировки
+    params = ParamsView(company_id=1, marketplace_id=1, last=50, before=cursor, sorting_fields=["srid DESC"])
+    query = SalesDBHandler(pool=None, params=params).build_select()
+    assert query.sql == (
+        "SELECT * FROM sales WHERE company_id=$1 AND marketplace_id=$2"
+        " AND (srid, id_mp) > ($3, $4) ORDER BY srid ASC, id_mp ASC LIMIT $5"
+    )
+
+    # Предыдущая страница при разных направлениях сортировки
+    params = ParamsView(
+        company_id=1, marketplace_id=1, last=50, before=cursor, sorting_fields=["srid DESC", "id_mp ASC"]
+    )
+    query = SalesDBHandler(pool=None, params=params).build_select()
+    assert query.sql == (
+        "SELECT * FROM sales WHERE company_id=$1 AND marketplace_id=$2"
+        " AND ((srid > $3) OR (srid = $3 AND id_mp < $4)) ORDER BY srid ASC, id_mp DESC LIMIT $5"
+    )
+    assert query.reverse
+
+    # Тот же запрос для другой страницы отличается только параметрами
+    other_cursor = base64.b64encode(json.dumps({"srid": "xyz", "id_mp": "S9"}).encode()).decode()
+    params.before = other_cursor
+    assert SalesDBHandler(pool=None, params=params).build_select().sql == query.sql
+
+
+def test_sales_page_by_keyset_nullable() -> None:
+    def cursor(created_at) -> str:
+        return base64.b64encode(json.dumps({"created_at": created_at, "id_mp": "S1"}).encode()).decode()
+
+    def build_select(created_at, direction):
+        params = ParamsView(
+            company_id=1,
+            marketplace_id=1,
+            first=50,
+            after=cursor(created_at),
+            sorting_fields=[f"created_at {direction}"],
+        )
+        return SalesDBHandler(pool=None, params=params).build_select()
+
+    # Поле допускает NULL: строки с NULL идут после всех значений и не теряются сравнением кортежей
+    query = build_select("2024-01-01", "ASC")
+    assert query.sql == (
+        "SELECT * FROM sales WHERE company_id=$1 AND marketplace_id=$2"
+        " AND (((created_at > $3 OR created_at IS NULL)) OR (created_at = $3 AND id_mp > $4))"
+        " ORDER BY created_at ASC, id_mp ASC LIMIT $5"
+    )
+    assert query.args == [1, 1, "2024-01-01", "S1", 50]
+
+    query = build_select(None, "ASC")
+    assert query.sql == (
+        "SELECT * FROM sales WHERE company_id=$1 AND marketplace_id=$2"
+        " AND ((created_at IS NULL AND id_mp > $3)) ORDER BY created_at ASC, id_mp ASC LIMIT $4"
+    )
+    assert query.args == [1, 1, "S1", 50]
+
+    # При убывании строки с NULL идут первыми
+    query = build_select(None, "DESC")
+    assert query.sql == (
+        "SELECT * FROM sales WHERE company_id=$1 AND marketplace_id=$2"
+        " AND ((created_at IS NOT NULL) OR (created_at IS NULL AND id_mp < $3))"
+        " ORDER BY created_at DESC, id_mp DESC LIMIT $4"
+    )
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_sales_total_count_strategies(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "COUNT_STRATEGY", "exact")
+    monkeypatch.setattr(settings, "COUNT_ESTIMATE_THRESHOLD", 1000)
+    monkeypatch.setattr(query_module, "COUNTS", {})
+    executed = []
+    estimate = 5000
+
+    async def execute_query(connection, query, method="fetch"):
+        executed.append(query.sql)
+        if query.sql.startswith("EXPLAIN"):
+            return [{"Plan": {"Plan Rows": estimate}}]
+        if query.sql.startswith("SELECT page.*"):
+            return [{"id_mp": "S1", "total_count": 12}, {"id_mp": "S2", "total_count": 12}]
+        return 7
+
+    class Pool:
+        @asynccontextmanager
+        async def acquire(self):
+            yield None
+
+    monkeypatch.setattr(database_workers, "execute_query", execute_query)
+
+    def handler(**params) -> SalesDBHandler:
+        return SalesDBHandler(pool=Pool(), params=ParamsView(company_id=1, marketplace_id=1, **params))
+
+    # Точное количество по тому же фильтру берётся из кеша
+    assert await handler(filter={"gnumber": "g1"}).total_count() == 7
+    assert await handler(filter={"gnumber": "g1"}).total_count() == 7
+    assert await handler(filter={"gnumber": "g2"}).total_count() == 7
+    assert (
+        executed
+        == [
+            "SELECT COUNT(*) FROM sales WHERE company_id=$1 AND marketplace_id=$2 AND gnumber=$3",
+        ]
+        * 2
+    )
+
+    # Большая выборка не подсчитывается, для небольшой оценка уточняется
+    executed.clear()
+    assert await handler(count="estimated", filter={"gnumber": "g3"}).total_count() == 5000
+    assert executed == [
+        "EXPLAIN (FORMAT JSON) SELECT 1 FROM sales WHERE company_id=$1 AND marketplace_id=$2 AND gnumber=$3"
+    ]
+    estimate = 10
+    assert await handler(count="estimated", filter={"gnumber": "g3"}).total_count() == 7
+    assert len(executed) == 3
+
+    # Количество приходит вместе со страницей
+    executed.clear()
+    db_handler = handler(count="combined", first=2, filter={"gnumber": "g1"})
+    assert [record["id_mp"] for record in await db_handler.select_all_records()] == ["S1", "S2"]
+    assert await db_handler.total_count() == 12
+    assert executed == [
+        "SELECT page.*, (SELECT COUNT(*) FROM sales WHERE company_id=$1 AND marketplace_id=$2 AND gnumber=$3)"
+        " AS total_count FROM (SELECT * FROM sales WHERE company_id=$1 AND marketplace_id=$2 AND gnumber=$3"
+        " ORDER BY id_mp ASC LIMIT $4) AS page ORDER BY id_mp ASC"
+    ]
+
+    with pytest.raises(ValueError):
+        await handler(count="approximate").total_count()
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_sales_view_invalid_count() -> None:
+    request = make_mocked_request(
+        "GET", "/sales?count=approximate", app=web.Application(), payload=EmptyStreamReader()
+    )
+    response = await SalesView(request).get()
+    assert response.status == 400
+    errors = json.loads(response.body)["errors"]
+    assert len(errors) == 1 and "approximate" in errors[0]
+
+
 # NOTE: тесты на view неактуальны, тк не api МС используется
 
 # @pytest.mark.skip("Не работает с остальными")
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from core.project.services.requesters.single_flight import SingleFlight
+from core.project.utils import time_of_completion
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_single_flight_coalescing():
+    single_flight = SingleFlight(window=0)
+    count_calls = 0
+
+    async def fetch():
+        nonlocal count_calls
+        count_calls += 1
+        await asyncio.sleep(0.05)
+        return {"data": [1, 2, 3]}
+
+    results = await asyncio.gather(*(single_flight.do("key", fetch) for _ in range(5)))
+    assert count_calls == 1
+    assert all(result == {"data": [1, 2, 3]} for result in results)
+    # Результат общий для всех вызывающих, без копирования
+    assert all(result is results[0] for result in results)
+
+    await single_flight.do("other_key", fetch)
+    assert count_calls == 2
+    assert not single_flight.calls
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_single_flight_window():
+    single_flight = SingleFlight(window=60)
+    count_calls = 0
+
+    async def fetch():
+        nonlocal count_calls
+        count_calls += 1
+        return count_calls
+
+    assert await single_flight.do("key", fetch) == 1
+    assert await single_flight.do("key", fetch) == 1
+
+    # Неуспешный результат не сохраняется
+    assert await single_flight.do("error_key", fetch, is_success=lambda result: False) == 2
+    assert await single_flight.do("error_key", fetch, is_success=lambda result: False) == 3
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_single_flight_fresh_result():
+    single_flight = SingleFlight(window=60)
+    count_calls = 0
+
+    async def fetch():
+        nonlocal count_calls
+        count_calls += 1
+        await asyncio.sleep(0.05)
+        return count_calls
+
+    assert await single_flight.do("key", fetch) == 1
+    # Без кеша сохранённый результат не отдаётся
+    assert await single_flight.do("key", fetch, reuse_result=False) == 2
+    # Выполняющийся запрос объединяется и для вызовов без кеша
+    results = await asyncio.gather(*(single_flight.do("key", fetch, reuse_result=False) for _ in range(3)))
+    assert results == [3, 3, 3]
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_single_flight_cancel_waiter():
+    single_flight = SingleFlight(window=0)
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    first = asyncio.create_task(single_flight.do("key", fetch))
+    second = asyncio.create_task(single_flight.do("key", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "result"
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_single_flight_evicts_expired():
+    single_flight = SingleFlight(window=0.05)
+
+    async def fetch():
+        return "result"
+
+    for index in range(1000):
+        await single_flight.do(f"key_{index}", fetch)
+    assert len(single_flight.results) == 1000
+    # Результаты удаляются по истечении window без повторных запросов по тем же ключам
+    await asyncio.sleep(0.1)
+    assert not single_flight.results
@@ -1,6 +1,16 @@
+import asyncio
+from asyncio import Semaphore
+
 import pytest
 
 from core.apps.basic.services.handlers import CommonHandler
+from core.apps.basic.services.requesters.stocks import StockRequester
+from core.apps.basic.types import WBResponseWarehouseStock, WBStock
+from core.apps.constants import COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS, COUNT_ITEMS_ONE_ITERATION_STOCKS
+from core.project.conf import settings
+from core.project.services.requesters.fetcher import FetchResponse
+from core.project.types import MsgSendStartEventInMSMarketplace
+from core.project.utils import time_of_completion
 
 
 @pytest.mark.asyncio
@@ -26,3 +36,79 @@ async def test_positive_export_stock(running_app, body_request_export_stock) ->
     result = await handler.export_stock()
     assert isinstance(result.data, bool) and result.data is True
     assert len(result.errors) == 0
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_stock_requester_chunks_skus_per_warehouse(monkeypatch) -> None:
+    requested = []
+
+    async def fetch(url_schema, params):
+        requested.append((url_schema.url, len(params["skus"])))
+        return FetchResponse.model_construct(
+            fetch_errors=[],
+            fetch_result=WBResponseWarehouseStock(stocks=[WBStock(sku=sku, amount=1) for sku in params["skus"]]),
+        )
+
+    requester = StockRequester(app=None, session=None, semaphore=Semaphore(4), request_body=None)
+    monkeypatch.setattr(
+        requester,
+        "_prepare_task_for_single_request",
+        lambda url_schema, params: asyncio.create_task(fetch(url_schema, params)),
+    )
+    barcodes = [str(sku) for sku in range(COUNT_ITEMS_ONE_ITERATION_STOCKS * 2 + 1)]
+    result = await requester.fetch(warehouse_ids=[1, 2], barcodes=barcodes)
+
+    assert len(requested) == 6
+    assert max(count for _, count in requested) == COUNT_ITEMS_ONE_ITERATION_STOCKS
+    assert len(result) == len(barcodes) * 2
+    assert {stock.warehouse_id for stock in result} == {1, 2}
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_stock_export_sends_only_changed(monkeypatch) -> None:
+    count_items = COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS * 2 + 10
+    snapshot = {str(sku): sku for sku in range(count_items)}
+
+    class FakeStockSnapshotDBHandler:
+        saved = []
+        max_age = None
+
+        async def amounts(self, warehouse_id, skus, max_age):
+            self.max_age = max_age
+            return {sku: snapshot[sku] for sku in skus if sku in snapshot}
+
+        async def save(self, warehouse_id, stocks):
+            self.saved.extend(stocks)
+
+    db_handler = FakeStockSnapshotDBHandler()
+    requested = []
+
+    async def fetch(url_schema, params):
+        requested.append(params["stocks"])
+        # Вторая часть отклонена, её остатки в снимок не попадают
+        code = 409 if len(requested) == 2 else 204
+        errors = [{"code": code}] if code != 204 else []
+        return FetchResponse.model_construct(fetch_errors=errors, response_code=code)
+
+    monkeypatch.setattr(StockRequester, "stock_snapshot_db_handler", property(lambda self: db_handler))
+    # Изменились остатки чётных SKU, остальные совпадают со снимком
+    skus = list(snapshot)[: COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS * 2 + 2]
+    stocks = [{"sku": sku, "amount": snapshot[sku] + (1 if int(sku) % 2 == 0 else 0)} for sku in skus]
+    request_body = MsgSendStartEventInMSMarketplace.model_construct(
+        company_id=1, marketplace_id=1, add_info=None, data={"warehouse_id": 7, "stocks": {"stocks": stocks}}
+    )
+    requester = StockRequester(app=None, session=None, semaphore=Semaphore(4), request_body=request_body)
+    monkeypatch.setattr(
+        requester,
+        "_prepare_task_for_single_request",
+        lambda url_schema, params: asyncio.create_task(fetch(url_schema, params)),
+    )
+
+    assert await requester.export() is False
+    assert db_handler.max_age == settings.STOCK_SNAPSHOT_TTL
+    changed = COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS + 1
+    assert [len(batch) for batch in requested] == [COUNT_ITEMS_ONE_ITERATION_EXPORT_STOCKS, 1]
+    assert all(int(item["sku"]) % 2 == 0 for batch in requested for item in batch)
+    assert len(db_handler.saved) == changed - len(requested[1])
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from core.project.services.requesters.upload_poller import UploadPoller, UploadStatusUnknown
+from core.project.utils import time_of_completion
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_upload_poller_checks_concurrently():
+    poller = UploadPoller(interval=0.05, max_interval=0.1, timeout=5)
+    count_checks = {}
+
+    def make_check(upload_id: int, count_pending: int):
+        async def check():
+            count_checks[upload_id] = count_checks.get(upload_id, 0) + 1
+            await asyncio.sleep(0.02)
+            return None if count_checks[upload_id] <= count_pending else upload_id
+
+        return check
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(poller.wait(str(upload_id), make_check(upload_id, 2)) for upload_id in range(20)))
+    assert results == list(range(20))
+    assert all(count == 3 for count in count_checks.values())
+    # Загрузки опрашиваются одновременно, а не друг за другом
+    assert time.monotonic() - started < 1
+    assert not poller.pending
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_upload_poller_deadline():
+    poller = UploadPoller(interval=0.01, max_interval=0.02, timeout=0.1)
+
+    async def check():
+        return None
+
+    with pytest.raises(asyncio.TimeoutError):
+        await poller.wait("upload", check)
+    assert not poller.pending
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_upload_poller_hanging_check():
+    poller = UploadPoller(interval=0.01, max_interval=0.02, timeout=0.2)
+    count_checks = {"fast": 0}
+
+    async def hanging_check():
+        await asyncio.sleep(60)
+
+    async def fast_check():
+        count_checks["fast"] += 1
+        return None if count_checks["fast"] < 3 else "done"
+
+    started = time.monotonic()
+    results = await asyncio.gather(
+        poller.wait("hanging", hanging_check), poller.wait("fast", fast_check), return_exceptions=True
+    )
+    assert isinstance(results[0], asyncio.TimeoutError)
+    assert results[1] == "done"
+    # Зависшая проверка прерывается по сроку загрузки
+    assert time.monotonic() - started < 1
+    assert not poller.pending
+
+
+@pytest.mark.asyncio
+@time_of_completion
+async def test_upload_poller_unknown_status():
+    poller = UploadPoller(interval=0.01, max_interval=0.02, timeout=5)
+
+    async def check():
+        raise UploadStatusUnknown("upload")
+
+    with pytest.raises(UploadStatusUnknown):
+        await poller.wait("upload", check)
+    assert not poller.pending
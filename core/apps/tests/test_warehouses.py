@@ -1,7 +1,9 @@
 import pytest
 
+from core.apps.basic.services.database_workers.warehouses import WarehouseDBHandler
 from core.apps.basic.services.handlers import CommonHandler
-
+from core.apps.basic.types import WBResponseWarehouse
+from core.project.types import ParamsView
 from core.project.utils import time_of_completion
 
 
@@ -14,6 +16,16 @@ async def test_positive_import_warehouses(running_app, body_request_import_wareh
     assert len(result.errors) == 0
 
 
+def test_distribution_warehouses_by_saved_keys() -> None:
+    db_handler = WarehouseDBHandler(pool=None, params=ParamsView(company_id=1, marketplace_id=1))
+    warehouses = [WBResponseWarehouse.model_construct(officeId=office_id) for office_id in range(5)]
+    # В базе id_mp хранится строкой, у склада officeId - число
+    saved = {db_handler.record_key({"id_mp": str(office_id)}) for office_id in (1, 3)}
+    list_for_insert, list_for_update = db_handler.distribution_to_insert_and_update_lists(saved, warehouses)
+    assert [item.officeId for item in list_for_insert] == [0, 2, 4]
+    assert [item.officeId for item in list_for_update] == [1, 3]
+
+
 # NOTE: тесты на view неактуальны, тк не api МС используется
 
 # @pytest.mark.skip("Не работает с остальными")
@@ -1,3 +1,4 @@
+import re
 from datetime import datetime, timezone
 
 from aiohttp import web_exceptions
@@ -65,6 +66,12 @@ AIOHTTP_EXCEPTIONS = {
     511: web_exceptions.HTTPNetworkAuthenticationRequired,
 }
 CONDITION_PREFIX = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+# Префикс фильтра по ключу json_data, например ?json_data.nmId=123
+JSON_FILTER_PREFIX = "json_data."
+JSON_FILTER_KEY = re.compile(r"\w+")
+# Имя поля таблицы в фильтрах и сортировке запроса
+SQL_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+REVERSE_DIRECTION = {"ASC": "DESC", "DESC": "ASC"}
 
 SECONDS_IN_MINUTE = 60
 SECONDS_IN_HOUR = SECONDS_IN_MINUTE * 60
@@ -3,6 +3,7 @@ from aiohttp.web_app import Application
 from asyncpg.pool import Pool
 
 from core.project.conf import settings
+from core.project.utils import set_connection_json_types_codecs
 
 
 async def create_database_pool(app: Application):
@@ -17,6 +18,7 @@ async def create_database_pool(app: Application):
         user=database.get("user"),
         database=database.get("database"),
         password=database.get("password"),
+        init=set_connection_json_types_codecs,
     )
 
     app[settings.DEFAULT_DATABASE] = pool
@@ -44,6 +46,7 @@ async def create_test_database_pool(app: Application):
         user=database.get("user"),
         database=database.get("database"),
         password=database.get("password"),
+        init=set_connection_json_types_codecs,
     )
 
     app[settings.DEFAULT_DATABASE] = pool
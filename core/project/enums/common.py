@@ -8,6 +8,10 @@ class SettingsInDataBase(Enum):
     LAST_FETCH_STATISTICS = "LAST_FETCH_STATISTICS"
     LAST_FETCH_ORDERS = "LAST_FETCH_ORDERS"
     LAST_FETCH_SALES = "LAST_FETCH_SALES"
+    LAST_FETCH_SALES_REPORT = "LAST_FETCH_SALES_REPORT"
+    WATERMARK_FBO_ORDERS = "WATERMARK_FBO_ORDERS"
+    WATERMARK_SALES = "WATERMARK_SALES"
+    CURSOR_NOMENCLATURE = "CURSOR_NOMENCLATURE"
 
 
 class TypeStatusResponse(Enum):
@@ -55,6 +59,15 @@ class TypeMsg(ChoiceEnum):
     TASK = "task"
 
 
+class CountStrategy(ChoiceEnum):
+    # Точный COUNT(*), кешируется по фильтру на COUNT_CACHE_TTL секунд
+    EXACT = "exact"
+    # Оценка планировщика, точный подсчёт только для выборок меньше COUNT_ESTIMATE_THRESHOLD
+    ESTIMATED = "estimated"
+    # Количество считается подзапросом в запросе страницы
+    COMBINED = "combined"
+
+
 class CodeNotification(ChoiceEnum):
     ERROR = "notifications.import.error"
     STARTED = "notifications.import.started"
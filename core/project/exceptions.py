@@ -15,3 +15,7 @@ class RequestException(Exception):
 class TooManyRetries(Exception):
     def __str__(self):
         return "Превышено количество допустимых попыток запроса"
+
+
+class InvalidParams(Exception):
+    """Недопустимые параметры запроса к представлению"""
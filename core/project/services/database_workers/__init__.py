@@ -3,9 +3,9 @@ import datetime
 import json
 import traceback
 
-from asyncpg import Pool, Connection
+from asyncpg import Pool, Connection, Record
 from dataclasses import dataclass, field
-from typing import Callable, Any, Collection, Optional
+from typing import Callable, Any, Collection, Hashable, Optional
 
 from icecream import ic
 
@@ -15,10 +15,25 @@ from core.apps.basic.sql_commands import (
     INSERT_SETTING,
 )
 from core.apps.basic.types import WBFBSOrder, WBFBOOrder
-from core.apps.constants import get_postgresql_value
-from core.project.constants import FORMAT_DATE, CONDITION_PREFIX
+from core.project.constants import (
+    FORMAT_DATE,
+    CONDITION_PREFIX,
+    JSON_FILTER_PREFIX,
+    JSON_FILTER_KEY,
+    REVERSE_DIRECTION,
+    SQL_IDENTIFIER,
+)
+from core.project.enums.common import CountStrategy
+from core.project.services.database_workers.query import (
+    Query,
+    execute_query,
+    get_cached_count,
+    json_filter_values,
+    set_cached_count,
+    to_number,
+)
 from core.project.types import ParamsView
-from core.project.utils import serialize
+from core.project.utils import deserialize, serialize
 
 
 @dataclass
@@ -85,6 +100,14 @@ class DBHandler(CommonDBHandler):
     sql_insert: str
     sql_update: str
     table: str
+    # Уникальное поле, которым дополняется сортировка страниц (keyset-пагинация)
+    key_field: str = "id"
+    # Поля сортировки с ограничением NOT NULL (кроме ключевого): по ним страницы сравниваются кортежем
+    not_null_fields: frozenset[str] = frozenset()
+    # Количество ключей, получаемых курсором за раз при сравнении с базой
+    prefetch_for_comparison: int = 10_000
+    # Количество строк, полученное вместе со страницей (стратегия combined)
+    combined_count: Optional[int] = None
 
     async def _reg_fetch(self, connection: Connection):
         """
@@ -98,143 +121,206 @@ class DBHandler(CommonDBHandler):
         return self.prepare_records_for_response(records)
 
     async def for_platform(self):
-        return self.all()
+        return await self.all()
 
     def unpacking_params_cursor(self) -> dict:
         cursor = self.params.after or self.params.before
         if not cursor:
-            return {"id": 0}
+            return {}
         try:
             result = json.loads(base64.b64decode(cursor).decode())
-        except TypeError:
-            result = {"id": 0}
-        return result
-
-    @staticmethod
-    def get_sort_field_operation(sort_field_direction, before, after):
-        operation = "<"
-        sort_field_direction = sort_field_direction.lower()
-        if sort_field_direction == "asc" and before:
-            operation = "<"
-        elif sort_field_direction == "asc" and after:
-            operation = ">"
-        elif sort_field_direction != "asc" and before:
-            operation = ">"
-        elif sort_field_direction != "asc" and after:
-            operation = "<"
-        return operation
-
-    def prepare_condition_cursor(self, sort_fields, cursor, cursor_sort_direction, expression, after, before):
-        if sort_fields:
-            sort_field_variable, sort_field_direction = sort_fields.pop().split()
-            sort_field_direction = sort_field_direction.lower()
-
-            operation = self.get_sort_field_operation(sort_field_direction, before, after)
-
-            sort_field_value = get_postgresql_value(value=cursor.get(sort_field_variable))
-
-            expression += f"{sort_field_variable} {operation} {sort_field_value}"
-
-            if not sort_fields:
-                cursor_value = cursor.get("id", "(NULL, NULL)")
-                cursor_field = "(id, marketplace_id)"
-                cursor_operation = self.get_sort_field_operation(cursor_sort_direction, before, after)
-                next_sort = f"{cursor_field} {cursor_operation} {cursor_value}" + ")"
-            else:
-                next_sort = (
-                    self.prepare_condition_cursor(sort_fields, cursor, cursor_sort_direction, "", after, before) + ")"
-                )
-
-            expression += f" or ({sort_field_variable} = {sort_field_value} and ({next_sort})"
-
-        return expression
+        except (TypeError, ValueError):
+            raise ValueError("Недопустимый курсор страницы")
+        return result if isinstance(result, dict) else {}
 
     @property
-    def sort_directions(self):
-        cursor_sort_direction = "ASC"
+    def sort_directions(self) -> tuple[list[tuple[str, str]], str]:
+        """
+        Поля сортировки с направлениями, кроме ключевого поля, и направление ключевого поля.
+        Если ключевое поле не указано, оно сортируется в направлении последнего поля, чтобы порядок
+        оставался однонаправленным и совпадал с составным индексом
+        """
+        key_direction = None
         sorts = []
-        for x in reversed(self.params.sorting_fields):
-            sorting = x.split()
-            if sorting[0] != "id":
-                sorts.append(x)
+        for sorting in self.params.sorting_fields:
+            sort_field, *direction = sorting.split()
+            direction = "DESC" if direction and direction[0].upper() == "DESC" else "ASC"
+            if not SQL_IDENTIFIER.fullmatch(sort_field):
+                raise ValueError(f"Недопустимое поле сортировки: {sort_field}")
+            if sort_field in ("id", self.key_field):
+                key_direction = direction
             else:
-                cursor_sort_direction = sorting[1]
-        return sorts, cursor_sort_direction
+                sorts.append((sort_field, direction))
+        if key_direction is None:
+            key_direction = sorts[-1][1] if sorts else "ASC"
+        return sorts, key_direction
 
-    @property
-    def condition_cursor(self):
-        if not self.params.after and not self.params.before:
-            return ""
-
-        sorts, cursor_sort_direction = self.sort_directions
-
-        condition = ""
+    def prepare_condition_cursor(self, query: Query, order: list[tuple[str, str]]) -> str:
+        """
+        Условие keyset-пагинации: строки строго после (before - до) строки курсора в порядке сортировки.
+        NULL упорядочивается как в PostgreSQL по умолчанию: после всех значений при ASC и перед ними при DESC
+        """
         cursor = self.unpacking_params_cursor()
+        values = [cursor.get(sort_field) for sort_field, _ in order[:-1]]
+        values.append(cursor.get(self.key_field, cursor.get("id")))
+
+        def operation(direction: str) -> str:
+            return ">" if (direction == "ASC") != bool(self.params.before) else "<"
+
+        # При одном направлении сортировки по полям NOT NULL сравнение кортежей использует составной индекс
+        not_null_fields = self.not_null_fields | {self.key_field}
+        if (
+            len({direction for _, direction in order}) == 1
+            and all(sort_field in not_null_fields for sort_field, _ in order)
+            and all(value is not None for value in values)
+        ):
+            fields = ", ".join(sort_field for sort_field, _ in order)
+            placeholders = ", ".join(query.add(value) for value in values)
+            return f"({fields}) {operation(order[0][1])} ({placeholders})"
+
+        placeholders = [None if value is None else query.add(value) for value in values]
+        conditions = []
+        for index, (sort_field, direction) in enumerate(order):
+            compare = self.compare_with_nulls(
+                sort_field, operation(direction), placeholders[index], sort_field not in not_null_fields
+            )
+            if compare is None:
+                continue
+            equals = [
+                f"{field} = {placeholder}" if placeholder is not None else f"{field} IS NULL"
+                for (field, _), placeholder in zip(order[:index], placeholders)
+            ]
+            conditions.append(" AND ".join([*equals, compare]))
+        if not conditions:
+            return "FALSE"
+        return "(" + " OR ".join(f"({condition})" for condition in conditions) + ")"
 
-        return self.prepare_condition_cursor(
-            sorts, cursor, cursor_sort_direction, condition, self.params.after, self.params.before
-        )
+    @staticmethod
+    def compare_with_nulls(
+        sort_field: str, operation: str, placeholder: Optional[str], nullable: bool
+    ) -> Optional[str]:
+        """
+        Сравнение поля со значением курсора, в котором NULL больше любого значения.
+        None, если подходящих строк нет (значение курсора NULL и строки нужны после него)
+        """
+        if placeholder is None:
+            return None if operation == ">" else f"{sort_field} IS NOT NULL"
+        if operation == ">" and nullable:
+            return f"({sort_field} > {placeholder} OR {sort_field} IS NULL)"
+        return f"{sort_field} {operation} {placeholder}"
 
-    def prepare_sql_filter(self, has_after_or_before: bool = True):
+    def prepare_sql_filter(self, query: Query) -> str:
         condition = ""
-        if not self.params.filter and not (self.params.after or self.params.before):
-            return condition
-
         for key, val in (self.params.filter or {}).items():
-            operation = CONDITION_PREFIX.get(key[-3:], "=")
-            key = key if operation == "=" else key[:-4]
-
-            if isinstance(val, list):
-                t_val = "','".join(val)
-                condition_expression = f"{key} in ('{t_val}')"
+            # Суффикс условия отделяется последним подчёркиванием: created_at_gte, json_data.nmId_lt
+            field_name, _, suffix = key.rpartition("_")
+            operation = CONDITION_PREFIX.get(suffix, "=")
+            key = key if operation == "=" else field_name
+
+            if key.startswith(JSON_FILTER_PREFIX):
+                condition_expression = self.prepare_json_filter(
+                    query, key.removeprefix(JSON_FILTER_PREFIX), operation, val
+                )
+            elif not SQL_IDENTIFIER.fullmatch(key):
+                raise ValueError(f"Недопустимое поле фильтра: {key}")
+            elif isinstance(val, list):
+                condition_expression = f"{key} = ANY({query.add(val)})"
             else:
-                condition_expression = f"{key}{operation}'{val}'"
+                condition_expression = f"{key}{operation}{query.add(val)}"
 
             condition += f" AND {condition_expression}"
 
-        if has_after_or_before and (self.params.after or self.params.before):
-            condition += f" AND ({self.condition_cursor})"
-
         return condition
 
-    def prepare_sql_sorting(self):
-        sorting_fields = self.params.sorting_fields.copy()
-        sorting_expression = ", ".join(sorting_fields) or "(1)"
-
-        row_number_direction = "ASC" if self.params.first else "DESC"
-        natural_sort = f"ROW_NUMBER() OVER (ORDER BY {sorting_expression}) {row_number_direction}"
-
-        if natural_sort:
-            sorting_fields.insert(0, natural_sort)
-
-        return sorting_fields
+    @staticmethod
+    def prepare_json_filter(query: Query, path: str, operation: str, val: str | list[str]) -> str:
+        """
+        Условие по ключу json_data, путь к вложенным ключам через точку (json_data.stocks.stocksMp).
+        Равенство проверяется вхождением (@>), которое использует GIN-индекс по json_data
+        """
+        keys = path.split(".")
+        if not all(JSON_FILTER_KEY.fullmatch(key) for key in keys):
+            raise ValueError(f"Недопустимый ключ фильтра json_data: {path}")
+
+        if operation == "=":
+            documents = []
+            for value in val if isinstance(val, list) else [val]:
+                # Из строки запроса значение приходит строкой, в json_data оно может быть числом
+                for json_value in json_filter_values(value):
+                    document = json_value
+                    for key in reversed(keys):
+                        document = {key: document}
+                    documents.append(f"json_data @> {query.add(json.dumps(document))}::jsonb")
+            return f"({' OR '.join(documents)})"
+
+        expression = "json_data" + "".join(f"->'{key}'" for key in keys[:-1]) + f"->>'{keys[-1]}'"
+        if to_number(val) is not None:
+            return f"({expression})::numeric{operation}{query.add(val)}"
+        return f"{expression}{operation}{query.add(val)}"
+
+    def build_select(self) -> Query:
+        """
+        Запрос страницы. Значения фильтров и курсора передаются параметрами, поэтому запрос
+        подготавливается один раз и переиспользуется. Страница выбирается по курсору и индексу
+        (sort_field, key_field) без сортировки всех строк продавца
+        """
+        query = Query(args=[self.params.company_id, self.params.marketplace_id])
+        sorts, key_direction = self.sort_directions
+        order = [*sorts, (self.key_field, key_direction)]
+        # Страница перед курсором (before) или последние строки (last) выбираются в обратном порядке
+        query.reverse = bool(
+            self.params.before or (self.params.last and not self.params.first and not self.params.after)
+        )
 
-    def sql_select_with_params(self, sql_select: str = None, aggregate: bool = False, limit: bool = True):
-        condition = self.prepare_sql_filter(has_after_or_before=limit)
-        limit_params = ""
+        query.condition = self.prepare_sql_filter(query)
+        condition = query.condition
+        if self.params.after or self.params.before:
+            condition += f" AND {self.prepare_condition_cursor(query, order)}"
+        query.order = ", ".join(
+            f"{sort_field} {REVERSE_DIRECTION[direction] if query.reverse else direction}"
+            for sort_field, direction in order
+        )
+        query.sql = f"{self.sql_select.strip().rstrip(';')}{condition} ORDER BY {query.order}"
+        limit = self.params.first or self.params.last
         if limit:
-            limit_params = self.params.first or self.params.last
-            limit_params = f"LIMIT {limit_params}" if limit_params else ""
-
-        sql_sorting = self.prepare_sql_sorting()
-        sorting = f"ORDER BY {', '.join(sql_sorting)}" if not aggregate and sql_sorting else ""
-        sql_select = self.sql_select.strip(";") if not sql_select else sql_select.strip(";")
-        return f"{sql_select} {condition} {sorting} {limit_params}".strip()
+            query.sql += f" LIMIT {query.add(limit)}"
+        return query
 
     async def select_all_records(self) -> list:
         records = []
         async with self.pool.acquire() as connection:
             try:
-                records = await connection.fetch(
-                    self.sql_select_with_params(),
-                    self.params.company_id,
-                    self.params.marketplace_id,
-                )
+                query = self.build_select()
+                combined = self.count_strategy is CountStrategy.COMBINED
+                if combined:
+                    # Подзапрос подсчёта не зависит от строк страницы и выполняется один раз.
+                    # Порядок строк подзапроса не гарантирован во внешнем запросе, поэтому сортировка повторяется
+                    query.sql = (
+                        f"SELECT page.*, ({self.sql_count(query.condition)}) AS total_count FROM ({query.sql}) AS page"
+                        f" ORDER BY {query.order}"
+                    )
+                records = await execute_query(connection, query)
             except Exception as err:
                 ic(f"{err}\n{traceback.format_exc()}")
                 self.errors.append(str(err))
+            else:
+                if combined:
+                    records = self.pop_combined_count(records)
+                if query.reverse:
+                    records.reverse()
         return records
 
+    def pop_combined_count(self, records: list) -> list[dict]:
+        """
+        Отделяет количество строк, посчитанное в запросе страницы, от строк страницы
+        """
+        result = []
+        for record in records:
+            row = dict(record)
+            self.combined_count = row.pop("total_count")
+            result.append(row)
+        return result
+
     @staticmethod
     def prepare_records_for_response(records: list):
         result = list()
@@ -248,24 +334,91 @@ class DBHandler(CommonDBHandler):
             result.append(dict_record)
         return serialize(result)
 
+    @property
+    def count_strategy(self) -> CountStrategy:
+        from core.project.conf import settings
+
+        value = self.params.count or settings.COUNT_STRATEGY
+        try:
+            return CountStrategy(str(value).lower())
+        except ValueError:
+            raise ValueError(f"Недопустимая стратегия подсчёта: {value}")
+
+    def sql_count(self, condition: str, expression: str = "COUNT(*)") -> str:
+        return f"SELECT {expression} FROM {self.table} WHERE company_id=$1 AND marketplace_id=$2{condition}"
+
+    def build_count(self) -> Query:
+        query = Query(args=[self.params.company_id, self.params.marketplace_id])
+        query.condition = self.prepare_sql_filter(query)
+        query.sql = self.sql_count(query.condition)
+        return query
+
     async def total_count(self):
-        sql = self.sql_select_with_params(
-            f"SELECT COUNT(*) FROM {self.table} WHERE company_id=$1 AND marketplace_id=$2;",
-            aggregate=True,
-            limit=False,
-        )
-        result = await self.pool.fetchrow(
-            sql,
-            self.params.company_id,
-            self.params.marketplace_id,
-        )
+        """
+        Количество строк по фильтрам запроса. Стратегия подсчёта выбирается параметром count:
+        exact - точный COUNT(*), кешируемый по фильтру на COUNT_CACHE_TTL секунд;
+        estimated - оценка планировщика, если она не меньше COUNT_ESTIMATE_THRESHOLD, иначе точный подсчёт;
+        combined - количество, посчитанное в запросе страницы (для пустой страницы - точный подсчёт)
+        """
+        from core.project.conf import settings
+
+        strategy = self.count_strategy
+        if strategy is CountStrategy.COMBINED and self.combined_count is not None:
+            return self.combined_count
+        query = self.build_count()
+        async with self.pool.acquire() as connection:
+            if strategy is CountStrategy.ESTIMATED:
+                estimate = await self.estimate_count(connection, query)
+                if estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+                    return estimate
+            return await self.exact_count(connection, query)
+
+    async def exact_count(self, connection: Connection, query: Query) -> int:
+        from core.project.conf import settings
+
+        result = get_cached_count(query)
+        if result is None:
+            result = await execute_query(connection, query, "fetchval") or 0
+            set_cached_count(query, result, settings.COUNT_CACHE_TTL)
+        return result
+
+    async def estimate_count(self, connection: Connection, query: Query) -> int:
+        """
+        Оценка количества строк планировщиком по статистике таблицы, сами строки не читаются
+        """
+        explain = Query(args=query.args, sql=f"EXPLAIN (FORMAT JSON) {self.sql_count(query.condition, '1')}")
+        plan = await execute_query(connection, explain, "fetchval")
+        if isinstance(plan, (str, bytes)):
+            plan = deserialize(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
 
-        return dict(result).get("count", 0) if result else 0
+    @staticmethod
+    def record_key(record: Record) -> Hashable:
+        """
+        Ключ сохранённой строки для сравнения с полученными данными
+        """
+        return str(record["id_mp"])
 
-    async def get_records_for_comparison(self) -> dict[str:str]:
-        async with self.pool.acquire() as con:
-            records = await con.fetch(self.sql_select, self.params.company_id, self.params.marketplace_id)
-        return tuple(str(item["id_mp"]) for item in map(dict, records))
+    @staticmethod
+    def item_key(item: Any) -> Hashable:
+        """
+        Ключ полученного элемента, сопоставимый с record_key
+        """
+        return str(item.id_mp)
+
+    async def get_records_for_comparison(self) -> set[Hashable]:
+        """
+        Ключи сохранённых строк. Читаются курсором порциями, строки целиком не выбираются
+        """
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                cursor = connection.cursor(
+                    self.sql_select_ids,
+                    self.params.company_id,
+                    self.params.marketplace_id,
+                    prefetch=self.prefetch_for_comparison,
+                )
+                return {self.record_key(record) async for record in cursor}
 
     async def insert_or_update(self, items: Collection[Any]):
         internal_order_data = await self.get_records_for_comparison()
@@ -275,15 +428,15 @@ class DBHandler(CommonDBHandler):
         # if list_for_update:
         #     await self.update(list_for_update)
 
-    @staticmethod
     def distribution_to_insert_and_update_lists(
-        internal_id_mp_orders_data: tuple[str], external_data: Collection[WBFBSOrder | WBFBOOrder]
-    ) -> tuple[Collection[WBFBSOrder | WBFBOOrder], Collection[WBFBSOrder | WBFBOOrder]]:
+        self, internal_keys: set[Hashable], external_data: Collection[Any]
+    ) -> tuple[list[Any], list[Any]]:
         """
-        Разбиение списка заказов на множества обновления и добавления по наличию в базе
+        Разбиение списка на множества обновления и добавления по наличию ключа в базе
         """
-        list_for_insert = list(filter(lambda item: item.id_mp not in internal_id_mp_orders_data, external_data))
-        list_for_update = list(filter(lambda item: item.id_mp in internal_id_mp_orders_data, external_data))
+        list_for_insert, list_for_update = [], []
+        for item in external_data:
+            (list_for_update if self.item_key(item) in internal_keys else list_for_insert).append(item)
         return list_for_insert, list_for_update
 
     async def get_datetime_last_fetch(self):
@@ -298,3 +451,18 @@ class DBHandler(CommonDBHandler):
         params = self.params.company_id, self.params.marketplace_id
         values = tuple(item.args_for_update_row(*params) for item in items)
         await self.__insert_rows__(self._reg_fetch, self.sql_update, values)
+
+
+class WatermarkDBHandler(CommonDBHandler):
+    """
+    Отметка последнего изменения данных для инкрементальной загрузки
+    """
+
+    async def get(self, code: str) -> Optional[datetime.datetime]:
+        value = await self._select_setting(code)
+        return datetime.datetime.fromisoformat(value) if value else None
+
+    async def set(self, code: str, value: datetime.datetime):
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                await self._reg_action(connection, code, value.isoformat())
@@ -0,0 +1,123 @@
+import hashlib
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+from asyncpg import Connection
+
+# Типы параметров запросов, полученные при их подготовке. Значения фильтров передаются
+# параметрами, поэтому текстов запросов немного и они переиспользуются кешем asyncpg
+PARAMETER_TYPES: dict[str, tuple[str, ...]] = {}
+MAX_COUNT_PARAMETER_TYPES = 1000
+# Точные количества строк по хешу запроса подсчёта: время истечения и количество
+COUNTS: dict[str, tuple[float, int]] = {}
+MAX_COUNT_COUNTS = 10_000
+
+
+@dataclass
+class Query:
+    """
+    Текст запроса и значения его параметров ($1, $2, ...)
+    """
+
+    args: list[Any] = field(default_factory=list)
+    sql: str = ""
+    # Страница выбрана в обратном порядке (before, last), строки нужно развернуть
+    reverse: bool = False
+    # Условие фильтров без курсора, по нему считается количество строк
+    condition: str = ""
+    # Сортировка страницы (ORDER BY), повторяется во внешнем запросе
+    order: str = ""
+
+    def add(self, value: Any) -> str:
+        self.args.append(value)
+        return f"${len(self.args)}"
+
+
+async def execute_query(connection: Connection, query: Query, method: str = "fetch") -> Any:
+    """
+    Выполняет запрос, приводя значения из строки запроса к типам параметров, которые определил PostgreSQL
+    """
+    types = PARAMETER_TYPES.get(query.sql)
+    if types is None:
+        statement = await connection.prepare(query.sql)
+        types = tuple(parameter.name for parameter in statement.get_parameters())
+        if len(PARAMETER_TYPES) >= MAX_COUNT_PARAMETER_TYPES:
+            PARAMETER_TYPES.clear()
+        PARAMETER_TYPES[query.sql] = types
+    args = [convert_parameter(value, type_name) for value, type_name in zip(query.args, types)]
+    return await getattr(connection, method)(query.sql, *args)
+
+
+def query_hash(query: Query) -> str:
+    return hashlib.sha256(repr((query.sql, query.args)).encode()).hexdigest()
+
+
+def get_cached_count(query: Query) -> Optional[int]:
+    item = COUNTS.get(query_hash(query))
+    if item is None or item[0] <= time.monotonic():
+        return None
+    return item[1]
+
+
+def set_cached_count(query: Query, count: int, ttl: float):
+    if len(COUNTS) >= MAX_COUNT_COUNTS:
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in COUNTS.items() if expires_at <= now]:
+            del COUNTS[key]
+        if len(COUNTS) >= MAX_COUNT_COUNTS:
+            COUNTS.clear()
+    COUNTS[query_hash(query)] = (time.monotonic() + ttl, count)
+
+
+def convert_parameter(value: Any, type_name: str) -> Any:
+    if value is None:
+        return None
+    if type_name.startswith("_"):
+        values = value if isinstance(value, list) else [value]
+        return [convert_parameter(item, type_name[1:]) for item in values]
+    if type_name in ("text", "varchar", "bpchar", "name"):
+        return str(value)
+    if not isinstance(value, str):
+        return value
+    if type_name in ("int2", "int4", "int8", "oid"):
+        return int(value)
+    if type_name == "numeric":
+        return Decimal(value)
+    if type_name in ("float4", "float8"):
+        return float(value)
+    if type_name == "bool":
+        return value.lower() in ("true", "1")
+    if type_name == "date":
+        return date.fromisoformat(value[:10])
+    if type_name in ("timestamp", "timestamptz"):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def to_number(value: str) -> Optional[int | float]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def json_filter_values(value: str) -> list[Any]:
+    """
+    Варианты значения фильтра в json_data: строка и, если строка - число или логическое значение, оно само
+    """
+    result = [value]
+    number = to_number(value)
+    if number is not None:
+        result.append(number)
+    elif str(value).lower() in ("true", "false"):
+        result.append(str(value).lower() == "true")
+    return result
@@ -0,0 +1,128 @@
+import logging
+from typing import Any, Collection, Optional, Type
+
+from aiohttp import ClientConnectorError, ClientSession
+from aiohttp.web_app import Application
+from icecream import ic
+from pydantic import BaseModel, ValidationError
+
+from core.project.conf import settings
+from core.project.services.requesters.connection import create_client_session
+from core.project.services.requesters.paginator import CursorPagination, Paginator
+from core.project.types import MsgResponseToPlatform, MsgSendStartEventInMSMarketplace
+from core.project.utils import get_url_callback_platform, prepare_response
+
+logger_error = logging.getLogger("errors")
+logger_info = logging.getLogger("info")
+
+
+class PlatformClient:
+    """
+    Клиент API платформы. Все запросы используют одну ClientSession с общим пулом соединений,
+    поэтому соединение (и TLS-рукопожатие) переиспользуется между запросами и страницами.
+    """
+
+    def __init__(self):
+        self._session: Optional[ClientSession] = None
+
+    @property
+    def session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = create_client_session()
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def get_page(self, url: str, headers: dict, params: Optional[dict] = None) -> tuple[int, Any]:
+        async with self.session.get(url, headers=headers, params=params) as response:
+            if response.status != 200:
+                return response.status, None
+            return response.status, await response.json()
+
+    async def fetch_collection(
+        self, url: str, headers: dict, response_type: Type[BaseModel], params: Optional[dict] = None
+    ) -> Collection:
+        """
+        Получает все страницы коллекции по ссылкам next.
+        Параметры передаются только в первый запрос: ссылка next уже содержит их.
+        """
+
+        async def fetch_page(page_params: dict) -> Optional[BaseModel]:
+            status, result_response = await self.get_page(**page_params)
+            if status != 200:
+                return None
+            try:
+                return response_type.model_validate(result_response)
+            except ValidationError as err:
+                ic(err)
+                return None
+
+        pagination = CursorPagination(
+            params={"url": url, "headers": headers, "params": params},
+            next_params=lambda _, response: {"url": response.next, "headers": headers} if response.next else None,
+            items=lambda response: response.results,
+        )
+        return await Paginator(fetch_page, pagination).items()
+
+    async def post_collection(
+        self, url: str, headers: dict, response_type: Type[BaseModel], body: Optional[dict] = None
+    ) -> Collection:
+        result = []
+        async with self.session.post(url, headers=headers, json=body) as response:
+            if response.status != 201:
+                return result
+            result_response = await response.json()
+        try:
+            for item in result_response:
+                result.append(response_type(**item))
+        except ValidationError as err:
+            ic(err)
+        return result
+
+    async def get_access_token(self, email: str, password: str) -> Optional[str]:
+        url = settings.PLATFORM.get("url_auth", "")
+        params = {"email": email, "password": password}
+        try:
+            async with self.session.post(url, json=params) as response:
+                if response.status != 200:
+                    logger_error.error(f"Платформа ответила отрицательным ответом.\n{email}\n{response}")
+                    return
+                result_response = await response.json()
+        except ClientConnectorError:
+            logger_error.error(f"Нет подключения к платформе.\n{email}")
+            return
+        return result_response.get("access")
+
+    async def send_response(
+        self, request_body: MsgSendStartEventInMSMarketplace, response_body: MsgResponseToPlatform
+    ):
+        try:
+            async with self.session.post(
+                get_url_callback_platform(request_body),
+                json=prepare_response(request_body, response_body),
+            ) as response:
+                status = response.status
+        except ClientConnectorError as err:
+            logger_error.error(err, exc_info=True, stack_info=True)
+            logger_error.info(
+                "Необходимо продумать механизм повторного отправления сообщений при не удачной отправке!"
+            )
+            return
+
+        if status == 200:
+            logger_info.info("Response delivered.")
+        else:
+            logger_info.info("The platform responded with an error!")
+
+
+platform_client = PlatformClient()
+
+
+async def platform_client_session(app: Application):
+    """
+    Закрытие сессии клиента платформы при остановке приложения
+    """
+    yield
+    await platform_client.close()
@@ -0,0 +1,85 @@
+import logging
+from abc import ABC
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from core.project.conf import settings
+
+logger_error = logging.getLogger("errors")
+
+# GCRA (generic cell rate algorithm). В ключе хранится теоретическое время прибытия (TAT) следующего запроса.
+# Время берётся с сервера Redis, чтобы часы всех реплик совпадали.
+# Запрос всегда резервируется, скрипт возвращает время ожидания (с) строкой, тк Lua-числа Redis приводит к целым.
+GCRA_SCRIPT = """
+local emission_interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tat = tonumber(redis.call("GET", KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+local new_tat = tat + emission_interval
+local delay = new_tat - burst * emission_interval - now
+if delay < 0 then
+    delay = 0
+end
+redis.call("SET", KEYS[1], tostring(new_tat), "PX", math.ceil((new_tat - now) * 1000) + 1)
+return tostring(delay)
+"""
+
+
+class AbstractRateLimiterBackend(ABC):
+    async def reserve(self, key: str, rate: float, capacity: float) -> float:
+        """
+        Резервирует запрос и возвращает время ожидания (с) до момента, когда его можно выполнить
+        """
+        raise NotImplementedError()
+
+    async def close(self):
+        pass
+
+
+class RedisRateLimiterBackend(AbstractRateLimiterBackend):
+    """
+    Общий для всех реплик сервиса ограничитель на Redis.
+    Параметры подключения берутся из CACHE_CONFIG["redis_alt"].
+    """
+
+    key_prefix = "rate_limiter"
+
+    def __init__(self, client: Optional[Redis] = None):
+        self.client = client or self.create_client()
+        self.script = self.client.register_script(GCRA_SCRIPT)
+
+    @staticmethod
+    def create_client() -> Redis:
+        config = settings.CACHE_CONFIG["redis_alt"]
+        return Redis(
+            host=config["endpoint"],
+            port=config["port"],
+            socket_timeout=config.get("timeout"),
+            socket_connect_timeout=config.get("timeout"),
+        )
+
+    async def reserve(self, key: str, rate: float, capacity: float) -> float:
+        delay = await self.script(keys=[f"{self.key_prefix}:{key}"], args=[1 / rate, capacity])
+        return float(delay)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def get_rate_limiter_backend() -> Optional[AbstractRateLimiterBackend]:
+    """
+    Возвращает распределённый бэкенд ограничителя или None, если используется только локальный
+    """
+    if settings.RATE_LIMITER_BACKEND != "redis":
+        return None
+    try:
+        return RedisRateLimiterBackend()
+    except RedisError as err:
+        logger_error.error(f"Не удалось подключить Redis для ограничителя запросов: {err}")
+        return None
@@ -0,0 +1,73 @@
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+from core.project.conf import settings
+
+# Заголовки ответа, в которых API сообщает время до снятия ограничения (секунды)
+RETRY_AFTER_HEADERS = ("Retry-After", "X-Ratelimit-Retry", "X-Ratelimit-Reset")
+# Заголовок успешного ответа с количеством запросов, оставшихся в квоте, и заголовки времени её восстановления
+RATE_LIMIT_REMAINING_HEADER = "X-Ratelimit-Remaining"
+RATE_LIMIT_RESET_HEADERS = ("X-Ratelimit-Reset", "X-Ratelimit-Retry", "Retry-After")
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """
+    Разбирает значение Retry-After: количество секунд или HTTP-дату
+    """
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def delay_from_headers(headers: Mapping[str, str], names: tuple[str, ...] = RETRY_AFTER_HEADERS) -> Optional[float]:
+    """
+    Возвращает время ожидания (с) из заголовков ответа или None, если API его не сообщил
+    """
+    for header in names:
+        value = headers.get(header)
+        if value is None:
+            continue
+        delay = parse_retry_after(value)
+        if delay is not None:
+            return delay
+    return None
+
+
+def exhausted_quota_delay(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Время (с) до восстановления квоты, если API сообщил, что она исчерпана (X-Ratelimit-Remaining: 0).
+    Позволяет приостановить запросы до ответа 429. None, если квота не исчерпана или время не сообщено
+    """
+    try:
+        remaining = float(headers.get(RATE_LIMIT_REMAINING_HEADER))
+    except (TypeError, ValueError):
+        return None
+    if remaining > 0:
+        return None
+    delay = delay_from_headers(headers, RATE_LIMIT_RESET_HEADERS)
+    return None if delay is None else min(delay, settings.RETRY_BACKOFF_MAX)
+
+
+def exponential_backoff(retry_num: int, base: Optional[float] = None) -> float:
+    """
+    Экспоненциальная задержка с полным джиттером: случайное значение от 0 до base * 2 ** (retry_num - 1)
+    """
+    base = base or settings.RETRY_BACKOFF_BASE
+    return random.uniform(0, min(settings.RETRY_BACKOFF_MAX, base * 2 ** (retry_num - 1)))
+
+
+def retry_delay(retry_num: int, headers: Optional[Mapping[str, str]] = None, base: Optional[float] = None) -> float:
+    delay = delay_from_headers(headers) if headers else None
+    if delay is None:
+        return exponential_backoff(retry_num, base)
+    return min(delay, settings.RETRY_BACKOFF_MAX)
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class TokenBucket:
+    """
+    Корзина токенов.
+
+    rate - скорость пополнения (токенов в секунду)
+    capacity - максимальный запас токенов (burst)
+    tokens - текущий запас, отрицательное значение означает очередь резерваций
+    updated_at - время последнего пересчёта запаса (time.monotonic)
+    """
+
+    rate: float
+    capacity: float = 1
+    tokens: Optional[float] = None
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        if self.tokens is None:
+            self.tokens = self.capacity
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """
+        Резервирует токен и возвращает время ожидания (с) до момента, когда его можно использовать
+        """
+        self.refill(time.monotonic() if now is None else now)
+        self.tokens -= 1
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def cancel(self):
+        """
+        Возвращает неиспользованный токен (например, при отмене ожидающей задачи)
+        """
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def is_idle(self, now: float) -> bool:
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+
+class ConcurrencySlots:
+    """
+    Ограничение количества одновременных запросов.
+    users - количество задач, которые заняли слот или ожидают его
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+    async def __aenter__(self):
+        self.users += 1
+        try:
+            await self.semaphore.acquire()
+        except BaseException:
+            self.users -= 1
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.users -= 1
+        self.semaphore.release()
+
+    def is_idle(self) -> bool:
+        return not self.users
+
+
+class AdaptiveConcurrency:
+    """
+    Адаптивное ограничение одновременных запросов к хосту (AIMD).
+    Успешный ответ увеличивает лимит на 1 / limit (примерно +1 за "окно" запросов),
+    ответ о превышении лимита уменьшает его вдвое.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.active = 0
+        self.condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_throttle(self):
+        self.limit = max(self.min_limit, self.limit / 2)
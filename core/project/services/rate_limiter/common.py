@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import nullcontext
+from typing import Optional
+
+import yaml
+from aiohttp.web import Application
+from redis.exceptions import RedisError
+
+from core.project.conf import settings
+from core.project.services.rate_limiter.backends import AbstractRateLimiterBackend, get_rate_limiter_backend
+from core.project.services.rate_limiter.buckets import AdaptiveConcurrency, ConcurrencySlots, TokenBucket
+from core.project.types import URLParameterSchema
+
+logger_error = logging.getLogger("errors")
+logger_info = logging.getLogger("info")
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов к API маркетплейса.
+    Для каждой пары (ключ доступа, семейство API) хранится своя корзина токенов: квота семейства
+    (quota.name) общая для всех его точек. Точки без семейства ограничиваются по отдельности.
+    При заданном распределённом бэкенде лимит общий для всех реплик, а локальные корзины
+    используются, только пока бэкенд недоступен.
+    Ограничение одновременных запросов (quota.max_concurrency), адаптивное ограничение по хосту
+    и паузы после ответов 429 действуют в пределах процесса.
+    """
+
+    def __init__(self, backend: Optional[AbstractRateLimiterBackend] = None):
+        self.buckets: dict[str, TokenBucket] = {}
+        self.slots: dict[str, ConcurrencySlots] = {}
+        self.hosts: dict[str, AdaptiveConcurrency] = {}
+        self.holds: dict[str, float] = {}
+        self.backend = backend
+
+    @staticmethod
+    def make_key(hash_auth: str, url_params: URLParameterSchema) -> str:
+        if url_params.quota and url_params.quota.name:
+            return f"{hash_auth}:{url_params.quota.name}"
+        return f"{hash_auth}:{url_params.name or url_params.url}"
+
+    @staticmethod
+    def bucket_params(url_params: URLParameterSchema) -> Optional[tuple[float, float]]:
+        """
+        Возвращает скорость пополнения и ёмкость корзины для точки API или None, если ограничений нет
+        """
+        if url_params.quota:
+            return url_params.quota.requests / url_params.quota.interval, url_params.quota.burst
+        if not url_params.timeout:
+            return None
+        return 1 / url_params.timeout, 1
+
+    def get_bucket(self, key: str, rate: float, capacity: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(rate=rate, capacity=capacity)
+        elif (bucket.rate, bucket.capacity) != (rate, capacity):
+            bucket.refill(time.monotonic())
+            bucket.rate, bucket.capacity = rate, capacity
+        return bucket
+
+    def concurrency(self, key: str, url_params: URLParameterSchema) -> ConcurrencySlots | nullcontext:
+        """
+        Возвращает контекст, ограничивающий количество одновременных запросов к точке API
+        """
+        if not url_params.quota or not url_params.quota.max_concurrency:
+            return nullcontext()
+        slots = self.slots.get(key)
+        if slots is None or (slots.limit != url_params.quota.max_concurrency and slots.is_idle()):
+            slots = self.slots[key] = ConcurrencySlots(url_params.quota.max_concurrency)
+        return slots
+
+    def host_concurrency(self, host: str) -> AdaptiveConcurrency:
+        concurrency = self.hosts.get(host)
+        if concurrency is None:
+            concurrency = self.hosts[host] = AdaptiveConcurrency(settings.RATE_LIMITER_HOST_MAX_CONCURRENCY)
+        return concurrency
+
+    def hold(self, key: str, delay: float):
+        """
+        Приостанавливает запросы по ключу на delay секунд (например, по заголовку Retry-After)
+        """
+        self.holds[key] = max(self.holds.get(key, 0), time.monotonic() + delay)
+
+    def hold_delay(self, key: str) -> float:
+        hold_until = self.holds.get(key)
+        if hold_until is None:
+            return 0
+        delay = hold_until - time.monotonic()
+        if delay <= 0:
+            del self.holds[key]
+            return 0
+        return delay
+
+    async def acquire(self, key: str, url_params: URLParameterSchema) -> float:
+        """
+        Ожидает освобождения токена для запроса. Возвращает время ожидания (с)
+        """
+        hold_delay = self.hold_delay(key)
+        if hold_delay:
+            await asyncio.sleep(hold_delay)
+        bucket_params = self.bucket_params(url_params)
+        if not bucket_params:
+            return hold_delay
+        if self.backend:
+            try:
+                delay = await self.backend.reserve(key, *bucket_params)
+            except (RedisError, OSError) as err:
+                logger_error.error(f"Распределённый ограничитель недоступен, используется локальный: {err}")
+            else:
+                await asyncio.sleep(delay)
+                return hold_delay + delay
+
+        bucket = self.get_bucket(key, *bucket_params)
+        delay = bucket.reserve()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                bucket.cancel()
+                raise
+        return hold_delay + delay
+
+    def purge(self):
+        """
+        Удаляет полностью восстановившиеся корзины, чтобы словарь не рос бесконечно
+        """
+        now = time.monotonic()
+        for key in [key for key, bucket in self.buckets.items() if bucket.is_idle(now)]:
+            del self.buckets[key]
+        for key in [key for key, slots in self.slots.items() if slots.is_idle()]:
+            del self.slots[key]
+        for key in [key for key, hold_until in self.holds.items() if hold_until <= now]:
+            del self.holds[key]
+
+    def dump(self) -> dict:
+        # Монотонное время не переживает перезапуск процесса, поэтому сохраняем "настенное" время
+        delta = time.time() - time.monotonic()
+        return {
+            key: {
+                "rate": bucket.rate,
+                "capacity": bucket.capacity,
+                "tokens": bucket.tokens,
+                "updated_at": bucket.updated_at + delta,
+            }
+            for key, bucket in self.buckets.items()
+        }
+
+    def load(self, data: dict):
+        delta = time.time() - time.monotonic()
+        for key, item in (data or {}).items():
+            try:
+                self.buckets[key] = TokenBucket(
+                    rate=item["rate"],
+                    capacity=item["capacity"],
+                    tokens=item["tokens"],
+                    updated_at=item["updated_at"] - delta,
+                )
+            except (KeyError, TypeError) as err:
+                logger_error.error(f"Некорректная запись снимка лимитов {key}: {err}")
+
+    async def save_snapshot(self, path: str):
+        self.purge()
+        await asyncio.to_thread(write_snapshot, path, self.dump())
+
+    async def load_snapshot(self, path: str):
+        self.load(await asyncio.to_thread(read_snapshot, path))
+
+
+def write_snapshot(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f_yaml:
+        yaml.safe_dump(data, f_yaml)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> dict:
+    try:
+        with open(path) as f_yaml:
+            return yaml.safe_load(f_yaml) or {}
+    except FileNotFoundError:
+        return {}
+    except yaml.YAMLError as err:
+        logger_error.error(f"Не удалось прочитать снимок лимитов {path}: {err}")
+        return {}
+
+
+rate_limiter = RateLimiter(backend=get_rate_limiter_backend())
+
+
+async def rate_limiter_snapshot(app: Application):
+    """
+    Восстановление состояния лимитов при старте и периодическое сохранение снимка вне цикла событий.
+    При завершении работы закрывается подключение распределённого бэкенда.
+    """
+
+    async def periodic_save():
+        while True:
+            await asyncio.sleep(settings.RATE_LIMITER_SNAPSHOT_INTERVAL)
+            try:
+                await rate_limiter.save_snapshot(settings.RATE_LIMITER_SNAPSHOT_PATH)
+            except OSError as err:
+                logger_error.error(f"Не удалось сохранить снимок лимитов: {err}")
+
+    task = None
+    if settings.RATE_LIMITER_SNAPSHOT:
+        await rate_limiter.load_snapshot(settings.RATE_LIMITER_SNAPSHOT_PATH)
+        task = asyncio.create_task(periodic_save())
+    yield
+    if task:
+        task.cancel()
+        await rate_limiter.save_snapshot(settings.RATE_LIMITER_SNAPSHOT_PATH)
+    if rate_limiter.backend:
+        await rate_limiter.backend.close()
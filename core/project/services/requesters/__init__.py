@@ -4,15 +4,19 @@ import traceback
 from abc import ABC
 from asyncio import Semaphore, Task
 from dataclasses import dataclass, field
-from typing import Collection, Any, Callable, Optional, TypeVar, Type
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Collection, Any, Callable, Optional, TypeVar, Type
 
 from aiohttp import ClientSession
 from aiohttp.web_app import Application
 from pydantic import BaseModel
 
+from core.project.conf import settings
 from core.project.exceptions import RequestException
+from core.project.services.database_workers import WatermarkDBHandler
 from core.project.services.requesters.fetcher import Fetcher, FetchResponse
-from core.project.types import MsgSendStartEventInMSMarketplace, URLParameterSchema
+from core.project.services.requesters.paginator import Pagination, Paginator
+from core.project.types import MsgSendStartEventInMSMarketplace, ParamsView, URLParameterSchema
 from core.project.utils import (
     count_iterations_from_total,
     start_stop_index_in_iteration,
@@ -62,29 +66,56 @@ class AppRequester(AbstractRequester):
 
     async def execute_and_process_api_tasks(self, api_request_tasks: Collection[Task]) -> list[Any]:
         process_result = []
-        api_done_tasks, _ = await asyncio.wait(api_request_tasks)
+        try:
+            api_done_tasks, _ = await asyncio.wait(api_request_tasks)
+        except asyncio.CancelledError:
+            # Отмена ожидания отменяет и сами запросы, например упреждающие запросы страниц
+            for task in api_request_tasks:
+                task.cancel()
+            raise
         for task in api_done_tasks:
-            """
-                Функция asyncio.wait перехватывает и записывает все исключения.
-                В Fetcher организован перехват ожидаемых исключений согласно логики и
-                запись ошибок этих исключений.
-                Данная проверка позволит проверить не учтенные логикой Fetcher исключения,
-                которые могут появиться при рефакторинге или расширении кода Fetcher.
-            """
-            if task.exception() is None:
-                task_result: FetchResponse = task.result()
-                if task_result.fetch_result:
-                    process_result.append(task_result.fetch_result)
-                self.errors.extend(task_result.fetch_errors)
-            else:
-                exception = task.exception()
-                tb_str = traceback.format_exception(exception, value=exception, tb=exception.__traceback__)
-                error = {"Ошибка выполнения Fetcher": {"Тип ошибки": exception, "Traceback": tb_str}}
-                ic(error)
-                self.errors.append(error)
-                logger_error.error(error)
+            fetch_result = self.process_api_task(task)
+            if fetch_result:
+                process_result.append(fetch_result)
         return process_result
 
+    async def iter_api_tasks(self, api_request_tasks: dict[Task, Any]) -> AsyncIterator[tuple[Any, Any]]:
+        """
+        Результаты запросов по мере их завершения. Задачи передаются словарём задача - ключ,
+        ключ возвращается вместе с результатом
+        """
+        pending = set(api_request_tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    fetch_result = self.process_api_task(task)
+                    if fetch_result:
+                        yield api_request_tasks[task], fetch_result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def process_api_task(self, task: Task) -> Any:
+        """
+        Функция asyncio.wait перехватывает и записывает все исключения.
+        В Fetcher организован перехват ожидаемых исключений согласно логики и
+        запись ошибок этих исключений.
+        Данная проверка позволит проверить не учтенные логикой Fetcher исключения,
+        которые могут появиться при рефакторинге или расширении кода Fetcher.
+        """
+        if task.exception() is None:
+            task_result: FetchResponse = task.result()
+            self.errors.extend(task_result.fetch_errors)
+            return task_result.fetch_result
+        exception = task.exception()
+        tb_str = traceback.format_exception(exception, value=exception, tb=exception.__traceback__)
+        error = {"Ошибка выполнения Fetcher": {"Тип ошибки": exception, "Traceback": tb_str}}
+        ic(error)
+        self.errors.append(error)
+        logger_error.error(error)
+        return None
+
     def _prepare_task_for_single_request(
         self,
         url_schema: Optional[URLParameterSchema] = None,
@@ -97,6 +128,7 @@ class AppRequester(AbstractRequester):
             "url_params": url_schema or self.url_schema,
             "params": params,
             "test": self.test,
+            "cached": self.request_body.cached,
         }
         return asyncio.create_task(Fetcher()(**params))
 
@@ -169,6 +201,7 @@ class AppRequester(AbstractRequester):
                             headers=self.request_body.headers,
                             params=json_params,
                             test=self.test,
+                            cached=self.request_body.cached,
                         ),
                         name=url_schema.title,
                     )
@@ -185,6 +218,7 @@ class AppRequester(AbstractRequester):
             valid_type_positive=kwargs.get("valid_type_positive") or url_params.response_schema,
             valid_type_negative=kwargs.get("valid_type_negative") or url_params.error_schema,
             test=self.test,
+            cached=self.request_body.cached,
         )
 
         if response.fetch_errors:
@@ -199,6 +233,93 @@ class AppRequester(AbstractRequester):
 
         return response.fetch_result
 
+    def paginate(
+        self,
+        pagination: Pagination,
+        url_schema: Optional[URLParameterSchema] = None,
+        fetch_page: Optional[Callable[[dict], Awaitable[Any]]] = None,
+        prefetch: int = 0,
+    ) -> Paginator:
+        """
+        Постраничный обход точки API по стратегии pagination (см. Paginator).
+        Упреждающих запросов не больше, чем квота точки позволяет выполнить одновременно и без ожидания:
+        сверх этого они только занимают очередь квоты раньше нужных страниц.
+        """
+        url_schema = url_schema or self.url_schema
+        quota = url_schema.quota if url_schema else None
+        if quota:
+            prefetch = max(0, min(prefetch, quota.burst - 1, (quota.max_concurrency or prefetch + 1) - 1))
+        return Paginator(
+            fetch_page or (lambda params: self.fetch_page(url_schema, params)), pagination, prefetch=prefetch
+        )
+
+    async def fetch_page(self, url_schema: URLParameterSchema, params: dict) -> Any:
+        return await self.make_single_api_request(urls_and_params=(url_schema, params))
+
+    async def stream_fetch(
+        self, url_schema: URLParameterSchema, params: Optional[dict] = None, batch_size: Optional[int] = None
+    ) -> AsyncIterator[BaseModel]:
+        """
+        Потоковое получение большого ответа пачками валидированных элементов (см. Fetcher.stream)
+        """
+        fetcher = Fetcher()
+        try:
+            async for batch in fetcher.stream(
+                semaphore=self.semaphore,
+                session=self.session,
+                url_params=url_schema,
+                headers=self.request_body.headers,
+                params=params,
+                batch_size=batch_size,
+                test=self.test,
+            ):
+                yield batch
+        finally:
+            self.errors.extend(fetcher.errors)
+
+
+class MixinWatermark(AppRequester):
+    """
+    Инкрементальная загрузка: запрашиваются только данные, изменённые после сохранённой отметки
+    (с запасом WATERMARK_OVERLAP). Полная загрузка выполняется по add_info["full_sync"]
+    или если отметки ещё нет
+    """
+
+    watermark_code: str
+    # Отметки изменений последней загрузки, сохраняются вызывающим после записи данных в базу
+    fetched_watermark: Collection[datetime | str] = ()
+
+    @property
+    def full_sync(self) -> bool:
+        return bool((self.request_body.add_info or {}).get("full_sync"))
+
+    @property
+    def watermark_db_handler(self) -> Optional[WatermarkDBHandler]:
+        pool = self.app.get(settings.DEFAULT_DATABASE) if self.app is not None else None
+        if pool is None:
+            return None
+        return WatermarkDBHandler(
+            pool=pool,
+            params=ParamsView(
+                company_id=self.request_body.company_id, marketplace_id=self.request_body.marketplace_id
+            ),
+        )
+
+    async def get_watermark(self) -> Optional[datetime]:
+        db_handler = self.watermark_db_handler
+        if self.full_sync or db_handler is None:
+            return None
+        watermark = await db_handler.get(self.watermark_code)
+        return watermark - timedelta(seconds=settings.WATERMARK_OVERLAP) if watermark else None
+
+    async def save_watermark(self, values: Collection[datetime | str]):
+        # При ошибках часть изменений могла быть не получена, отметка не сдвигается
+        db_handler = self.watermark_db_handler
+        if self.errors or not values or db_handler is None:
+            return
+        values = [datetime.fromisoformat(value) if isinstance(value, str) else value for value in values]
+        await db_handler.set(self.watermark_code, max(values))
+
 
 class SingleRequester(AppRequester):
     async def _execute_request(self, input_data: BaseModel):
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+from aiohttp import ClientSession, TCPConnector, TraceConfig
+from aiohttp.tracing import (
+    TraceConnectionCreateEndParams,
+    TraceConnectionReuseconnParams,
+    TraceDnsCacheHitParams,
+    TraceDnsCacheMissParams,
+    TraceRequestStartParams,
+)
+from prometheus_client import Counter
+
+from core.project.conf import settings
+
+HTTP_CONNECTIONS_CREATED = Counter(
+    "ms_wb_http_connections_created", "Count of new HTTP connections to external APIs.", ["host"]
+)
+HTTP_CONNECTIONS_REUSED = Counter(
+    "ms_wb_http_connections_reused", "Count of reused keep-alive HTTP connections to external APIs.", ["host"]
+)
+HTTP_DNS_CACHE = Counter("ms_wb_http_dns_cache", "DNS cache hits and misses.", ["host", "result"])
+
+
+def create_connector() -> TCPConnector:
+    """
+    Пул соединений общей ClientSession.
+    Общий лимит должен быть больше суммы лимитов по хостам, чтобы медленный хост
+    (например, статистика) не занимал все соединения.
+    """
+    return TCPConnector(
+        limit=settings.HTTP_POOL_LIMIT,
+        limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        use_dns_cache=True,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+    )
+
+
+async def on_request_start(session: ClientSession, context: SimpleNamespace, params: TraceRequestStartParams):
+    context.host = params.url.host
+
+
+async def on_connection_create_end(
+    session: ClientSession, context: SimpleNamespace, params: TraceConnectionCreateEndParams
+):
+    HTTP_CONNECTIONS_CREATED.labels(host=getattr(context, "host", "")).inc()
+
+
+async def on_connection_reuseconn(
+    session: ClientSession, context: SimpleNamespace, params: TraceConnectionReuseconnParams
+):
+    HTTP_CONNECTIONS_REUSED.labels(host=getattr(context, "host", "")).inc()
+
+
+async def on_dns_cache_hit(session: ClientSession, context: SimpleNamespace, params: TraceDnsCacheHitParams):
+    HTTP_DNS_CACHE.labels(host=params.host, result="hit").inc()
+
+
+async def on_dns_cache_miss(session: ClientSession, context: SimpleNamespace, params: TraceDnsCacheMissParams):
+    HTTP_DNS_CACHE.labels(host=params.host, result="miss").inc()
+
+
+def create_trace_config() -> TraceConfig:
+    """
+    Метрики переиспользования соединений
+    """
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+    return trace_config
+
+
+def create_client_session() -> ClientSession:
+    return ClientSession(connector=create_connector(), trace_configs=[create_trace_config()])
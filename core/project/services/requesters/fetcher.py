@@ -1,18 +1,18 @@
 import asyncio
 import hashlib
 import logging
-import os
 import traceback
 
-import yaml
 import json
 
 from asyncio import Semaphore
-from aiohttp import ClientSession, ClientResponse, ClientError
-from typing import Optional, Callable, Type, Any
+from contextlib import AsyncExitStack, asynccontextmanager
+from aiohttp import ClientSession, ClientResponse, ClientError, ClientTimeout
+from typing import AsyncIterator, Optional, Callable, Type, Any
 
 from icecream import ic
 from pydantic import BaseModel, Field, ValidationError
+from yarl import URL
 from datetime import datetime
 
 from core.project.types import URLParameterSchema
@@ -22,8 +22,16 @@ from core.apps.constants import (
     HTTP_RESPONSE_CODES_FOR_REPEAT_REQUEST,
     HTTP_RESPONSE_CODES_ACCESS_DENIED,
     HTTP_RESPONSE_CODES_STOP_REQURESTS,
+    HTTP_RESPONSE_CODE_NO_CONTENT,
+    HTTP_RESPONSE_CODE_TOO_MANY_REQUESTS,
 )
 from core.project.enums.common import RequestMethod
+from core.project.services.rate_limiter.backoff import exhausted_quota_delay, retry_delay
+from core.project.services.rate_limiter.common import rate_limiter
+from core.project.services.requesters.json_stream import JSONArrayParser
+from core.project.services.requesters.reference_cache import reference_cache
+from core.project.services.requesters.response_cache import response_cache
+from core.project.services.requesters.single_flight import single_flight
 from core.project.utils import (
     full_url,
     dict_fetch_method,
@@ -47,10 +55,6 @@ class FetchResponse(BaseModel):
 
 
 class Fetcher:
-    def __init__(self):
-        self.requests_logs = None
-        self.num_attempt_request = 0
-
     async def __call__(
         self,
         semaphore: Semaphore,
@@ -61,6 +65,121 @@ class Fetcher:
         valid_type_positive: Optional[Type[BaseModel] | Type[str]] = None,
         valid_type_negative: Optional[Type[BaseModel]] = None,
         test: bool = False,
+        cached: bool = True,
+    ):
+        self.set_request(
+            semaphore, session, url_params, headers, params, valid_type_positive, valid_type_negative, test, cached
+        )
+        return await self.make_marketplace_api_request()
+
+    async def stream(
+        self,
+        semaphore: Semaphore,
+        session: ClientSession,
+        url_params: URLParameterSchema,
+        headers: dict,
+        params: Optional[dict] = None,
+        valid_type_positive: Optional[Type[BaseModel]] = None,
+        batch_size: Optional[int] = None,
+        test: bool = False,
+    ) -> AsyncIterator[BaseModel]:
+        """
+        Потоковый запрос для больших ответов-массивов.
+        Элементы разбираются по мере чтения ответа и отдаются пачками по batch_size,
+        каждая пачка валидирована схемой ответа. Ответ не кешируется.
+        Семафор и слот квоты заняты только до получения заголовков ответа: пока вызывающий обрабатывает
+        пачки, ответ дочитывается без них. Ответ 204 или пустой ответ означает, что данных нет.
+        Ошибки сохраняются в errors. Повторный запрос возможен, только пока не отдана первая пачка.
+        """
+        self.set_request(semaphore, session, url_params, headers, params, valid_type_positive, None, test, False)
+        self.add_headers()
+        if not await self.checking_can_request():
+            self.add_error({"Запрос для ключа доступа закрыт!": self.headers})
+            return
+        if not (self.valid_type_positive or self.url_params.response_schema):
+            self.add_error({"Ответ не соответствует ожидаемой схеме": "не задана response_schema"})
+            return
+
+        batch_size = batch_size or settings.STREAM_BATCH_SIZE
+        started = False
+        for retry_num in range(1, int(settings.MAX_COUNT_REPEAT_REQUESTS) + 1):
+            try:
+                prepared_session = self.set_http_method()
+                async with AsyncExitStack() as response_stack:
+                    async with self.semaphore, self.rate_limit():
+                        response = await response_stack.enter_async_context(
+                            prepared_session(**self.params_for_request)
+                        )
+                        self.adapt_host_concurrency(response.status)
+                        self.hold_on_exhausted_quota(response)
+                        if response.status == HTTP_RESPONSE_CODE_NO_CONTENT:
+                            return
+                        if response.status != self.url_params.positive_response_code:
+                            parsed_response = await self.get_parsed_response(response)
+                            if parsed_response is None and response.ok:
+                                return
+                            self.add_error({"Получен ответ": parsed_response or response.status})
+                            if response.status in HTTP_RESPONSE_CODES_ACCESS_DENIED:
+                                await self.add_auth_header_to_access_denied_list()
+                                return
+                            if await self.checking_can_repeat_request(response.status):
+                                delay = self.hold_before_retry(retry_num, response)
+                                self.add_log_info(f"Выполняется повторный запрос через {delay:.2f} с")
+                                continue
+                            return
+
+                    async for batch in self.iter_response_batches(response, batch_size):
+                        started = True
+                        yield batch
+                    return
+
+            except json.JSONDecodeError as decode_err:
+                self.add_error({"Ошибка парсинга JSON": decode_err.msg})
+                return
+            except ValidationError as validation_err:
+                self.add_error({"Ответ не соответствует ожидаемой схеме": validation_err.errors()})
+                return
+            except ClientError as client_err:
+                self.add_error({"Ошибка сетевого обмена": client_err})
+            except asyncio.TimeoutError:
+                self.add_error({"Превышено время ожидания ответа": self.client_timeout.total})
+            if started:
+                # Часть данных уже передана, повторный запрос продублирует её
+                return
+
+            delay = retry_delay(retry_num, base=self.url_params.timeout)
+            self.add_log_error(f"Ошибка.Повторный запрос через {delay:.2f} с")
+            await asyncio.sleep(delay)
+
+        self.add_error({"Данные не получены": "Превышено количество допустимых попыток запроса"})
+
+    async def iter_response_batches(self, response: ClientResponse, batch_size: int) -> AsyncIterator[BaseModel]:
+        parser = JSONArrayParser()
+        batch = []
+        async for chunk in response.content.iter_any():
+            for item in parser.feed(chunk):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    yield self.validate_response(batch).valid_data
+                    batch = []
+        response_data = parser.close()
+        if batch:
+            yield self.validate_response(batch).valid_data
+        elif response_data:
+            # Ответ не массив: валидируется целиком, как в обычном запросе
+            yield self.validate_response(response_data).valid_data
+
+    def set_request(
+        self,
+        semaphore: Semaphore,
+        session: ClientSession,
+        url_params: URLParameterSchema,
+        headers: dict,
+        params: Optional[dict],
+        valid_type_positive: Optional[Type[BaseModel] | Type[str]],
+        valid_type_negative: Optional[Type[BaseModel]],
+        test: bool,
+        cached: bool,
     ):
         self.errors: Optional[list[Any]] = []
         self.session = session
@@ -70,12 +189,13 @@ class Fetcher:
         self.params = params
         self.valid_type_positive = valid_type_positive
         self.valid_type_negative = valid_type_negative
-        self.requests_logs = self.get_yml_logs()
-        self.file_log_requests = os.path.join(settings.PATH_LOGGERS, "requests.yml")
         self.auth_header = settings.API_AUTH_HEADER
-        self.num_attempt_request = self.get_num_attempt_request()
         self.test = test
-        return await self.make_marketplace_api_request()
+        self.cached = cached
+
+    def add_error(self, error: Any):
+        self.errors.append(error)
+        self.add_log_error(error)
 
     async def add_auth_header_to_access_denied_list(self):
         cache = get_cache_handler_or_none()
@@ -108,7 +228,6 @@ class Fetcher:
 
         for retry_num in range(1, int(settings.MAX_COUNT_REPEAT_REQUESTS) + 1):
             try:
-                await self.checking_need_to_wait()
                 self.add_log_info(
                     f"Направлен запрос: "
                     f"\n\t- метод: {self.url_params.method.value}"
@@ -116,11 +235,12 @@ class Fetcher:
                     f"\n\t- заголовки: {self.headers}"
                     f"\n\t- параметры: {self.params}"
                 )
-                self.write_logs_to_yml()
                 # TODO Выделить логику запроса в отдельный метод
                 prepared_session = self.set_http_method()
-                async with prepared_session(**self.params_for_request) as response:
+                async with self.rate_limit(), prepared_session(**self.params_for_request) as response:
                     ic(response)
+                    self.adapt_host_concurrency(response.status)
+                    self.hold_on_exhausted_quota(response)
                     parsed_response = await self.get_parsed_response(response)
                     attempts_result.response_code = response.status
                     if response.status in HTTP_RESPONSE_CODES_ACCESS_DENIED:
@@ -131,13 +251,14 @@ class Fetcher:
                         return attempts_result_with_error({"Получен ответ": parsed_response})
 
                     if response.status != self.url_params.positive_response_code:
-                        attempts_result.fetch_errors.append(parsed_response)
+                        attempts_result.fetch_errors.append(parsed_response or {"Получен ответ": response.status})
 
                         self.add_log_info(f"Ошибка: {parsed_response}\n" f"Проверяю возможность повторного запроса")
 
                         can_repeat_request = await self.checking_can_repeat_request(response.status)
                         if can_repeat_request:
-                            self.add_log_info("Выполняется повторный запрос")
+                            delay = self.hold_before_retry(retry_num, response)
+                            self.add_log_info(f"Выполняется повторный запрос через {delay:.2f} с")
                             continue
                         else:
                             self.add_log_info("Повторный запрос не предусмотрен для данной ошибки")
@@ -159,13 +280,16 @@ class Fetcher:
                 return attempts_result_with_error({"Ответ не соответствует ожидаемой схеме": validation_err.errors()})
             except ClientError as client_err:  # Ошибки клиента aiohttp при получении ответа по сети
                 attempts_result_with_error({"Ошибка сетевого обмена": client_err})
+            except asyncio.TimeoutError:  # Превышено время ожидания ответа (URLParameterSchema.request_timeout)
+                attempts_result_with_error({"Превышено время ожидания ответа": self.client_timeout.total})
             except Exception as error:
                 return attempts_result_with_error(
                     {"Ошибка обработки запроса": error, "tracback": traceback.format_exc()}
                 )
 
-            self.add_log_error(f"Ошибка.Повторный запрос через {self.url_params.timeout} с")
-            await asyncio.sleep(self.url_params.timeout)
+            delay = retry_delay(retry_num, base=self.url_params.timeout)
+            self.add_log_error(f"Ошибка.Повторный запрос через {delay:.2f} с")
+            await asyncio.sleep(delay)
 
         error = {"Данные не получены": "Превышено количество допустимых попыток запроса"}
         attempts_result.fetch_errors.append(error)
@@ -178,6 +302,38 @@ class Fetcher:
 
     async def make_marketplace_api_request(self) -> FetchResponse:
         self.add_headers()
+        if self.use_cache and self.url_params.stale_while_revalidate:
+            return await reference_cache.get_or_fetch(
+                self.request_key,
+                self.fetch_from_api,
+                ttl=self.url_params.cache_expires_in,
+                is_success=self.is_cacheable_response,
+            )
+
+        if self.use_cache:
+            fetch_response = await response_cache.get(self.request_key)
+            if fetch_response is not None:
+                self.add_log_info(f"Ответ получен из кеша: {self.full_url}")
+                return fetch_response
+
+        fetch_response = await self.fetch_from_api()
+        if self.use_cache and self.is_cacheable_response(fetch_response):
+            await response_cache.set(self.request_key, fetch_response, self.url_params.cache_expires_in)
+        return fetch_response
+
+    async def fetch_from_api(self) -> FetchResponse:
+        # Одинаковые GET-запросы объединяются: они не меняют данные, а ответ по одному ключу доступа общий.
+        # Недавний ответ переиспользуется, только если запросу разрешён кеш
+        if self.url_params.method == RequestMethod.GET:
+            return await single_flight.do(
+                self.request_key,
+                self.fetch_with_semaphore,
+                is_success=lambda response: not response.fetch_errors,
+                reuse_result=self.use_cache,
+            )
+        return await self.fetch_with_semaphore()
+
+    async def fetch_with_semaphore(self) -> FetchResponse:
         async with self.semaphore:
             fetch_response = await self.attempt_fetch()
             return fetch_response
@@ -199,14 +355,17 @@ class Fetcher:
         )
 
     @staticmethod
-    async def get_parsed_response(response: ClientResponse) -> dict:
-        response_content_type = response.headers.get("Content-Type")
+    async def get_parsed_response(response: ClientResponse) -> Optional[dict]:
+        """
+        Тело ответа в формате json. Для пустого тела (например, ответ 204) возвращает None
+        """
+        response_content_type = response.headers.get("Content-Type") or ""
         if "application/json" in response_content_type:
             parsed_response = await response.json()
             return parsed_response
         else:
             parsed_response = await response.text()
-            return json.loads(parsed_response)
+            return json.loads(parsed_response) if parsed_response.strip() else None
 
     def validate_response(self, response_data: dict) -> ValidationResult:
         data = ValidationResult()
@@ -241,41 +400,92 @@ class Fetcher:
 
         return data
 
-    def get_yml_logs(self) -> dict:
-        try:
-            with open(self.file_log_requests) as f_yaml:
-                result = yaml.safe_load(f_yaml)
-        except (Exception,):
-            result = {}
-        return result or {}
-
     @property
     def hash_auth(self):
         r = self.headers.get(self.auth_header, "") or ""
         r = hashlib.sha256(str.encode(r)).hexdigest()
         return r
 
-    async def checking_need_to_wait(self) -> bool:
-        now = datetime.now()
-        self.requests_logs = self.get_yml_logs()
-        last_datetime_request = (
-            self.requests_logs.get(self.hash_auth, {}).get(self.url_params.url, {}).get("request_at")
+    @property
+    def use_cache(self) -> bool:
+        # Кешируются только запросы на чтение
+        return (
+            self.cached
+            and self.url_params.has_cache
+            and self.url_params.method == RequestMethod.GET
+            and self.url_params.cache_expires_in > 0
         )
-        if not last_datetime_request or not self.url_params.timeout:
-            return False
-        result = (now - last_datetime_request).seconds <= self.url_params.timeout
-        self.add_log_info(f"Время последнего запроса:{last_datetime_request}")
-        self.add_log_info(
-            f"Время между запросами:{(now - last_datetime_request).seconds}\n"
-            f"Время ожидания между запросами: {self.url_params.timeout}"
+
+    @staticmethod
+    def is_cacheable_response(fetch_response: FetchResponse) -> bool:
+        return fetch_response.fetch_result is not None and not fetch_response.fetch_errors
+
+    @property
+    def request_key(self) -> str:
+        """
+        Ключ запроса: ключ доступа, метод, адрес, параметры и схема валидации ответа
+        """
+        response_schema = self.valid_type_positive or self.url_params.response_schema
+        key = json.dumps(
+            [
+                self.hash_auth,
+                self.url_params.method.value,
+                self.full_url,
+                self.params,
+                getattr(response_schema, "__qualname__", None),
+            ],
+            sort_keys=True,
+            default=str,
         )
-        if result:
-            self.add_log_info(f"Нужно подождать {self.url_params.timeout}с")
-            await asyncio.sleep(self.url_params.timeout)
-        return result
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @property
+    def host(self) -> str:
+        return URL(self.full_url).host or ""
 
-    def get_num_attempt_request(self):
-        return self.requests_logs.get(self.hash_auth, {}).get(self.url_params.url, {}).get("num_attempt_request", 1)
+    @property
+    def rate_limit_key(self) -> str:
+        return rate_limiter.make_key(self.hash_auth, self.url_params)
+
+    @asynccontextmanager
+    async def rate_limit(self):
+        """
+        Занимает слот одновременных запросов и ожидает квоту точки API
+        """
+        async with rate_limiter.concurrency(self.rate_limit_key, self.url_params):
+            await self.waiting_rate_limit()
+            async with rate_limiter.host_concurrency(self.host):
+                yield
+
+    def adapt_host_concurrency(self, response_code: int):
+        if response_code == HTTP_RESPONSE_CODE_TOO_MANY_REQUESTS:
+            rate_limiter.host_concurrency(self.host).on_throttle()
+        elif response_code == self.url_params.positive_response_code:
+            rate_limiter.host_concurrency(self.host).on_success()
+
+    def hold_on_exhausted_quota(self, response: ClientResponse):
+        """
+        Приостанавливает запросы по ключу доступа к точке API, если ответ сообщил об исчерпанной квоте
+        """
+        delay = exhausted_quota_delay(response.headers)
+        if delay:
+            rate_limiter.hold(self.rate_limit_key, delay)
+            self.add_log_info(f"Квота {self.url_params.name or self.url_params.url} исчерпана, пауза {delay:.2f} с")
+
+    def hold_before_retry(self, retry_num: int, response: ClientResponse) -> float:
+        """
+        Приостанавливает запросы по ключу доступа к точке API на время из заголовков ответа
+        или на время экспоненциальной задержки
+        """
+        delay = retry_delay(retry_num, headers=response.headers, base=self.url_params.timeout)
+        rate_limiter.hold(self.rate_limit_key, delay)
+        return delay
+
+    async def waiting_rate_limit(self) -> float:
+        delay = await rate_limiter.acquire(self.rate_limit_key, self.url_params)
+        if delay:
+            self.add_log_info(f"Ожидание лимита запросов {self.url_params.name or self.url_params.url}: {delay:.2f}с")
+        return delay
 
     @property
     def params_for_request(self):
@@ -283,17 +493,11 @@ class Fetcher:
         # key_params = "json" if self.url_params.method == RequestMethod.POST else "params"
         # NOTE: Добавлен метод RequestMethod.PUT, тк в экспорте цен ожидается json в методе PUT
         key_params = "json" if self.url_params.method in {RequestMethod.POST, RequestMethod.PUT} else "params"
-        return {"url": self.full_url, key_params: self.params, "headers": self.headers}
-
-    def write_logs_to_yml(self):
-        new_data = {
-            self.hash_auth: {
-                self.url_params.url: {
-                    "request_at": datetime.now(),
-                    "num_attempt_request": self.num_attempt_request + 1,
-                }
-            }
-        }
-        self.requests_logs |= new_data
-        with open(self.file_log_requests, "w") as f_yaml:
-            yaml.dump(self.requests_logs, f_yaml)
+        return {"url": self.full_url, key_params: self.params, "headers": self.headers, "timeout": self.client_timeout}
+
+    @property
+    def client_timeout(self) -> ClientTimeout:
+        return ClientTimeout(
+            total=self.url_params.request_timeout or settings.HTTP_REQUEST_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+        )
@@ -0,0 +1,90 @@
+import codecs
+import json
+import re
+from typing import Any, Iterator
+
+WHITESPACE = " \t\n\r"
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r]*")
+
+
+class JSONArrayParser:
+    """
+    Инкрементальный разбор JSON-массива верхнего уровня.
+    Данные подаются частями через feed, готовые элементы массива возвращаются сразу,
+    поэтому в памяти одновременно находится только необработанный хвост ответа.
+    Если ответ не является массивом, он накапливается целиком и доступен через close.
+    """
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.is_array = None
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> Iterator[Any]:
+        self.buffer += self.utf8.decode(chunk)
+        return self.parse()
+
+    def close(self) -> Any:
+        """
+        Завершает разбор. Возвращает тело ответа, если это не массив.
+        """
+        self.buffer += self.utf8.decode(b"", final=True)
+        self.detect_array()
+        if self.is_array is None:
+            return None
+        if not self.is_array:
+            return json.loads(self.buffer)
+        if not self.finished or self.buffer.strip(WHITESPACE):
+            raise json.JSONDecodeError("Незавершённый массив", self.buffer, 0)
+        return None
+
+    def detect_array(self):
+        if self.is_array is not None:
+            return
+        self.buffer = self.buffer.lstrip(WHITESPACE)
+        if not self.buffer:
+            return
+        self.is_array = self.buffer[0] == "["
+        if self.is_array:
+            self.buffer = self.buffer[1:]
+
+    def parse(self) -> Iterator[Any]:
+        self.detect_array()
+        if not self.is_array:
+            return
+
+        # Разобранная часть отрезается один раз за вызов, внутри позиция отслеживается индексом
+        buffer = self.buffer
+        index = 0
+        try:
+            while not self.finished:
+                index = skip_whitespace(buffer, index)
+                if index == len(buffer):
+                    return
+                if buffer[index] == "]":
+                    self.finished = True
+                    index += 1
+                    return
+                start = index
+                if buffer[index] == ",":
+                    start = skip_whitespace(buffer, index + 1)
+                try:
+                    item, end = self.decoder.raw_decode(buffer, start)
+                except json.JSONDecodeError:
+                    # Элемент пришёл не полностью, ожидаем следующую часть
+                    index = start
+                    return
+                # Число на границе части может быть обрезано: элемент готов, только если за ним есть разделитель
+                if end == len(buffer):
+                    index = start
+                    return
+                index = end
+                yield item
+        finally:
+            self.buffer = buffer[index:]
+
+
+def skip_whitespace(buffer: str, index: int) -> int:
+    return WHITESPACE_PATTERN.match(buffer, index).end()
@@ -0,0 +1,191 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, Optional
+
+from core.project.conf import settings
+
+_END = object()
+
+
+class Pagination(ABC):
+    """
+    Стратегия постраничного запроса: параметры первой страницы, параметры следующей страницы
+    по ответу на текущую и элементы страницы
+    """
+
+    def __init__(self, items: Callable[[Any], Collection]):
+        self.items = items
+
+    @abstractmethod
+    def first_params(self) -> dict:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def next_params(self, params: dict, response: Any) -> Optional[dict]:
+        raise NotImplementedError()
+
+
+class PagePagination(Pagination):
+    """
+    Страницы по номеру. has_next определяет по ответу, есть ли следующая страница
+    """
+
+    def __init__(
+        self,
+        params: Callable[[int], dict],
+        items: Callable[[Any], Collection],
+        has_next: Optional[Callable[[Any], bool]] = None,
+        first_page: int = 1,
+    ):
+        super().__init__(items)
+        self.params = params
+        self.has_next = has_next or (lambda response: bool(items(response)))
+        self.first_page = first_page
+        self.page = first_page
+
+    def first_params(self) -> dict:
+        self.page = self.first_page
+        return self.params(self.page)
+
+    def next_params(self, params: dict, response: Any) -> Optional[dict]:
+        if not self.has_next(response):
+            return None
+        self.page += 1
+        return self.params(self.page)
+
+
+class OffsetPagination(Pagination):
+    """
+    Страницы по смещению. Неполная страница считается последней
+    """
+
+    def __init__(self, params: Callable[[int, int], dict], items: Callable[[Any], Collection], limit: int):
+        super().__init__(items)
+        self.params = params
+        self.limit = limit
+        self.offset = 0
+
+    def first_params(self) -> dict:
+        self.offset = 0
+        return self.params(self.offset, self.limit)
+
+    def next_params(self, params: dict, response: Any) -> Optional[dict]:
+        if len(self.items(response)) < self.limit:
+            return None
+        self.offset += self.limit
+        return self.params(self.offset, self.limit)
+
+
+class CursorPagination(Pagination):
+    """
+    Страницы по курсору из ответа. next_params возвращает None, если страниц больше нет
+    """
+
+    def __init__(
+        self,
+        params: dict,
+        next_params: Callable[[dict, Any], Optional[dict]],
+        items: Callable[[Any], Collection],
+    ):
+        super().__init__(items)
+        self.params = params
+        self.get_next_params = next_params
+
+    def first_params(self) -> dict:
+        return self.params
+
+    def next_params(self, params: dict, response: Any) -> Optional[dict]:
+        return self.get_next_params(params, response)
+
+
+class Paginator:
+    """
+    Асинхронный итератор по элементам страниц.
+    Следующая страница запрашивается сразу, как только по ответу известны её параметры,
+    пока вызывающий обрабатывает предыдущие. Очередь ограничена buffer_size страницами:
+    если вызывающий не успевает, запросы приостанавливаются.
+    Пустой ответ fetch_page завершает обход, completed в этом случае остаётся False.
+
+    Для страниц по номеру возможен упреждающий запрос: после первой страницы одновременно
+    запрашиваются следующие prefetch страниц. Ответы отдаются по порядку страниц,
+    запросы после последней страницы отменяются. Одновременность ограничена квотой точки API.
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[dict], Awaitable[Any]],
+        pagination: Pagination,
+        buffer_size: Optional[int] = None,
+        prefetch: int = 0,
+    ):
+        self.fetch_page = fetch_page
+        self.pagination = pagination
+        self.buffer_size = buffer_size or settings.PAGINATION_BUFFER_SIZE
+        self.prefetch = prefetch if isinstance(pagination, PagePagination) else 0
+        self.completed = False
+
+    async def __aiter__(self) -> AsyncIterator[Collection]:
+        queue = asyncio.Queue(maxsize=self.buffer_size)
+        producer = asyncio.create_task(self.produce(queue))
+        try:
+            while True:
+                page = await queue.get()
+                if page is _END:
+                    break
+                if isinstance(page, BaseException):
+                    raise page
+                yield page
+        finally:
+            producer.cancel()
+
+    async def produce(self, queue: asyncio.Queue):
+        try:
+            if self.prefetch:
+                await self.produce_with_prefetch(queue)
+            else:
+                await self.produce_sequentially(queue)
+        except Exception as err:
+            await queue.put(err)
+            return
+        await queue.put(_END)
+
+    async def produce_sequentially(self, queue: asyncio.Queue):
+        params = self.pagination.first_params()
+        while params is not None:
+            response = await self.fetch_page(params)
+            if not response:
+                return
+            params = self.pagination.next_params(params, response)
+            await queue.put(self.pagination.items(response))
+        self.completed = True
+
+    async def produce_with_prefetch(self, queue: asyncio.Queue):
+        pagination: PagePagination = self.pagination
+        response = await self.fetch_page(pagination.first_params())
+        if not response:
+            return
+        await queue.put(pagination.items(response))
+
+        next_page = pagination.first_page + 1
+        pending = deque()
+        try:
+            while pagination.has_next(response):
+                while len(pending) < self.prefetch:
+                    pending.append(asyncio.create_task(self.fetch_page(pagination.params(next_page))))
+                    next_page += 1
+                response = await pending.popleft()
+                if not response:
+                    break
+                await queue.put(pagination.items(response))
+            else:
+                self.completed = True
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def items(self) -> list:
+        result = []
+        async for page in self:
+            result.extend(page)
+        return result
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from core.project.conf import settings
+
+logger_error = logging.getLogger("errors")
+
+FILE_EXTENSION = ".pickle"
+
+
+class ReferenceCache:
+    """
+    Кеш справочных данных со стратегией stale-while-revalidate.
+    Если копия есть, она сразу возвращается вызывающему, а устаревшая копия обновляется фоновым запросом.
+    Копия, устаревшая больше чем на max_stale, удаляется, и данные запрашиваются у API.
+    Копии сохраняются на диск, поэтому после перезапуска сервиса данные доступны без обращения к API.
+    В памяти и на диске хранится не больше max_items копий, давно не использованные вытесняются.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_items: Optional[int] = None, max_stale: Optional[int] = None):
+        self.path = path or settings.REFERENCE_CACHE_PATH
+        self.max_items = settings.REFERENCE_CACHE_MAX_ITEMS if max_items is None else max_items
+        self.max_stale = settings.REFERENCE_CACHE_MAX_STALE if max_stale is None else max_stale
+        self.items: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.refresh_tasks: dict[str, asyncio.Task] = {}
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        ttl: int,
+        is_success: Callable[[Any], bool] = bool,
+    ) -> Any:
+        item = self.get(key) or await self.load(key)
+        if item is not None and time.time() - item[0] > ttl + self.max_stale:
+            await self.delete(key)
+            item = None
+        if item is None:
+            result = await func()
+            if is_success(result):
+                await self.store(key, result)
+            return result
+
+        fetched_at, value = item
+        if time.time() - fetched_at > ttl and key not in self.refresh_tasks:
+            task = self.refresh_tasks[key] = asyncio.create_task(self.refresh(key, func, is_success))
+            task.add_done_callback(lambda _: self.refresh_tasks.pop(key, None))
+        return pickle.loads(value)
+
+    async def refresh(self, key: str, func: Callable[[], Awaitable[Any]], is_success: Callable[[Any], bool]):
+        try:
+            result = await func()
+        except Exception as err:
+            logger_error.error(f"Не удалось обновить справочные данные {key}: {err}")
+            return
+        if is_success(result):
+            await self.store(key, result)
+
+    def get(self, key: str) -> Optional[tuple[float, bytes]]:
+        item = self.items.get(key)
+        if item is not None:
+            self.items.move_to_end(key)
+        return item
+
+    def set(self, key: str, item: tuple[float, bytes]):
+        self.items[key] = item
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+
+    async def store(self, key: str, result: Any):
+        try:
+            item = (time.time(), pickle.dumps(result))
+        except (pickle.PicklingError, TypeError, AttributeError) as err:
+            logger_error.error(f"Справочные данные не могут быть закешированы: {err}")
+            return
+        self.set(key, item)
+        try:
+            await asyncio.to_thread(write_item, self.file_path(key), item)
+            await asyncio.to_thread(prune_items, self.path, self.max_items)
+        except OSError as err:
+            logger_error.error(f"Не удалось сохранить справочные данные на диск: {err}")
+
+    async def load(self, key: str) -> Optional[tuple[float, bytes]]:
+        item = await asyncio.to_thread(read_item, self.file_path(key))
+        if item is not None:
+            self.set(key, item)
+        return item
+
+    async def delete(self, key: str):
+        self.items.pop(key, None)
+        try:
+            await asyncio.to_thread(delete_item, self.file_path(key))
+        except OSError as err:
+            logger_error.error(f"Не удалось удалить справочные данные с диска: {err}")
+
+    def file_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}{FILE_EXTENSION}")
+
+
+def write_item(path: str, item: tuple[float, bytes]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(item, f)
+    os.replace(tmp_path, path)
+
+
+def read_item(path: str) -> Optional[tuple[float, bytes]]:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError) as err:
+        logger_error.error(f"Не удалось прочитать справочные данные {path}: {err}")
+        return None
+
+
+def delete_item(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def prune_items(path: str, max_items: int):
+    """
+    Удаляет с диска самые старые копии сверх max_items
+    """
+    files = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(FILE_EXTENSION):
+                files.append((entry.stat().st_mtime, entry.path))
+    if len(files) <= max_items:
+        return
+    files.sort()
+    for _, file_path in files[: len(files) - max_items]:
+        delete_item(file_path)
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+
+from core.project.conf import settings
+from core.project.utils import get_cache_handler_or_none
+
+logger_error = logging.getLogger("errors")
+
+
+class LRUBytesCache:
+    """
+    LRU-кеш сериализованных значений с ограничением суммарного размера в байтах
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.items: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        item = self.items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        self.items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, expires_at: float):
+        self.delete(key)
+        if len(value) > self.max_bytes:
+            return
+        self.items[key] = (expires_at, value)
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, (_, evicted_value) = self.items.popitem(last=False)
+            self.size -= len(evicted_value)
+
+    def delete(self, key: str):
+        item = self.items.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+
+class ResponseCache:
+    """
+    Двухуровневый кеш ответов API: LRU в памяти процесса и Redis из CACHE_CONFIG, если кеш включён.
+    Значения хранятся сериализованными, поэтому каждый вызывающий получает свою копию ответа.
+    """
+
+    key_prefix = "response"
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.memory = LRUBytesCache(settings.RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None:
+            item = await self.get_from_redis(key)
+            if not item:
+                return None
+            expires_at, value = item
+            self.memory.set(key, value, expires_at)
+        return pickle.loads(value)
+
+    async def set(self, key: str, response: Any, ttl: int):
+        try:
+            value = pickle.dumps(response)
+        except (pickle.PicklingError, TypeError, AttributeError) as err:
+            logger_error.error(f"Ответ не может быть закеширован: {err}")
+            return
+        expires_at = time.time() + ttl
+        self.memory.set(key, value, expires_at)
+        await self.set_to_redis(key, (expires_at, value), ttl)
+
+    async def get_from_redis(self, key: str) -> Optional[tuple[float, bytes]]:
+        cache = get_cache_handler_or_none()
+        if not cache:
+            return None
+        try:
+            return await cache.get(f"{self.key_prefix}:{key}")
+        except (RedisError, OSError, asyncio.TimeoutError) as err:
+            logger_error.error(f"Не удалось получить ответ из кеша: {err}")
+            return None
+
+    async def set_to_redis(self, key: str, item: tuple[float, bytes], ttl: int):
+        cache = get_cache_handler_or_none()
+        if not cache:
+            return
+        try:
+            await cache.set(f"{self.key_prefix}:{key}", item, ttl=ttl)
+        except (RedisError, OSError, asyncio.TimeoutError) as err:
+            logger_error.error(f"Не удалось сохранить ответ в кеш: {err}")
+
+
+response_cache = ResponseCache()
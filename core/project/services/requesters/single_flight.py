@@ -0,0 +1,71 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from core.project.conf import settings
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых запросов.
+    Пока запрос по ключу выполняется, повторные вызовы с тем же ключом ожидают его результат
+    вместо нового обращения к API. Успешный результат дополнительно хранится window секунд,
+    чтобы почти одновременные вызовы тоже не уходили в API. Вызовы, которым нужен свежий ответ
+    (reuse_result=False), сохранённый результат не получают и объединяются только с выполняющимся запросом.
+    Результат общий для всех вызывающих и не копируется, изменять его нельзя.
+    Сохранённый результат удаляется по истечении window, даже если ключ больше не запрашивается
+    """
+
+    def __init__(self, window: Optional[float] = None):
+        self.window = settings.SINGLE_FLIGHT_WINDOW if window is None else window
+        self.calls: dict[str, asyncio.Task] = {}
+        self.results: dict[str, tuple[float, Any]] = {}
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        is_success: Callable[[Any], bool] = bool,
+        reuse_result: bool = True,
+    ) -> Any:
+        result = self.get_result(key) if reuse_result else None
+        if result is not None:
+            return result
+
+        task = self.calls.get(key)
+        if task is None:
+            task = self.calls[key] = asyncio.create_task(func())
+            task.add_done_callback(lambda done_task: self.finish(key, done_task, is_success))
+        # Отмена одного из ожидающих не должна прерывать запрос для остальных
+        return await asyncio.shield(task)
+
+    def finish(self, key: str, task: asyncio.Task, is_success: Callable[[Any], bool]):
+        self.calls.pop(key, None)
+        if self.window and not task.cancelled() and task.exception() is None and is_success(task.result()):
+            expires_at = time.monotonic() + self.window
+            self.results[key] = (expires_at, task.result())
+            task.get_loop().call_later(self.window, self.evict, key, expires_at)
+
+    def evict(self, key: str, expires_at: float):
+        # Результат, сохранённый позже по тому же ключу, остаётся до своего срока
+        item = self.results.get(key)
+        if item is not None and item[0] == expires_at:
+            del self.results[key]
+
+    def get_result(self, key: str) -> Optional[Any]:
+        item = self.results.get(key)
+        if item is None:
+            return None
+        expires_at, result = item
+        if expires_at <= time.monotonic():
+            self.purge()
+            return None
+        return result
+
+    def purge(self):
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self.results.items() if expires_at <= now]:
+            del self.results[key]
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from core.project.conf import settings
+
+logger_error = logging.getLogger("errors")
+
+# Проверка состояния загрузки: None, пока загрузка обрабатывается, иначе итог обработки.
+# Если состояние получить не удалось, проверка вызывает UploadStatusUnknown
+CheckUpload = Callable[[], Awaitable[Optional[Any]]]
+
+
+class UploadStatusUnknown(Exception):
+    """Маркетплейс не вернул состояние загрузки, итог её обработки неизвестен"""
+
+
+@dataclass
+class PendingUpload:
+    check: CheckUpload
+    future: asyncio.Future
+    deadline: float
+    interval: float
+    next_check: float = field(default_factory=time.monotonic)
+    # Выполняющаяся проверка состояния
+    checking: Optional[asyncio.Task] = None
+
+
+class UploadPoller:
+    """
+    Общий опрос состояния асинхронных загрузок на маркетплейсе.
+    Вызывающий регистрирует загрузку и ожидает future с итогом обработки.
+    Каждая загрузка, подошедшая к проверке, проверяется отдельной задачей, поэтому долгая проверка
+    не задерживает остальные. Проверка ограничена временем до срока загрузки. Интервал проверок
+    каждой загрузки растёт до max_interval, по истечении timeout future завершается TimeoutError
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.interval = settings.UPLOAD_POLL_INTERVAL if interval is None else interval
+        self.max_interval = settings.UPLOAD_POLL_MAX_INTERVAL if max_interval is None else max_interval
+        self.timeout = settings.UPLOAD_POLL_TIMEOUT if timeout is None else timeout
+        self.pending: dict[str, PendingUpload] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+
+    def register(self, key: str, check: CheckUpload) -> asyncio.Future:
+        item = self.pending.get(key)
+        if item is not None:
+            return item.future
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = PendingUpload(
+            check=check, future=future, deadline=time.monotonic() + self.timeout, interval=self.interval
+        )
+        if self.task is None or self.task.done() or self.task.get_loop() is not asyncio.get_running_loop():
+            # Событие создаётся вместе с задачей опроса в текущем цикле событий
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+        self.wakeup.set()
+        return future
+
+    async def wait(self, key: str, check: CheckUpload) -> Any:
+        # Отмена одного из ожидающих не должна снимать загрузку с опроса для остальных
+        return await asyncio.shield(self.register(key, check))
+
+    async def run(self):
+        while self.pending:
+            now = time.monotonic()
+            for key, item in self.pending.items():
+                if item.checking is None and item.next_check <= now:
+                    item.checking = asyncio.create_task(self.check(key, item, now))
+            # Цикл просыпается к следующей проверке или по завершении выполняющейся
+            waiting = [item.next_check for item in self.pending.values() if item.checking is None]
+            delay = max(min(waiting) - time.monotonic(), 0) if waiting else None
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def check(self, key: str, item: PendingUpload, now: float):
+        try:
+            # Последней проверке, назначенной на срок загрузки, даётся не меньше начального интервала
+            result = await asyncio.wait_for(item.check(), timeout=max(item.deadline - now, self.interval))
+        except Exception as err:
+            result = err
+        item.checking = None
+        self.finish(key, item, result)
+        self.wakeup.set()
+
+    def finish(self, key: str, item: PendingUpload, result: Any):
+        now = time.monotonic()
+        if item.future.done():
+            self.pending.pop(key, None)
+        elif isinstance(result, asyncio.TimeoutError):
+            logger_error.error(f"Проверка состояния загрузки {key} не завершилась до срока")
+            item.future.set_exception(asyncio.TimeoutError(f"Загрузка {key} не обработана за {self.timeout} с"))
+            self.pending.pop(key, None)
+        elif isinstance(result, BaseException):
+            logger_error.error(f"Ошибка проверки состояния загрузки {key}: {result}")
+            item.future.set_exception(result)
+            self.pending.pop(key, None)
+        elif result is not None:
+            item.future.set_result(result)
+            self.pending.pop(key, None)
+        elif now >= item.deadline:
+            item.future.set_exception(asyncio.TimeoutError(f"Загрузка {key} не обработана за {self.timeout} с"))
+            self.pending.pop(key, None)
+        else:
+            item.next_check = min(now + item.interval, item.deadline)
+            item.interval = min(item.interval * 2, self.max_interval)
+
+
+upload_poller = UploadPoller()
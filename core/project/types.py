@@ -6,6 +6,24 @@ from core.project.constants import SECONDS_IN_MINUTE
 from core.project.enums.common import RequestMethod
 
 
+class QuotaProfile(BaseModel):
+    """
+    Квота точки API для одного ключа доступа.
+
+    name - семейство API: точки с одинаковым name расходуют общую квоту
+    requests - количество запросов за интервал
+    interval - интервал квоты (секунды)
+    burst - количество запросов, которые можно выполнить подряд без ожидания
+    max_concurrency - максимальное количество одновременных запросов
+    """
+
+    requests: int
+    name: Optional[str] = Field(default=None)
+    interval: float = Field(default=SECONDS_IN_MINUTE)
+    burst: int = Field(default=1)
+    max_concurrency: Optional[int] = Field(default=None)
+
+
 class URLParameterSchema(BaseModel):
     """
     Параметры для ulr запроса.
@@ -16,6 +34,10 @@ class URLParameterSchema(BaseModel):
     response_schema - схема получаемых данных
     cache_expires_in - время жизни в кеша (секунды)
     max_count_bad_request - максимальное ко-во ошибочных запросов
+    timeout - пауза перед повторным запросом (секунды), без quota также минимальный интервал между запросами
+    quota - квота точки API
+    request_timeout - максимальное время выполнения запроса (секунды), по умолчанию HTTP_REQUEST_TIMEOUT
+    stale_while_revalidate - сразу отдавать закешированную копию, обновляя устаревшую в фоне (справочные данные)
     """
 
     title: Optional[str] = None
@@ -38,6 +60,9 @@ class URLParameterSchema(BaseModel):
     positive_response_code: int = Field(default=200)
     version: int = Field(default=1)
     timeout: Optional[float] = Field(default=0)
+    quota: Optional[QuotaProfile] = Field(default=None)
+    request_timeout: Optional[float] = Field(default=None)
+    stale_while_revalidate: bool = Field(default=False)
 
 
 class MsgResponseToPlatform(BaseModel):
@@ -87,6 +112,8 @@ class ParamsView(BaseModel):
     sorting_directions: Optional[str] = Field(default_factory=list)
     sorting_fields: Optional[list[str]] = Field(default_factory=list)
     filter: Optional[dict] = None
+    # Стратегия подсчёта total_count (CountStrategy), по умолчанию COUNT_STRATEGY
+    count: Optional[str] = None
 
 
 class ResponseView(BaseModel):
@@ -13,7 +13,7 @@ from pprint import pformat
 from time import localtime
 
 from aiocache import caches
-from aiohttp import ClientSession, ClientConnectorError, ClientResponse
+from aiohttp import ClientSession, ClientResponse
 from aiohttp.web_app import Application
 from asyncpg.connection import Connection
 from asyncpg import utils
@@ -23,7 +23,7 @@ from importlib import import_module
 from typing import Any, Type, Generator, Collection, Tuple, List
 
 from icecream import ic
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel
 from six import text_type
 
 from core.apps.basic.types import WBResponse
@@ -187,82 +187,31 @@ def start_stop_index_in_iteration(iteration: int, count_items_in_iteration: int)
 async def send_response_to_platform(
     request_body: MsgSendStartEventInMSMarketplace, response_body: MsgResponseToPlatform
 ):
-    async with ClientSession() as session:
-        try:
-            response = await session.post(
-                get_url_callback_platform(request_body),
-                json=prepare_response(request_body, response_body),
-            )
-        except ClientConnectorError as err:
-            logger_error.error(err, exc_info=True, stack_info=True)
-            logger_error.info(
-                "Необходимо продумать механизм повторного отправления сообщений при не удачной отправке!"
-            )
-        else:
-            if response.status == 200:
-                logger_info.info("Response delivered.")
-            else:
-                logger_info.info("The platform responded with an error!")
+    from core.project.services.platform.client import platform_client
 
-        await asyncio.sleep(0.1)
+    await platform_client.send_response(request_body, response_body)
 
 
 async def get_access_token_from_platform(email: str, password: str):
-    from core.project.conf import settings
+    from core.project.services.platform.client import platform_client
 
-    url = settings.PLATFORM.get("url_auth", "")
-    params = {"email": email, "password": password}
-    async with ClientSession() as session:
-        try:
-            response = await session.post(url, json=params)
-        except ClientConnectorError:
-            logger_error.error(f"Нет подключения к платформе.\n{email}")
-            return
-        if response.status != 200:
-            logger_error.error(f"Платформа ответила отрицательным ответом.\n{email}\n{response}")
-            return
-        result_response = await response.json()
-    return result_response.get("access")
+    return await platform_client.get_access_token(email, password)
 
 
 async def fetch_collection_from_platform(
     url: str, headers: dict, response_type: Type[BaseModel], params: dict = None
 ) -> Collection:
-    result = []
-    while url:
-        async with ClientSession() as session:
-            response = await session.get(url, headers=headers, params=params)
-            if response.status != 200:
-                break
-            result_response = await response.json()
-            try:
-                valid_response = response_type.model_validate(result_response)
-            except ValidationError as err:
-                ic(err)
-                break
-
-            url = valid_response.next
-            result.extend(valid_response.results)
-    return result
+    from core.project.services.platform.client import platform_client
+
+    return await platform_client.fetch_collection(url, headers, response_type, params)
 
 
 async def post_collection_from_ms(
     url: str, headers: dict, response_type: Type[BaseModel], params: dict = None, body: dict = None
 ) -> Collection:
-    result = []
-    async with ClientSession() as session:
-        response = await session.post(url, headers=headers, json=body)
-        if response.status != 201:
-            return result
-        result_response = await response.json()
-        try:
-            for item in result_response:
-                result.append(response_type(**item))
-
-        except ValidationError as err:
-            ic(err)
+    from core.project.services.platform.client import platform_client
 
-    return result
+    return await platform_client.post_collection(url, headers, response_type, body)
 
 
 async def fetch_companies_with_header() -> Collection[MarketplaceWithHeader]:
@@ -453,23 +402,30 @@ async def set_connection_numeric_type_codec(connection: Connection) -> None:
     )
 
 
+def json_encoder(value: Any) -> str:
+    # Данные, уже сериализованные в JSON (model_dump_json), передаются как есть
+    return value if isinstance(value, str) else json.dumps(value)
+
+
 async def set_connection_json_type_codec(connection: Connection) -> None:
+    # Двоичный формат нужен для COPY (copy_records_to_table)
     await connection.set_type_codec(
         typename="json",
-        encoder=json.dumps,
+        encoder=lambda value: json_encoder(value).encode(),
         decoder=json.loads,
         schema="pg_catalog",
-        format="text",
+        format="binary",
     )
 
 
 async def set_connection_jsonb_type_codec(connection: Connection) -> None:
+    # Двоичное представление jsonb - байт версии формата (1) и текст JSON
     await connection.set_type_codec(
         typename="jsonb",
-        encoder=json.dumps,
-        decoder=json.loads,
+        encoder=lambda value: b"\x01" + json_encoder(value).encode(),
+        decoder=lambda value: json.loads(value[1:]),
         schema="pg_catalog",
-        format="text",
+        format="binary",
     )
 
 
@@ -493,6 +449,15 @@ async def set_connection_date_type_codec(connection: Connection) -> None:
     )
 
 
+async def set_connection_json_types_codecs(connection: Connection) -> None:
+    """
+    JSON и JSONB декодируются драйвером. Остальные кодеки set_connection_types_codecs меняют
+    типы значений (дата строкой, numeric числом с плавающей точкой), которые ожидает код
+    """
+    await set_connection_json_type_codec(connection=connection)
+    await set_connection_jsonb_type_codec(connection=connection)
+
+
 async def set_connection_types_codecs(connection: Connection) -> None:
     await set_connection_numeric_type_codec(connection=connection)
     await set_connection_json_type_codec(connection=connection)
@@ -505,8 +470,10 @@ async def client_session(app: Application):
     """
     Создание глобальной ClientSession
     """
+    from core.project.services.requesters.connection import create_client_session
+
     print("Создается ClientSession")
-    session = ClientSession()
+    session = create_client_session()
     app["session"] = session
     yield
     print("Закрывается ClientSession")
@@ -2,13 +2,15 @@ import logging
 import traceback
 from itertools import zip_longest
 from json import JSONDecodeError
-from typing import Type
+from typing import Optional, Type
 
 from aiohttp import web
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 from icecream import ic
 
+from core.project.enums.common import CountStrategy
+from core.project.exceptions import InvalidParams
 from core.project.services.database_workers import DBHandler
 from core.project.types import ParamsView, ResponseView
 
@@ -84,27 +86,46 @@ class MSView(web.View):
                     filter_dict[key] = val
 
         self.params.filter = filter_dict
+        self.clean_count_param()
+
+    def clean_count_param(self):
+        """
+        Проверяет стратегию подсчёта total_count (?count=)
+        """
+        if not self.params.count:
+            return
+        try:
+            self.params.count = CountStrategy(str(self.params.count).lower()).value
+        except ValueError:
+            choices = ", ".join(strategy.value for strategy in CountStrategy)
+            raise InvalidParams(f"Недопустимая стратегия подсчёта: {self.params.count}. Допустимые: {choices}")
 
     async def __get_result__(self) -> ResponseView:
         pass
 
-    def __response__(self, result: ResponseView):
+    def __response__(self, result: ResponseView, status: Optional[int] = None):
         """
         Возвращает подготовленный ответ в формате json
         Args:
             result: ResponseView - подготовленный ответ
+            status: int - код ответа, по умолчанию 500 при ошибках и 200 без них
 
         Returns:
             aiohttp.web_response.Response
         """
         data = result.model_dump() if isinstance(result, ResponseView) else None
-        return web.json_response(data=data, status=500 if self.errors else 200)
+        if status is None:
+            status = 500 if self.errors else 200
+        return web.json_response(data=data, status=status)
 
     async def __prepare_response__(self) -> Response:
         result = None
         try:
             await self.clean_params()
             result = await self.__get_result__()
+        except InvalidParams as err:
+            self.errors.append(str(err))
+            return self.__response__(ResponseView(errors=self.errors, result=None, total_count=0), status=400)
         except Exception as err:
             ic(f"{err}\n{traceback.format_exc()}")
             logger_error.error(err, exc_info=True, stack_info=True)
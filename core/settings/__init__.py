@@ -192,7 +192,68 @@ STOCK_QUEUE_PUBLISHER = os.environ.get("STOCK_QUEUE_PUBLISHER", "stock")
 SCHEDULE = {
     # "test_too": {"task": "core.project.services.scheduler.common.test_too", "schedule": 1},
     "bulk_import_orders": {"task": "core.apps.basic.services.handlers.orders.bulk_import_orders", "schedule": 600},
+    "bulk_sync_nomenclature": {
+        "task": "core.apps.basic.services.handlers.goods.bulk_sync_nomenclature",
+        "schedule": 3600,
+    },
 }
 
+# RATE LIMITER
+# memory - лимиты внутри процесса, redis - общие лимиты для всех реплик (CACHE_CONFIG["redis_alt"])
+RATE_LIMITER_BACKEND = os.environ.get("RATE_LIMITER_BACKEND", "memory")
+RATE_LIMITER_SNAPSHOT = get_bool_from_env("RATE_LIMITER_SNAPSHOT", False)
+RATE_LIMITER_SNAPSHOT_PATH = os.environ.get(
+    "RATE_LIMITER_SNAPSHOT_PATH", os.path.join(PATH_LOGGERS, "rate_limiter.yml")
+)
+RATE_LIMITER_SNAPSHOT_INTERVAL = int(os.environ.get("RATE_LIMITER_SNAPSHOT_INTERVAL", 60))
+RATE_LIMITER_HOST_MAX_CONCURRENCY = int(os.environ.get("RATE_LIMITER_HOST_MAX_CONCURRENCY", 20))
+RETRY_BACKOFF_BASE = float(os.environ.get("RETRY_BACKOFF_BASE", 1))
+RETRY_BACKOFF_MAX = float(os.environ.get("RETRY_BACKOFF_MAX", 120))
+
+# Время (с), в течение которого успешный ответ отдаётся одинаковым GET-запросам без обращения к API
+SINGLE_FLIGHT_WINDOW = float(os.environ.get("SINGLE_FLIGHT_WINDOW", 5))
+# Размер (байт) кеша ответов API в памяти процесса
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Стратегия подсчёта total_count в ответах view: exact, estimated или combined
+COUNT_STRATEGY = os.environ.get("COUNT_STRATEGY", "exact")
+# Время (с), в течение которого точное количество строк по фильтру берётся из кеша
+COUNT_CACHE_TTL = int(os.environ.get("COUNT_CACHE_TTL", 30))
+# Оценка планировщика, начиная с которой строки не подсчитываются точно (стратегия estimated)
+COUNT_ESTIMATE_THRESHOLD = int(os.environ.get("COUNT_ESTIMATE_THRESHOLD", 100_000))
+# Каталог для сохранения справочных данных (stale-while-revalidate)
+REFERENCE_CACHE_PATH = os.environ.get("REFERENCE_CACHE_PATH", os.path.join(BASE_DIR, ".cache", "reference"))
+# Наибольшее количество справочных копий в памяти и на диске
+REFERENCE_CACHE_MAX_ITEMS = int(os.environ.get("REFERENCE_CACHE_MAX_ITEMS", 1000))
+# Время (с) после истечения ttl, в течение которого устаревшая копия ещё отдаётся, пока обновление не удаётся
+REFERENCE_CACHE_MAX_STALE = int(os.environ.get("REFERENCE_CACHE_MAX_STALE", 3 * 24 * 60 * 60))
+
+# HTTP CLIENT
+# Общий лимит соединений должен быть больше суммы лимитов по хостам API (не менее 7 хостов WB и платформа)
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", 200))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", 20))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", 30))
+HTTP_DNS_CACHE_TTL = int(os.environ.get("HTTP_DNS_CACHE_TTL", 300))
+HTTP_REQUEST_TIMEOUT = float(os.environ.get("HTTP_REQUEST_TIMEOUT", 60))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 10))
+# Количество элементов ответа, валидируемых за раз при потоковом разборе больших отчётов
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 1000))
+# Количество страниц, запрошенных заранее, пока обрабатываются предыдущие
+PAGINATION_BUFFER_SIZE = int(os.environ.get("PAGINATION_BUFFER_SIZE", 2))
+# Количество страниц статистики карточек, запрашиваемых одновременно с упреждением
+STATISTICS_PREFETCH_PAGES = int(os.environ.get("STATISTICS_PREFETCH_PAGES", 4))
+# Запас (с), с которым повторно запрашиваются заказы и продажи до сохранённой отметки последнего изменения
+WATERMARK_OVERLAP = int(os.environ.get("WATERMARK_OVERLAP", 30 * 60))
+# Количество строк отчёта о реализации в одном запросе (limit), следующая страница запрашивается по rrdid
+SALES_REPORT_PAGE_SIZE = int(os.environ.get("SALES_REPORT_PAGE_SIZE", 100_000))
+# Время (с), в течение которого локальная копия каталога карточек не синхронизируется с API повторно
+NOMENCLATURE_SYNC_INTERVAL = int(os.environ.get("NOMENCLATURE_SYNC_INTERVAL", 60))
+# Начальный и наибольший интервалы (с) проверки состояния загрузок на маркетплейсе
+UPLOAD_POLL_INTERVAL = float(os.environ.get("UPLOAD_POLL_INTERVAL", 2))
+UPLOAD_POLL_MAX_INTERVAL = float(os.environ.get("UPLOAD_POLL_MAX_INTERVAL", 30))
+# Время (с), после которого загрузка перестаёт опрашиваться
+UPLOAD_POLL_TIMEOUT = float(os.environ.get("UPLOAD_POLL_TIMEOUT", 15 * 60))
+# Время (с), после которого сохранённый остаток считается неподтверждённым и выгружается на склад повторно
+STOCK_SNAPSHOT_TTL = int(os.environ.get("STOCK_SNAPSHOT_TTL", 6 * 60 * 60))
+
 EMAIL_SUPERUSER_PLATFORM = os.environ.get("EMAIL_SUPERUSER_PLATFORM", "")
 PASSWORD_SUPERUSER_PLATFORM = os.environ.get("PASSWORD_SUPERUSER_PLATFORM", "")
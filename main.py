@@ -7,6 +7,8 @@ from core.project.db.connect import destroy_database_pool, create_database_pool
 from core.project.db.execute_migrations import create_tables
 from core.project.message_manager.consumers import main_consumer
 from core.project.message_manager.publisher import main_publisher
+from core.project.services.platform.client import platform_client_session
+from core.project.services.rate_limiter.common import rate_limiter_snapshot
 from core.project.services.scheduler.common import scheduler
 from core.project.utils import client_session, client_cache
 
@@ -24,6 +26,8 @@ def main():
     app.add_routes(settings.ROUTES)
     app.router.add_get("/metrics", aio.web.server_stats)
     app.cleanup_ctx.append(client_session)
+    app.cleanup_ctx.append(platform_client_session)
+    app.cleanup_ctx.append(rate_limiter_snapshot)
     app.cleanup_ctx.append(scheduler)
     app.cleanup_ctx.append(main_consumer)
     app.cleanup_ctx.append(main_publisher)